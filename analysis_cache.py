@@ -0,0 +1,134 @@
+# analysis_cache.py
+import os
+import json
+import time
+import atexit
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
+
+class AnalysisCache:
+    """
+    Bounded cache of error-analysis results keyed on
+    (normalized input, language, level).
+
+    policy="lru" evicts the least recently used entry when full,
+    policy="fifo" evicts the oldest insert regardless of hits.
+    Entries older than ttl_seconds are treated as misses. When a
+    path is given the cache is loaded from and saved to that file.
+    """
+
+    POLICIES = ("lru", "fifo")
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = 24 * 3600,
+                 policy: str = "lru", path: Optional[str] = None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.policy = policy
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    @classmethod
+    def from_env(cls) -> "AnalysisCache":
+        """Build a cache from ANALYSIS_CACHE_* environment variables"""
+        ttl = os.environ.get("ANALYSIS_CACHE_TTL", str(24 * 3600))
+        return cls(
+            max_size=int(os.environ.get("ANALYSIS_CACHE_SIZE", "1024")),
+            ttl_seconds=float(ttl) if ttl else None,
+            policy=os.environ.get("ANALYSIS_CACHE_POLICY", "lru"),
+            path=os.environ.get("ANALYSIS_CACHE_PATH") or None
+        )
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Unicode-normalize, casefold and collapse whitespace"""
+        text = unicodedata.normalize("NFC", text)
+        return " ".join(text.casefold().split())
+
+    def _key(self, user_input: str, learning_lang: str, level: str) -> str:
+        return "\x1f".join((learning_lang.lower(), level.lower(), self.normalize(user_input)))
+
+    def get(self, user_input: str, learning_lang: str, level: str) -> Optional[List[Dict]]:
+        """Return the cached error list, or None on a miss"""
+        key = self._key(user_input, learning_lang, level)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None \
+                    and time.time() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.policy == "lru":
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, user_input: str, learning_lang: str, level: str, errors: List[Dict]):
+        key = self._key(user_input, learning_lang, level)
+        with self._lock:
+            self._entries[key] = (errors, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "policy": self.policy,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def load(self):
+        """Load persisted entries, skipping any that have expired"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not load analysis cache: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for key, errors, stored_at in rows[-self.max_size:]:
+                if self.ttl_seconds is None or now - stored_at <= self.ttl_seconds:
+                    self._entries[key] = (errors, stored_at)
+
+    def save(self):
+        """Write entries to disk in eviction order"""
+        if not self.path:
+            return
+        with self._lock:
+            rows = [[key, errors, stored_at] for key, (errors, stored_at) in self._entries.items()]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+default_analysis_cache = AnalysisCache.from_env()
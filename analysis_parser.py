@@ -0,0 +1,388 @@
+# analysis_parser.py
+import re
+import ast
+import json
+from typing import List, Dict, Optional, Callable, Tuple, Awaitable
+
+# Separates the tutor reply from the errors JSON in single-call responses
+ERRORS_MARKER = "### ERRORS"
+
+ERROR_TYPES = ("grammar", "vocabulary", "pronunciation", "cultural")
+SEVERITIES = ("low", "medium", "high")
+
+# JSON schema of the analysis response; validate_errors checks entries against it
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "errors": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string", "enum": list(ERROR_TYPES)},
+                    "incorrect_part": {"type": "string"},
+                    "correct_version": {"type": "string"},
+                    "explanation": {"type": "string"},
+                    "severity": {"type": "string", "enum": list(SEVERITIES)}
+                },
+                "required": ["type", "incorrect_part", "correct_version"]
+            }
+        }
+    },
+    "required": ["errors"]
+}
+
+_ERROR_PROPERTIES = ANALYSIS_SCHEMA["properties"]["errors"]["items"]["properties"]
+_ERROR_REQUIRED = ANALYSIS_SCHEMA["properties"]["errors"]["items"]["required"]
+
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PY_LITERALS = re.compile(r"\b(True|False|None)\b")
+_PY_TO_JSON = {"True": "true", "False": "false", "None": "null"}
+_DECODER = json.JSONDecoder()
+_OPENER = re.compile(r"[{\[]")
+_STRUCTURAL = re.compile(r'[{}\[\]",]')
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+
+class AnalysisParseError(ValueError):
+    """Raised when a response cannot be turned into a valid errors list"""
+
+
+class _Unrepaired(AnalysisParseError):
+    """Local parsing failed; candidate is the JSON text a repair step would get"""
+
+    def __init__(self, candidate: str):
+        super().__init__("Response is not valid JSON")
+        self.candidate = candidate
+
+
+def _scan(text: str, start: int = 0):
+    """
+    Yield (index, char) for every structural character outside string
+    literals. String bodies are skipped with one regex match each, so the
+    Python loop only runs per bracket/comma. A final (len(text), '"') is
+    yielded if the text ends inside a string.
+    """
+    pos = start
+    while True:
+        match = _STRUCTURAL.search(text, pos)
+        if match is None:
+            return
+        index, char = match.start(), match.group()
+        if char == '"':
+            end = _STRING_REST.match(text, index + 1)
+            if end is None:
+                yield len(text), '"'
+                return
+            pos = end.end()
+            continue
+        yield index, char
+        pos = index + 1
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced {...} or [...] in text in a single pass,
+    ignoring brackets inside string literals. Returns the unterminated
+    tail if the text ends before the object closes (truncated output).
+    """
+    first = _OPENER.search(text)
+    if first is None:
+        return None
+    start = first.start()
+    depth = 0
+    for index, char in _scan(text, start):
+        if char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return text[start:]
+
+
+def _sub_outside_strings(pattern: re.Pattern, repl, text: str) -> str:
+    """pattern.sub applied only to the text between double-quoted string literals"""
+    parts, pos = [], 0
+    while True:
+        quote = text.find('"', pos)
+        if quote < 0:
+            break
+        parts.append(pattern.sub(repl, text[pos:quote]))
+        end = _STRING_REST.match(text, quote + 1)
+        pos = end.end() if end is not None else len(text)
+        parts.append(text[quote:pos])
+    parts.append(pattern.sub(repl, text[pos:]))
+    return "".join(parts)
+
+
+def _open_brackets(text: str):
+    """Return (closers needed, ends inside a string, cut point before the
+    last incomplete member, closers needed at that cut point)"""
+    closers = []
+    in_string = False
+    cut, cut_closers = None, None
+    for index, char in _scan(text):
+        if char == "{":
+            closers.append("}")
+        elif char == "[":
+            closers.append("]")
+        elif char in "}]" and closers:
+            closers.pop()
+        elif char == ",":
+            cut, cut_closers = index, list(closers)
+        elif char == '"':
+            in_string = True
+    return closers, in_string, cut, cut_closers
+
+
+def repair_json(text: str) -> List[str]:
+    """
+    Candidate fixes for the slips models commonly make: smart quotes,
+    trailing commas, Python literals and output cut off before the
+    closing brackets. Truncated text yields two candidates: closed as-is
+    and cut back to the last complete member.
+    """
+    text = text.translate(_SMART_QUOTES)
+    # Only outside strings, so an explanation like "None of these" survives
+    text = _sub_outside_strings(_PY_LITERALS, lambda m: _PY_TO_JSON[m.group(1)], text)
+    text = _sub_outside_strings(_TRAILING_COMMA, r"\1", text)
+
+    closers, in_string, cut, cut_closers = _open_brackets(text)
+    if not closers:
+        return [text]
+    closed = text + ('"' if in_string else "") + "".join(reversed(closers))
+    candidates = [_sub_outside_strings(_TRAILING_COMMA, r"\1", closed)]
+    if cut is not None:
+        candidates.append(text[:cut] + "".join(reversed(cut_closers)))
+    return candidates
+
+
+def _validate_entry(item) -> Optional[Dict]:
+    """One normalized error entry, or None if it is malformed"""
+    if not isinstance(item, dict):
+        return None
+    # Older prompts used error_type/correction; accept both spellings
+    fields = {
+        "type": item.get("type", item.get("error_type")),
+        "incorrect_part": item.get("incorrect_part"),
+        "correct_version": item.get("correct_version", item.get("correction")),
+        "explanation": item.get("explanation"),
+        "severity": item.get("severity")
+    }
+    for name, spec in _ERROR_PROPERTIES.items():
+        value = fields[name]
+        if not isinstance(value, str):
+            if name in _ERROR_REQUIRED:
+                return None
+            fields[name] = None
+            continue
+        if "enum" in spec:
+            value = value.strip().lower()
+            # Kept as records' UNKNOWN rather than losing the error
+            if value not in spec["enum"]:
+                value = "unknown"
+        fields[name] = value
+    return {
+        **fields,
+        "explanation": fields["explanation"] or "",
+        "severity": fields["severity"] or "medium"
+    }
+
+
+def validate_errors(result) -> List[Dict]:
+    """
+    Check a decoded response against ANALYSIS_SCHEMA and normalize it.
+    Malformed entries are dropped one at a time and types or severities
+    outside the schema become "unknown"; only a response with entries but
+    none usable is rejected.
+    """
+    if isinstance(result, list):
+        result = {"errors": result}
+    if not isinstance(result, dict) or not isinstance(result.get("errors", []), list):
+        raise AnalysisParseError("Expected an object with an 'errors' array")
+
+    items = result.get("errors", [])
+    errors = [error for error in map(_validate_entry, items) if error is not None]
+    if items and not errors:
+        raise AnalysisParseError(f"No usable error entries: {items!r}")
+    return errors
+
+
+def _decode_local(content: str, validate: Callable):
+    if not content or not content.strip():
+        raise AnalysisParseError("Empty response")
+
+    try:
+        return validate(json.loads(content))
+    except (json.JSONDecodeError, RecursionError):
+        pass
+
+    first = _OPENER.search(content)
+    if first is None:
+        raise AnalysisParseError("No JSON object in response")
+    # raw_decode parses the first complete value and ignores any trailing prose
+    try:
+        result, _ = _DECODER.raw_decode(content, first.start())
+        return validate(result)
+    except (json.JSONDecodeError, RecursionError):
+        pass
+
+    candidate = extract_json_object(content)
+    # A truncated response's first candidate often ends in a partial entry;
+    # one that decodes but fails validation falls through to the next
+    for text in repair_json(candidate):
+        try:
+            return validate(json.loads(text))
+        except (json.JSONDecodeError, RecursionError, AnalysisParseError):
+            continue
+    # Single-quoted, Python-style dicts. literal_eval raises TypeError for
+    # unhashable keys like {[1]: 2} and RecursionError for deep nesting
+    try:
+        return validate(ast.literal_eval(candidate))
+    except (ValueError, SyntaxError, TypeError, RecursionError, MemoryError, AnalysisParseError):
+        pass
+    raise _Unrepaired(candidate)
+
+
+def _decode_repaired(repaired: str, validate: Callable):
+    try:
+        return validate(json.loads(extract_json_object(repaired or "") or ""))
+    except (json.JSONDecodeError, RecursionError) as e:
+        raise AnalysisParseError(f"Repair step failed: {e}") from e
+
+
+def _decode(content: str, validate: Callable, repair: Optional[Callable[[str], str]]):
+    try:
+        return _decode_local(content, validate)
+    except _Unrepaired as e:
+        if repair is None:
+            raise
+        return _decode_repaired(repair(e.candidate), validate)
+
+
+async def _adecode(content: str, validate: Callable,
+                   repair: Optional[Callable[[str], Awaitable[str]]]):
+    try:
+        return _decode_local(content, validate)
+    except _Unrepaired as e:
+        if repair is None:
+            raise
+        return _decode_repaired(await repair(e.candidate), validate)
+
+
+def parse_error_analysis(content: str,
+                         repair: Optional[Callable[[str], str]] = None) -> List[Dict]:
+    """
+    Parse an analysis response into a validated errors list.
+
+    Native JSON mode responses decode on the first try. Otherwise the first
+    balanced object is extracted and, if it still fails, repaired locally.
+    `repair` is an optional last resort that receives only the broken JSON
+    text (e.g. a small "fix this JSON" model call) so the analysis itself
+    is never re-run. Raises AnalysisParseError when nothing works.
+    """
+    return _decode(content, validate_errors, repair)
+
+
+async def aparse_error_analysis(content: str,
+                                repair: Optional[Callable[[str], Awaitable[str]]] = None) -> List[Dict]:
+    """parse_error_analysis with an async repair step, for use on an event loop"""
+    return await _adecode(content, validate_errors, repair)
+
+
+def validate_batch(result) -> Dict[int, List[Dict]]:
+    """
+    Check a decoded batch response ({"results": [{"id", "errors"}]}) and
+    return {id: errors}. Malformed entries are left out so the caller can
+    retry just those inputs.
+    """
+    if isinstance(result, dict):
+        result = result.get("results")
+    if not isinstance(result, list):
+        raise AnalysisParseError("Expected an object with a 'results' array")
+    errors_by_id = {}
+    for item in result:
+        if not isinstance(item, dict):
+            continue
+        try:
+            errors_by_id[int(item["id"])] = validate_errors(item)
+        except (KeyError, TypeError, ValueError):
+            continue
+    return errors_by_id
+
+
+def parse_batch_analysis(content: str,
+                         repair: Optional[Callable[[str], str]] = None) -> Dict[int, List[Dict]]:
+    """Parse a packed multi-input analysis response into {input id: errors}"""
+    return _decode(content, validate_batch, repair)
+
+
+def split_combined_response(content: str) -> Tuple[str, Optional[List[Dict]]]:
+    """
+    Split a single-call response into (tutor reply, errors). errors is None
+    when the marker or a parseable JSON block is missing.
+    """
+    reply, marker, analysis = content.partition(ERRORS_MARKER)
+    if not marker:
+        return content.strip(), None
+    try:
+        return reply.strip(), parse_error_analysis(analysis)
+    except AnalysisParseError:
+        return reply.strip(), None
+
+
+class CombinedStreamSplitter:
+    """
+    Streams the reply part of a single-call response. Text that could be
+    the start of ERRORS_MARKER is held back until it is clearly not, and
+    everything after the marker is collected for parsing at the end.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._reply = []
+        self._analysis = []
+        self._in_analysis = False
+
+    def feed(self, chunk: str) -> str:
+        """Return the part of chunk that is safe to show as reply text"""
+        if self._in_analysis:
+            self._analysis.append(chunk)
+            return ""
+        text = self._pending + chunk
+        index = text.find(ERRORS_MARKER)
+        if index >= 0:
+            self._in_analysis = True
+            self._analysis.append(text[index + len(ERRORS_MARKER):])
+            self._pending = ""
+            out = text[:index]
+        else:
+            keep = next(
+                (n for n in range(min(len(text), len(ERRORS_MARKER) - 1), 0, -1)
+                 if ERRORS_MARKER.startswith(text[-n:])),
+                0
+            )
+            self._pending = text[len(text) - keep:] if keep else ""
+            out = text[:len(text) - keep]
+        self._reply.append(out)
+        return out
+
+    def close(self) -> str:
+        """Release any held-back text once the stream has ended"""
+        out, self._pending = self._pending, ""
+        self._reply.append(out)
+        return out
+
+    @property
+    def reply(self) -> str:
+        return "".join(self._reply).strip()
+
+    def errors(self) -> Optional[List[Dict]]:
+        if not self._in_analysis:
+            return None
+        try:
+            return parse_error_analysis("".join(self._analysis))
+        except AnalysisParseError:
+            return None
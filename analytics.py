@@ -0,0 +1,290 @@
+# analytics.py
+import itertools
+import threading
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from records import ErrorType, Severity, MistakeRecord
+
+# Dashboards query every recorded error at once, so errors are also kept as
+# NumPy columns (one row per error, strings dictionary-encoded to small
+# ints) and group-bys become a bincount over combined codes instead of a
+# Python loop over every mistake dict.
+
+TREND_WIDTHS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+# The epoch was a Thursday; shift so weekly buckets start on Monday
+TREND_OFFSETS = {"week": 3 * 86400}
+
+
+class Dictionary:
+    """Dictionary encoding: each distinct string gets the next small int code"""
+
+    def __init__(self, values=()):
+        self.values = []
+        self.codes = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class MistakeColumns:
+    """
+    Columnar copy of every recorded error, kept in step with a mistake
+    store. attach() backfills from an in-memory MistakeDatabase and then
+    receives each add_mistake; for SQLite, refresh() pulls rows added since
+    the last call (by rowid), which also picks up other workers' writes.
+    Appends are buffered and written to the columns batch_size rows at a
+    time, or when a query runs.
+
+    Rows are append-only: retention compacting or removing sessions in the
+    database does not drop their history here. Columns grow by doubling
+    and queries read views of them without copying.
+    """
+
+    COLUMNS = (
+        ("session", np.int64), ("timestamp", np.float64), ("language", np.int16),
+        ("level", np.int16), ("type", np.int8), ("severity", np.int8),
+        ("incorrect_part", np.int32), ("mistake", np.int64)
+    )
+
+    def __init__(self, capacity: int = 1024, batch_size: int = 4096):
+        self.languages = Dictionary()
+        self.levels = Dictionary()
+        self.types = Dictionary(member.value for member in ErrorType)
+        self.severities = Dictionary(member.value for member in Severity)
+        # Code 0 is "no incorrect part recorded"
+        self.parts = Dictionary([""])
+        self._columns = {name: np.empty(capacity, dtype) for name, dtype in self.COLUMNS}
+        self._size = 0
+        self.batch_size = batch_size
+        self._pending = []
+        self._sqlite = None
+        self._last_rowid = 0
+        # In-memory mistakes have no id of their own; SQLite rows use theirs
+        self._mistake_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._size + len(self._pending)
+
+    def attach(self, db) -> "MistakeColumns":
+        """Backfill from db and keep following it; returns self"""
+        from database import SQLiteMistakeDatabase
+
+        if isinstance(db, SQLiteMistakeDatabase):
+            self._sqlite = db
+            self.refresh()
+            return self
+        db.attach_analytics(self)
+        return self
+
+    def append(self, session_id: int, language: str, level: str, record: MistakeRecord):
+        """Add one mistake's errors; called by MistakeDatabase.add_mistake"""
+        self._extend(self._rows(session_id, language, level, record))
+
+    def refresh(self) -> int:
+        """Pull errors written to the attached SQLite database since the last call"""
+        db = self._sqlite
+        if db is None:
+            return 0
+        fetched = db.errors_since(self._last_rowid)
+        if not fetched:
+            return 0
+        rows = []
+        for rowid, mistake_id, session_id, language, level, timestamp, error_type, severity, part in fetched:
+            rows.append((
+                session_id,
+                # Compacted sessions keep their errors but not the timestamp
+                datetime.fromisoformat(timestamp).timestamp() if timestamp else np.nan,
+                self.languages.code(language), self.levels.code(level),
+                self.types.codes.get(error_type, self.types.codes["unknown"]),
+                self.severities.codes.get(severity, self.severities.codes["unknown"]),
+                self.parts.code(part or ""), mistake_id
+            ))
+        self._last_rowid = fetched[-1][0]
+        self._extend(rows)
+        return len(rows)
+
+    def _rows(self, session_id: int, language: str, level: str, record: MistakeRecord) -> List[Tuple]:
+        language_code, level_code = self.languages.code(language), self.levels.code(level)
+        mistake_id = next(self._mistake_ids)
+        return [
+            (session_id, record.timestamp, language_code, level_code,
+             self.types.codes[error.type.value], self.severities.codes[error.severity.value],
+             self.parts.code(error.incorrect_part), mistake_id)
+            for error in record.errors
+        ]
+
+    def _extend(self, rows: List[Tuple]):
+        # Rows are buffered and copied into the columns in batches, since a
+        # NumPy write per mistake would cost more than the mistake itself
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        end = self._size + len(rows)
+        if end > len(self._columns["session"]):
+            capacity = max(end, 2 * len(self._columns["session"]))
+            for name, dtype in self.COLUMNS:
+                grown = np.empty(capacity, dtype)
+                grown[:self._size] = self._columns[name][:self._size]
+                self._columns[name] = grown
+        for (name, _), values in zip(self.COLUMNS, zip(*rows)):
+            self._columns[name][self._size:end] = values
+        self._size = end
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Read-only views of every column, cut at the same row count"""
+        with self._lock:
+            self._flush_locked()
+            views = {name: column[:self._size] for name, column in self._columns.items()}
+        for view in views.values():
+            view.flags.writeable = False
+        return views
+
+    def _dictionary(self, name: str) -> Optional[Dictionary]:
+        return {"language": self.languages, "level": self.levels, "type": self.types,
+                "severity": self.severities, "incorrect_part": self.parts}.get(name)
+
+    def _mask(self, columns: Dict[str, np.ndarray], language: Optional[str] = None,
+              level: Optional[str] = None, error_type: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None) -> Optional[np.ndarray]:
+        mask = None
+        for name, value in (("language", language), ("level", level), ("type", error_type)):
+            if value is not None:
+                selected = columns[name] == self._dictionary(name).codes.get(value, -1)
+                mask = selected if mask is None else mask & selected
+        if since is not None or until is not None:
+            timestamps = columns["timestamp"]
+            selected = (timestamps >= (since if since is not None else -np.inf)) \
+                & (timestamps < (until if until is not None else np.inf))
+            mask = selected if mask is None else mask & selected
+        return mask
+
+    def _decode(self, key: str, code: int):
+        dictionary = self._dictionary(key)
+        return dictionary.values[code] if dictionary is not None else code
+
+    def count_by(self, *keys: str, unit: str = "errors", **filters) -> Dict[Tuple, int]:
+        """
+        Counts grouped by any of language, level, type, severity,
+        incorrect_part and session, as {(key values...): count}. unit is
+        "errors" or "mistakes" (learner inputs with at least one error,
+        counted once in every group one of their errors falls in); filters
+        are language, level, error_type, since and until.
+        """
+        if unit not in ("errors", "mistakes"):
+            raise ValueError(f"Unknown unit: {unit}")
+        columns = self.columns()
+        mask = self._mask(columns, **filters)
+        selected = {name: column[mask] if mask is not None else column
+                    for name, column in columns.items()}
+        mistakes = selected["mistake"]
+        if not keys:
+            total = len(np.unique(mistakes)) if unit == "mistakes" else len(mistakes)
+            return {(): total} if total else {}
+
+        # Mixed-radix combination of the codes into one int64 group key
+        combined, sizes = None, []
+        for key in keys:
+            codes = selected[key].astype(np.int64)
+            dictionary = self._dictionary(key)
+            size = len(dictionary) if dictionary is not None else int(codes.max(initial=0)) + 1
+            combined = codes if combined is None else combined * size + codes
+            sizes.append(size)
+        if unit == "mistakes":
+            # Keep one row per distinct (group, mistake) pair
+            order = np.lexsort((mistakes, combined))
+            combined, mistakes = combined[order], mistakes[order]
+            distinct = np.ones(len(combined), dtype=bool)
+            distinct[1:] = (combined[1:] != combined[:-1]) | (mistakes[1:] != mistakes[:-1])
+            combined = combined[distinct]
+
+        groups = int(np.prod(sizes, dtype=np.float64))
+        if groups <= max(4 * len(combined), 1 << 16):
+            counts = np.bincount(combined, minlength=groups)
+            found = np.nonzero(counts)[0]
+            counts = counts[found]
+        else:
+            found, inverse = np.unique(combined, return_inverse=True)
+            counts = np.bincount(inverse)
+
+        result = {}
+        for group, count in zip(found.tolist(), counts.tolist()):
+            codes = []
+            for size in reversed(sizes):
+                group, code = divmod(group, size)
+                codes.append(code)
+            result[tuple(self._decode(key, code) for key, code in zip(keys, reversed(codes)))] = int(count)
+        return result
+
+    def type_distribution(self, unit: str = "errors", **filters) -> Dict[Tuple[str, str], Dict[str, int]]:
+        """{(language, level): {error type: count}}"""
+        result = {}
+        for (language, level, error_type), count in self.count_by(
+                "language", "level", "type", unit=unit, **filters).items():
+            result.setdefault((language, level), {})[error_type] = count
+        return result
+
+    def trend(self, freq: str = "day", by: str = "type", **filters) -> Dict[str, Dict]:
+        """Error counts per UTC hour/day/week, split by another column: {bucket: {value: count}}"""
+        width, offset = TREND_WIDTHS[freq], TREND_OFFSETS.get(freq, 0)
+        columns = self.columns()
+        mask = ~np.isnan(columns["timestamp"])
+        extra = self._mask(columns, **filters)
+        if extra is not None:
+            mask &= extra
+        buckets = np.floor((columns["timestamp"][mask] + offset) / width).astype(np.int64)
+        codes = columns[by][mask].astype(np.int64)
+        if not len(buckets):
+            return {}
+        first = int(buckets.min())
+        size = int(codes.max()) + 1
+        counts = np.bincount((buckets - first) * size + codes)
+        result = {}
+        for index in np.nonzero(counts)[0].tolist():
+            bucket, code = divmod(index, size)
+            start = datetime.fromtimestamp((first + bucket) * width - offset, timezone.utc)
+            label = start.strftime("%Y-%m-%dT%H:00") if freq == "hour" else start.date().isoformat()
+            result.setdefault(label, {})[self._decode(by, code)] = int(counts[index])
+        return result
+
+    def top_incorrect_parts(self, n: int = 10, **filters) -> List[Tuple[str, int]]:
+        """Most frequent incorrect parts, most common first"""
+        columns = self.columns()
+        parts = columns["incorrect_part"]
+        mask = self._mask(columns, **filters)
+        if mask is not None:
+            parts = parts[mask]
+        counts = np.bincount(parts, minlength=len(self.parts))
+        counts[0] = 0  # errors with no incorrect part
+        n = min(n, int(np.count_nonzero(counts)))
+        if n <= 0:
+            return []
+        top = np.argpartition(counts, -n)[-n:]
+        # Ties broken by first appearance, like Counter.most_common
+        top = top[np.lexsort((top, -counts[top]))]
+        return [(self.parts.values[code], int(counts[code])) for code in top.tolist()]
+
+    def nbytes(self) -> int:
+        """Memory held by the column buffers (capacity, not just rows)"""
+        with self._lock:
+            self._flush_locked()
+            return sum(column.nbytes for column in self._columns.values())
@@ -1,5 +1,12 @@
+import os
+import uuid
+from typing import Tuple
 import streamlit as st
-from main import LanguageLearningAssistant
+
+# "paged" shows the latest messages as cached HTML blocks with "Load earlier"
+# paging; "full" renders every kept message as its own chat element
+RENDER_MODE = os.environ.get("LLA_RENDER_MODE", "paged")
+HISTORY_PAGE_SIZE = int(os.environ.get("LLA_HISTORY_PAGE_SIZE", "20"))
 
 def set_custom_style():
     st.markdown("""
@@ -21,6 +28,13 @@ def set_custom_style():
             border: 1px solid #eee;
             border-radius: 4px;
         }
+        .chat-message.user {
+            background-color: #f8f9fa;
+        }
+        .chat-sender {
+            font-size: 0.8em;
+            color: #888;
+        }
         .report-section {
             margin: 16px 0;
             padding: 12px;
@@ -29,29 +43,114 @@ def set_custom_style():
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_session_manager():
+    """One manager per process, shared by every browser tab.
+    Imported here so the selectors render before the LLM stack loads."""
+    from session_manager import SessionManager
+
+    # The app has always kept the full conversation; SessionManager defaults to a window
+    return SessionManager(memory_mode="buffer")
+
+def get_assistant():
+    return get_session_manager().get(st.session_state.session_key)
+
+def claim_session_key(resumed=None):
+    """Bind a session key to this tab, starting a new one if another tab holds resumed"""
+    manager = get_session_manager()
+    if not resumed or not manager.claim(resumed, st.session_state.tab_id):
+        resumed = None
+        key = uuid.uuid4().hex
+        manager.claim(key, st.session_state.tab_id)
+    st.session_state.session_key = resumed or key
+    st.query_params["session"] = st.session_state.session_key
+    # get right away, so an unused claim is dropped with the idle session
+    assistant = get_assistant()
+    st.session_state.session_active = bool(resumed and assistant.current_session_id)
+
 def initialize_session():
-    if 'assistant' not in st.session_state:
-        st.session_state.assistant = LanguageLearningAssistant()
+    if 'tab_id' not in st.session_state:
+        st.session_state.tab_id = uuid.uuid4().hex
+    if 'session_key' not in st.session_state:
+        # Kept in the URL so a reload, restart or another worker finds the
+        # same session again when a snapshot store is configured. A
+        # duplicated tab or shared link gets its own session instead of
+        # driving one another tab is using.
+        claim_session_key(st.query_params.get("session"))
+    elif not get_session_manager().claim(st.session_state.session_key, st.session_state.tab_id):
+        # Evicted while idle here and since taken over by another tab
+        claim_session_key()
     if 'session_active' not in st.session_state:
         st.session_state.session_active = False
-    if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+    if 'history_pages' not in st.session_state:
+        st.session_state.history_pages = 1
+    # The manager may have evicted this tab's session while it was idle
+    if st.session_state.session_active and not get_assistant().current_session_id:
+        st.session_state.session_active = False
 
 def handle_session_toggle():
+    st.session_state.history_pages = 1
     if st.session_state.session_active:
         st.session_state.session_active = False
-        st.session_state.chat_history = []
-        st.session_state.assistant.end_session()
+        get_session_manager().release(st.session_state.session_key)
     else:
         if not st.session_state.selected_lang or not st.session_state.selected_level:
             st.warning("Please select language and level first!")
             return
-        st.session_state.assistant.start_session(
+        get_assistant().start_session(
             st.session_state.selected_lang,
             st.session_state.selected_level
         )
+        get_session_manager().save(st.session_state.session_key)
         st.session_state.session_active = True
 
+def render_message(message):
+    st.markdown(f'<div class="chat-message">{message}</div>', unsafe_allow_html=True)
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def render_block(messages: Tuple[Tuple[str, str], ...]) -> str:
+    """HTML for a run of messages, cached so unchanged blocks are not rebuilt on rerun"""
+    return "".join(
+        f'<div class="chat-message {sender}"><div class="chat-sender">'
+        f'{"You" if sender == "user" else "Tutor"}</div>{text}</div>'
+        for sender, text in messages
+    )
+
+def load_earlier():
+    st.session_state.history_pages += 1
+
+def render_history_full(assistant):
+    messages, _ = assistant.chat_history()
+    for sender, message in messages:
+        with st.chat_message("user" if sender == "user" else "assistant"):
+            render_message(message)
+
+def render_history_paged(assistant):
+    """Render the latest pages of history as a few markdown elements instead of one per message"""
+    messages, total = assistant.chat_history(
+        limit=st.session_state.history_pages * HISTORY_PAGE_SIZE
+    )
+    offset = total - len(messages)
+    if offset:
+        st.button(f"Load earlier ({offset} more)", on_click=load_earlier)
+    # Blocks are aligned to positions in the kept history, so older blocks
+    # stay cache hits as new turns arrive
+    first_edge = offset - offset % HISTORY_PAGE_SIZE + HISTORY_PAGE_SIZE
+    edges = [offset, *range(first_edge, total, HISTORY_PAGE_SIZE), total]
+    for start, end in zip(edges, edges[1:]):
+        block = tuple(messages[start - offset:end - offset])
+        st.markdown(render_block(block), unsafe_allow_html=True)
+
+def render_stream(chunks):
+    """Render chunks into a single bubble as they arrive and return the full text"""
+    placeholder = st.empty()
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        with placeholder:
+            render_message(text)
+    return text
+
 def main():
     set_custom_style()
     initialize_session()
@@ -81,19 +180,26 @@ def main():
             pass
 
     with col_btn2:
+        local_report = st.checkbox("Quick report (no AI)", key="local_report")
         if st.button("Generate Report", disabled=not st.session_state.session_active):
-            st.session_state.report_content = st.session_state.assistant.generate_session_report()
+            st.session_state.report_content = get_assistant().generate_session_report(
+                local=local_report
+            )
 
     if st.session_state.session_active:
+        if RENDER_MODE == "full":
+            render_history_full(get_assistant())
+        else:
+            render_history_paged(get_assistant())
+
         user_input = st.chat_input("Type your message...")
         if user_input:
-            response = st.session_state.assistant.generate_response(user_input)
-            st.session_state.chat_history.append(("user", user_input))
-            st.session_state.chat_history.append(("tutor", response))
-
-        for sender, message in st.session_state.chat_history:
-            with st.chat_message("user" if sender == "user" else "assistant"):
-                st.markdown(f'<div class="chat-message">{message}</div>', unsafe_allow_html=True)
+            with st.chat_message("user"):
+                render_message(user_input)
+            with st.chat_message("assistant"):
+                # The assistant's memory keeps the turn; the next rerun shows it in history
+                render_stream(get_assistant().generate_response_stream(user_input))
+            get_session_manager().save(st.session_state.session_key)
 
     if 'report_content' in st.session_state:
         st.markdown("---")
@@ -0,0 +1,151 @@
+# asgi.py
+"""
+Reference ASGI entry point for AsyncLanguageLearningAssistant, written
+against the bare ASGI interface so it needs no web framework:
+
+    uvicorn asgi:app
+
+Set LLA_SNAPSHOT_STORE (snapshots.py) to run several workers: each turn is
+saved, and a worker that has not seen a learner restores their session.
+
+Routes (JSON request and response bodies):
+    POST   /sessions/{key}           {"language": "hindi", "level": "beginner"}
+    POST   /sessions/{key}/messages  {"text": "namaste"}; ?stream=1 streams plain text
+    GET    /sessions/{key}/report    ?local=1 skips the LLM
+    DELETE /sessions/{key}
+"""
+import json
+import asyncio
+import weakref
+from urllib.parse import parse_qs
+from typing import Dict, Optional
+
+from session_manager import AsyncSessionManager
+
+
+async def read_json(receive) -> Dict:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    if not body:
+        return {}
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    return data
+
+
+async def send_json(send, status: int, payload: Dict):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class TutorApp:
+    """ASGI application serving one AsyncSessionManager; learners are addressed by key"""
+
+    def __init__(self, manager: Optional[AsyncSessionManager] = None):
+        self.manager = manager if manager is not None else AsyncSessionManager()
+        # One lock per learner key, so two requests for the same learner
+        # (a double-submit, a second tab) cannot interleave their turns
+        self._locks = weakref.WeakValueDictionary()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.manager.close()
+                self.manager.db.flush()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        parts = scope["path"].strip("/").split("/")
+        if len(parts) not in (2, 3) or parts[0] != "sessions" or not parts[1]:
+            await send_json(send, 404, {"error": "Not found"})
+            return
+        key, action = parts[1], (parts[2] if len(parts) == 3 else None)
+        route = (scope["method"], action)
+        query = parse_qs(scope.get("query_string", b"").decode())
+        try:
+            body = await read_json(receive) if scope["method"] == "POST" else {}
+        except ValueError:
+            await send_json(send, 400, {"error": "Invalid JSON body"})
+            return
+
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        async with lock:
+            await self._route(send, key, route, query, body)
+
+    async def _route(self, send, key: str, route, query: Dict, body: Dict):
+        action = route[1]
+        if route == ("POST", None):
+            await self._start(send, key, body)
+        elif route == ("DELETE", None):
+            await self.manager.release(key)
+            await send_json(send, 200, {"ended": key})
+        elif route in (("POST", "messages"), ("GET", "report")):
+            assistant = await self.manager.get(key)
+            if not assistant.current_session_id:
+                await send_json(send, 409, {"error": "Start a session first"})
+            elif action == "report":
+                report = await assistant.generate_session_report(local="1" in query.get("local", []))
+                await send_json(send, 200, {"report": report})
+            elif not isinstance(body.get("text"), str) or not body["text"].strip():
+                await send_json(send, 400, {"error": "'text' is required"})
+            elif "1" in query.get("stream", []):
+                await self._stream(send, assistant, body["text"])
+                await self.manager.save(key)
+            else:
+                reply = await assistant.generate_response(body["text"])
+                # With a snapshot store, every turn is saved so any worker can resume
+                await self.manager.save(key)
+                await send_json(send, 200, {"reply": reply})
+        else:
+            await send_json(send, 405, {"error": "Method not allowed"})
+
+    async def _start(self, send, key: str, body: Dict):
+        language, level = str(body.get("language", "")), str(body.get("level", ""))
+        assistant = await self.manager.get(key)
+        # Checked before anything changes, so a bad request leaves the current session running
+        if language.lower() not in assistant.available_languages or level.lower() not in assistant.levels:
+            await send_json(send, 400, {"error": f"Unknown language or level: {language!r}, {level!r}"})
+            return
+        # Restarting ends the learner's previous session first
+        await assistant.end_session()
+        await assistant.start_session(language, level)
+        await self.manager.save(key)
+        await send_json(send, 200, {"session_id": assistant.current_session_id,
+                                    "language": assistant.learning_lang,
+                                    "level": assistant.current_level})
+
+    async def _stream(self, send, assistant, text: str):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8")]
+        })
+        async for chunk in assistant.generate_response_stream(text):
+            await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+app = TutorApp()
@@ -0,0 +1,87 @@
+# async_assistant.py
+import time
+from typing import AsyncIterator, Dict, Optional
+
+from main import LanguageLearningAssistant
+from database import AsyncMistakeStore
+from llm_pool import metrics
+from reports import build_report_prompt, render_local_report
+from instrumentation import instrumentation
+
+
+class AsyncLanguageLearningAssistant(LanguageLearningAssistant):
+    """
+    LanguageLearningAssistant for an event loop (ASGI servers). Every public
+    method is a coroutine: model calls go through ainvoke/astream and the
+    database through AsyncMistakeStore, so one loop holds many turns in
+    flight without a thread per request. Memory summaries are still folded
+    on the shared background pool, off the turn's path.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.adb = AsyncMistakeStore(self.db)
+
+    async def start_session(self, learning_lang: str, level: str):
+        """Start a new learning session with memory"""
+        with instrumentation.span("session.start", language=learning_lang, level=level):
+            started = time.perf_counter()
+            self._select_level(learning_lang, level)
+            with instrumentation.span("db.create_session"):
+                self.current_session_id = await self.adb.create_session(
+                    language=self.learning_lang,
+                    level=self.current_level
+                )
+            self._prepare_session()
+            metrics.observe("session_start_seconds", time.perf_counter() - started)
+
+    async def end_session(self):
+        if self.current_session_id:
+            await self.adb.end_session(self.current_session_id)
+            self._reset_session()
+
+    async def to_snapshot(self) -> Optional[Dict]:
+        """JSON-ready state of the live session (see snapshots.py), or None without one"""
+        if not self.current_session_id:
+            return None
+        with instrumentation.span("session.snapshot"):
+            return self._snapshot_state(await self.adb.export_session(self.current_session_id))
+
+    async def restore_snapshot(self, state: Dict):
+        """Resume a session from to_snapshot() output, on this or any other worker"""
+        with instrumentation.span("session.restore"):
+            language = self._snapshot_language(state)
+            self._restore_state(state, language, await self.adb.import_session(state["session"]))
+
+    async def generate_response(self, user_input: str) -> str:
+        """Run error analysis and the tutor reply concurrently"""
+        return await self.agenerate_response(user_input)
+
+    async def generate_response_stream(self, user_input: str) -> AsyncIterator[str]:
+        """Yield tutor reply chunks as they arrive; memory is updated once the stream ends"""
+        async for text in self.agenerate_response_stream(user_input):
+            yield text
+
+    async def generate_session_report(self, local: bool = False) -> str:
+        """Build the report from running session aggregates; local=True skips the LLM"""
+        if not self.current_session_id:
+            return "No active session"
+
+        with instrumentation.span("report", local=local):
+            with instrumentation.span("db.summary"):
+                summary = await self.adb.get_session_summary(self.current_session_id)
+            if not summary["total_mistakes"]:
+                return "Perfect session! No mistakes found!"
+
+            if local:
+                return render_local_report(self.learning_lang, self.current_level, summary)
+
+            report_prompt = build_report_prompt(self.learning_lang, self.current_level, summary)
+            try:
+                with instrumentation.span("llm.report"):
+                    response = await self.llm.ainvoke(report_prompt)
+            except Exception as e:
+                print(f"Report generation failed: {e}")
+                return render_local_report(self.learning_lang, self.current_level, summary)
+            self._count_tokens("llm.report", response, report_prompt)
+            return response.content
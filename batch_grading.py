@@ -0,0 +1,262 @@
+# batch_grading.py
+"""
+Offline error analysis for whole assignment sets.
+
+Rows of (learner, language, level, text) are read from a JSONL or CSV file
+and streamed through the analysis: inputs matched by the precheck or the
+analysis cache are graded locally, the rest are packed several per LLM
+request with a bounded number of requests in flight. Each graded row is
+recorded in the mistake database and appended to a JSONL output file,
+which doubles as the checkpoint: rerunning with the same output skips
+rows already written.
+
+Usage: python batch_grading.py submissions.jsonl [-o graded.jsonl]
+           [--batch-size 10] [--concurrency 4] [--db mistakes.db]
+"""
+import os
+import csv
+import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, ALL_COMPLETED, FIRST_COMPLETED, wait
+from typing import List, Dict, Iterator, Optional, Set, Tuple
+
+from main import AVAILABLE_LANGUAGES, LEVELS
+from database import open_database
+from llm_pool import get_llm, wrap_llm, metrics
+from analysis_cache import AnalysisCache, default_analysis_cache
+from analysis_parser import parse_batch_analysis, AnalysisParseError
+from precheck import LocalPrecheck
+from prompts import build_batch_analysis_prompt
+
+
+class UnreadableRow(dict):
+    """
+    Stands in for an input line that could not be parsed. The reason is an
+    attribute, not a key, so no column of a real row can be mistaken for it.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__()
+        self.reason = reason
+
+
+def read_rows(path: str) -> Iterator[Dict]:
+    """
+    Yield rows from a .csv or JSONL file. Rows without an "id" are given
+    their 1-based position, so ids stay stable across runs of the same file.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (line for line in f if line.strip())
+        for position, row in enumerate(rows, start=1):
+            if isinstance(row, str):
+                try:
+                    row = json.loads(row)
+                except json.JSONDecodeError as e:
+                    row = UnreadableRow(f"Invalid JSON: {e}")
+            if not isinstance(row, dict):
+                row = UnreadableRow("Row is not an object")
+            row["id"] = str(row.get("id") or position)
+            yield row
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids already written to an output file; a torn last line is ignored"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(str(json.loads(line)["id"]))
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+    return done
+
+
+def _needs_newline(path: str) -> bool:
+    # True when a previous run died part way through writing a line
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+class BatchGrader:
+    """
+    Grades many learner inputs with as few LLM requests as possible.
+    Shares the LLM client, analysis cache and database with the interactive
+    assistant, so batch results warm the cache for live sessions too.
+    """
+
+    def __init__(self, llm=None, db=None, analysis_cache: AnalysisCache = None,
+                 batch_size: int = 10, concurrency: int = 4):
+        self.llm = wrap_llm(llm) if llm is not None else get_llm(json_mode=True)
+        self.db = db or open_database()
+        self.analysis_cache = analysis_cache or default_analysis_cache
+        self.precheck = LocalPrecheck()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        # One database session per (learner, language, level) in this run
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.counts = {
+            "rows": 0, "skipped": 0, "invalid": 0, "local": 0,
+            "llm_requests": 0, "graded": 0, "failed": 0
+        }
+
+    def grade_file(self, input_path: str, output_path: str) -> Dict:
+        """Grade every row of input_path not already in output_path"""
+        return self.grade(read_rows(input_path), output_path)
+
+    def grade(self, rows: Iterator[Dict], output_path: str) -> Dict:
+        done = completed_ids(output_path)
+        torn = _needs_newline(output_path)
+        pending = {}
+        in_flight = set()
+        with open(output_path, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=self.concurrency,
+                                   thread_name_prefix="batch-grade") as pool:
+            if torn:
+                out.write("\n")
+            for row in rows:
+                self.counts["rows"] += 1
+                if row["id"] in done:
+                    self.counts["skipped"] += 1
+                    continue
+                group = self._group(row)
+                if group is None:
+                    self.counts["invalid"] += 1
+                    self._write(out, row, [], status="invalid")
+                    continue
+                local = self._local(row, *group)
+                if local is not None:
+                    self.counts["local"] += 1
+                    self._record(out, row, group, local)
+                    continue
+                batch = pending.setdefault(group, [])
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    in_flight.add(pool.submit(self._analyze, group, pending.pop(group)))
+                # Bound the rows held in memory by the number of requests in flight
+                if len(in_flight) >= self.concurrency * 2:
+                    in_flight = self._drain(out, in_flight, FIRST_COMPLETED)
+            for group, batch in pending.items():
+                in_flight.add(pool.submit(self._analyze, group, batch))
+            self._drain(out, in_flight)
+        for session_id in self._sessions.values():
+            self.db.end_session(session_id)
+        self._sessions.clear()
+        self.db.flush()
+        return dict(self.counts)
+
+    def _group(self, row: Dict) -> Optional[Tuple[str, str]]:
+        language = AVAILABLE_LANGUAGES.get(str(row.get("language", "")).strip().lower())
+        level = str(row.get("level", "")).strip().lower()
+        if isinstance(row, UnreadableRow) or language is None or level not in LEVELS \
+                or not str(row.get("text") or "").strip():
+            return None
+        return language, level
+
+    def _local(self, row: Dict, language: str, level: str) -> Optional[List[Dict]]:
+        local = self.precheck.classify(row["text"], language)
+        if local is not None:
+            return local
+        return self.analysis_cache.get(row["text"], language, level)
+
+    def _request(self, language: str, level: str, rows: List[Dict]) -> Dict[int, List[Dict]]:
+        prompt = build_batch_analysis_prompt(
+            language, level, [(index, row["text"]) for index, row in enumerate(rows, start=1)]
+        )
+        with self._lock:
+            self.counts["llm_requests"] += 1
+        metrics.incr("batch_llm_requests")
+        try:
+            return parse_batch_analysis(self.llm.invoke(prompt).content)
+        except AnalysisParseError as e:
+            print(f"Batch analysis parse failed: {e}")
+            return {}
+
+    def _analyze(self, group: Tuple[str, str], rows: List[Dict]) -> List[Tuple[Dict, Optional[List[Dict]]]]:
+        """Runs on the pool; returns (row, errors or None) for every row"""
+        try:
+            found = self._request(*group, rows)
+        except Exception as e:
+            print(f"Batch analysis failed: {e}")
+            return [(row, None) for row in rows]
+        results = []
+        for index, row in enumerate(rows, start=1):
+            errors = found.get(index)
+            # Inputs the packed response dropped are retried once on their own
+            if errors is None and len(rows) > 1:
+                try:
+                    errors = self._request(*group, [row]).get(1)
+                except Exception as e:
+                    print(f"Batch analysis failed: {e}")
+            results.append((row, errors))
+        return results
+
+    def _drain(self, out, futures: Set, return_when: str = ALL_COMPLETED) -> Set:
+        done, not_done = wait(futures, return_when=return_when)
+        for future in done:
+            for row, errors in future.result():
+                group = self._group(row)
+                if errors is None:
+                    # Not written, so the row is retried on the next run
+                    self.counts["failed"] += 1
+                    continue
+                self.analysis_cache.put(row["text"], *group, errors)
+                self._record(out, row, group, errors)
+        return not_done
+
+    def _record(self, out, row: Dict, group: Tuple[str, str], errors: List[Dict]):
+        # Database first: a crash before the output line means the row is
+        # graded again, never that it is in the output but not the database
+        if errors:
+            key = (str(row.get("learner", "")), *group)
+            session_id = self._sessions.get(key)
+            if session_id is None:
+                session_id = self._sessions[key] = self.db.create_session(*group)
+            self.db.add_mistake(session_id, row["text"], errors)
+        self.counts["graded"] += 1
+        self._write(out, row, errors)
+
+    @staticmethod
+    def _write(out, row: Dict, errors: List[Dict], status: str = "ok"):
+        out.write(json.dumps({
+            "id": row["id"],
+            "learner": row.get("learner"),
+            "language": row.get("language"),
+            "level": row.get("level"),
+            "text": row.get("text"),
+            "status": status,
+            "errors": errors
+        }, ensure_ascii=False) + "\n")
+        out.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade a file of learner submissions")
+    parser.add_argument("input", help="JSONL or CSV with learner, language, level, text columns")
+    parser.add_argument("-o", "--output", help="JSONL results file (default: <input>.graded.jsonl)")
+    parser.add_argument("--batch-size", type=int, default=10, help="inputs packed per LLM request")
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM requests in flight")
+    parser.add_argument("--db", help="SQLite mistake database (default: MISTAKE_DB_PATH or in-memory)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.input)[0] + ".graded.jsonl"
+    db = open_database(args.db)
+    grader = BatchGrader(db=db, batch_size=args.batch_size, concurrency=args.concurrency)
+    try:
+        counts = grader.grade_file(args.input, output)
+    finally:
+        db.close()
+    print(json.dumps(counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
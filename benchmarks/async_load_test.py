@@ -0,0 +1,133 @@
+# benchmarks/async_load_test.py
+"""Drive hundreds of concurrent learners through the ASGI app on one event loop.
+
+Each learner posts start -> one message per scripted turn -> report ->
+end to asgi.TutorApp in process (no sockets), against the fake LLM. The
+peak thread count shows the turns are not holding a thread each.
+
+Usage: python benchmarks/async_load_test.py [--learners 300] [--latency 0.3] [--jitter 0.1] [--stream]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from typing import Dict, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asgi import TutorApp
+from session_manager import AsyncSessionManager
+from analysis_cache import AnalysisCache
+from llm_client import default_gate
+from fake_llm import FakeChatModel
+from load_test import DEFAULT_SCRIPT, percentile
+
+
+async def request(app, method: str, path: str, payload: Dict = None) -> Tuple[int, bytes]:
+    """One in-process ASGI HTTP request; returns (status, body)"""
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "method": method, "path": path,
+             "query_string": query.encode(), "headers": []}
+    body = json.dumps(payload).encode() if payload is not None else b""
+    sent = False
+    status, chunks = None, []
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()  # no disconnect while the response is pending
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        else:
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def run_learner(app, key: str, script: Dict, stream: bool) -> Dict:
+    status, _ = await request(app, "POST", f"/sessions/{key}",
+                              {"language": script["language"], "level": script["level"]})
+    assert status == 200, status
+    turn_latencies = []
+    path = f"/sessions/{key}/messages" + ("?stream=1" if stream else "")
+    for text in script["turns"]:
+        started = time.perf_counter()
+        # Tagged per learner so identical prompts are not coalesced into one call
+        status, _ = await request(app, "POST", path, {"text": f"{text} ({key})"})
+        assert status == 200, status
+        turn_latencies.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    status, _ = await request(app, "GET", f"/sessions/{key}/report")
+    report = time.perf_counter() - started
+    await request(app, "DELETE", f"/sessions/{key}")
+    return {"turns": turn_latencies, "report": report, "report_ok": status == 200}
+
+
+async def sample_threads(peak: list, stop: asyncio.Event):
+    while not stop.is_set():
+        peak[0] = max(peak[0], threading.active_count())
+        await asyncio.sleep(0.01)
+
+
+async def run(args):
+    llm = FakeChatModel(latency=args.latency, jitter=args.jitter, seed=args.seed)
+    # A private cache keeps the analysis call count comparable between runs
+    app = TutorApp(AsyncSessionManager(llm=llm, analysis_cache=AnalysisCache(max_size=0)))
+
+    peak, stop = [threading.active_count()], asyncio.Event()
+    sampler = asyncio.ensure_future(sample_threads(peak, stop))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        run_learner(app, f"learner-{i}", DEFAULT_SCRIPT[i % len(DEFAULT_SCRIPT)], args.stream)
+        for i in range(args.learners)
+    ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+    return results, elapsed, peak[0], llm
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--learners", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stream", action="store_true", help="use the streaming message route")
+    parser.add_argument("--max-concurrency", type=int, default=1000,
+                        help="LLM requests in flight allowed by the gate")
+    parser.add_argument("--rpm", type=float, default=1_000_000,
+                        help="gate rate limit; the fake model has no real quota")
+    args = parser.parse_args()
+
+    default_gate.configure(requests_per_minute=args.rpm, burst=args.max_concurrency,
+                           max_concurrency=args.max_concurrency)
+
+    threads_before = threading.active_count()
+    results, elapsed, peak_threads, llm = asyncio.run(run(args))
+
+    turns = [latency for result in results for latency in result["turns"]]
+    print(f"learners: {args.learners}  turns: {len(turns)}  wall: {elapsed:.2f}s")
+    print(f"throughput: {len(turns) / elapsed:.1f} turns/s")
+    print("turn latency  p50 {:.0f} ms  p95 {:.0f} ms  p99 {:.0f} ms".format(
+        *(percentile(turns, p) * 1000 for p in (50, 95, 99))
+    ))
+    reports = [result["report"] for result in results]
+    print(f"report p50 {percentile(reports, 50) * 1000:.0f} ms, "
+          f"failed {sum(not result['report_ok'] for result in results)}")
+    print(f"threads: {threads_before} before, peak {peak_threads} during the run")
+    print(f"llm calls: {llm.calls}")
+    print(f"gate: {default_gate.stats()}")
+
+
+if __name__ == "__main__":
+    main()
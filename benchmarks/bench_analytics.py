@@ -0,0 +1,152 @@
+# benchmarks/bench_analytics.py
+"""Dashboard queries over all mistakes: MistakeColumns vs iterating MistakeDatabase.
+
+Fills an in-memory database with synthetic sessions spread over 30 days
+(1-3 errors per mistake) while MistakeColumns follows it, then runs the
+same queries both ways, counting errors and mistakes, and checks the
+answers match.
+
+Usage: python benchmarks/bench_analytics.py [--mistakes 1000000] [--per-session 50] [--repeat 3]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import MistakeDatabase
+from analytics import MistakeColumns
+
+LANGUAGES = ["Hindi", "Spanish", "French", "Japanese", "Chinese"]
+LEVELS = ["beginner", "intermediate", "expert", "master"]
+TYPES = ["grammar", "vocabulary", "pronunciation", "cultural"]
+SEVERITIES = ["low", "medium", "high"]
+START = datetime(2026, 9, 1, tzinfo=timezone.utc).timestamp()
+
+
+def sessions(mistakes, per_session, seed=7):
+    """Exported-session dicts, as MistakeDatabase.import_session takes them"""
+    rng = random.Random(seed)
+    parts = [f"phrase {i}" for i in range(5000)]
+    for first in range(0, mistakes, per_session):
+        started = START + rng.random() * 30 * 86400
+        yield {
+            "id": 0, "language": rng.choice(LANGUAGES), "level": rng.choice(LEVELS),
+            "start_time": started,
+            "mistakes": [
+                [started + turn * 60, f"input {first + turn}", [
+                    {"type": rng.choice(TYPES), "severity": rng.choice(SEVERITIES),
+                     # Skewed so a few parts dominate, like real recurring mistakes
+                     "incorrect_part": parts[int(rng.paretovariate(1.2)) % len(parts)],
+                     "correct_version": "fixed", "explanation": ""}
+                    for _ in range(rng.randint(1, 3))
+                ]]
+                for turn in range(min(per_session, mistakes - first))
+            ]
+        }
+
+
+def fill(db, mistakes, per_session):
+    started = time.perf_counter()
+    for session in sessions(mistakes, per_session):
+        db.import_session(session)
+    return time.perf_counter() - started
+
+
+def naive_distribution(db):
+    counts = {}
+    for session_id, records in db.mistakes.items():
+        session = db.sessions[session_id]
+        counter = counts.setdefault((session.language, session.level), Counter())
+        for record in records:
+            for error in record.errors:
+                counter[error.type.value] += 1
+    return {key: dict(counter) for key, counter in counts.items()}
+
+
+def naive_mistake_distribution(db):
+    # A mistake counts once under each error type it contains
+    counts = {}
+    for session_id, records in db.mistakes.items():
+        session = db.sessions[session_id]
+        counter = counts.setdefault((session.language, session.level), Counter())
+        for record in records:
+            counter.update({error.type.value for error in record.errors})
+    return {key: dict(counter) for key, counter in counts.items()}
+
+
+def naive_trend(db):
+    counts = {}
+    for records in db.mistakes.values():
+        for record in records:
+            day = datetime.fromtimestamp(record.timestamp, timezone.utc).date().isoformat()
+            counter = counts.setdefault(day, Counter())
+            for error in record.errors:
+                counter[error.type.value] += 1
+    return {day: dict(counter) for day, counter in counts.items()}
+
+
+def naive_top_parts(db, language=None):
+    counter = Counter()
+    for session_id, records in db.mistakes.items():
+        if language is not None and db.sessions[session_id].language != language:
+            continue
+        for record in records:
+            for error in record.errors:
+                if error.incorrect_part:
+                    counter[error.incorrect_part] += 1
+    return counter.most_common(10)
+
+
+def timed(repeat, fn, *args, **kwargs):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mistakes", type=int, default=1_000_000)
+    parser.add_argument("--per-session", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    plain = fill(MistakeDatabase(), args.mistakes // 10, args.per_session)
+    db = MistakeDatabase()
+    columns = MistakeColumns().attach(db)
+    followed = fill(db, args.mistakes // 10, args.per_session)
+    print(f"write cost with columns attached: {followed / plain - 1:+.0%} "
+          f"({args.mistakes // 10:,} mistakes, {plain:.2f}s -> {followed:.2f}s)")
+    db = MistakeDatabase()
+    columns = MistakeColumns().attach(db)
+    fill(db, args.mistakes, args.per_session)
+    print(f"{args.mistakes:,} mistakes, {len(columns):,} errors, "
+          f"columns {columns.nbytes() / len(columns):.1f} B/error")
+
+    queries = [
+        ("type by language/level", naive_distribution, (db,), columns.type_distribution, {}),
+        ("mistakes by type", naive_mistake_distribution, (db,), columns.type_distribution,
+         {"unit": "mistakes"}),
+        ("daily trend by type", naive_trend, (db,), columns.trend, {}),
+        ("top 10 parts", naive_top_parts, (db,), columns.top_incorrect_parts, {}),
+        ("top 10 parts, Hindi", naive_top_parts, (db, "Hindi"), columns.top_incorrect_parts,
+         {"language": "Hindi"}),
+    ]
+    print(f"{'query':<24}{'dict ms':>10}{'columns ms':>12}{'speedup':>9}  match")
+    for name, naive, naive_args, vectorized, kwargs in queries:
+        naive_time, expected = timed(args.repeat, naive, *naive_args)
+        column_time, result = timed(args.repeat, vectorized, **kwargs)
+        print(f"{name:<24}{naive_time * 1000:>10.1f}{column_time * 1000:>12.1f}"
+              f"{naive_time / column_time:>8.0f}x  {result == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_batch_grading.py
+"""Wall time and LLM requests of BatchGrader for one input per request vs packed requests.
+
+Also interrupts a run part way and resumes it from the output file to
+check that no row is graded twice.
+
+Usage: python benchmarks/bench_batch_grading.py [--rows 500] [--latency 0.3] [--concurrency 4]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_grading import BatchGrader, completed_ids
+from database import MistakeDatabase
+from analysis_cache import AnalysisCache
+from llm_client import default_gate
+from fake_llm import FakeChatModel
+
+LANGUAGES = [("hindi", "beginner"), ("spanish", "intermediate"), ("french", "expert")]
+
+
+def write_rows(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            language, level = LANGUAGES[i % len(LANGUAGES)]
+            f.write(json.dumps({
+                "learner": f"learner-{i % 40}", "language": language, "level": level,
+                "text": f"submission {i}: mera naam Sara hai aur main school jaati hoon"
+            }) + "\n")
+
+
+def grader(latency, batch_size, concurrency):
+    return BatchGrader(
+        llm=FakeChatModel(latency=latency), db=MistakeDatabase(),
+        analysis_cache=AnalysisCache(max_size=10_000, ttl_seconds=None),
+        batch_size=batch_size, concurrency=concurrency
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    # The fake model has no quota, so lift the gate's production rate limit
+    default_gate.configure(requests_per_minute=1_000_000, burst=1_000, max_concurrency=1_000)
+
+    workdir = tempfile.mkdtemp()
+    input_path = os.path.join(workdir, "submissions.jsonl")
+    write_rows(input_path, args.rows)
+
+    print(f"{args.rows} rows, {args.latency}s per request, {args.concurrency} in flight")
+    print(f"{'batch size':>10}{'requests':>10}{'seconds':>10}{'rows/s':>10}")
+    for batch_size in (1, 5, 10, 20):
+        output = os.path.join(workdir, f"graded-{batch_size}.jsonl")
+        started = time.perf_counter()
+        counts = grader(args.latency, batch_size, args.concurrency).grade_file(input_path, output)
+        elapsed = time.perf_counter() - started
+        print(f"{batch_size:>10}{counts['llm_requests']:>10}{elapsed:>10.2f}"
+              f"{counts['graded'] / elapsed:>10.1f}")
+
+    # Simulate an interrupted run: keep half the output plus a torn line
+    output = os.path.join(workdir, "graded-10.jsonl")
+    with open(output, encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(output, "w", encoding="utf-8") as f:
+        f.writelines(lines[:len(lines) // 2])
+        f.write(lines[len(lines) // 2][:20])
+    counts = grader(args.latency, 10, args.concurrency).grade_file(input_path, output)
+    with open(output, encoding="utf-8") as f:
+        written = sum(1 for _ in f)
+    print(f"resume: skipped {counts['skipped']}, graded {counts['graded']}, "
+          f"{len(completed_ids(output))} unique ids in {written} lines")
+
+
+if __name__ == "__main__":
+    main()
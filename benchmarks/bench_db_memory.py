@@ -0,0 +1,112 @@
+# benchmarks/bench_db_memory.py
+"""Per-record memory of the in-memory mistake store over synthetic mistakes.
+
+Compares the original dict-per-mistake layout (datetime, list of error
+dicts) with MistakeDatabase's slotted records, then shows what is left
+after the retention policy compacts every ended session.
+
+Usage: python benchmarks/bench_db_memory.py [--count 1000000] [--per-session 50]
+"""
+import os
+import sys
+import gc
+import json
+import random
+import argparse
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import MistakeDatabase, RetentionPolicy
+
+ERROR_TEMPLATES = [
+    {"type": "grammar", "incorrect_part": "mera naam hai", "correct_version": "mera naam ... hai",
+     "explanation": "The verb comes at the end of the sentence.", "severity": "medium"},
+    {"type": "vocabulary", "incorrect_part": "ka", "correct_version": "ki",
+     "explanation": "Use the feminine postposition with a feminine noun.", "severity": "low"},
+    {"type": "grammar", "incorrect_part": "je suis allé", "correct_version": "je suis allée",
+     "explanation": "The participle agrees with a feminine subject.", "severity": "high"},
+    {"type": "cultural", "incorrect_part": "tu", "correct_version": "vous",
+     "explanation": "Use the formal form with strangers.", "severity": "low"},
+]
+
+
+def synthetic_mistakes(count):
+    """Yield (user_input, errors) with freshly decoded errors, as the parser returns them"""
+    rng = random.Random(7)
+    encoded = [json.dumps(rng.sample(ERROR_TEMPLATES, k)) for k in (1, 2, 3) for _ in range(4)]
+    for i in range(count):
+        yield f"learner input number {i}", json.loads(rng.choice(encoded))
+
+
+def traced(fn, *args):
+    """Run fn and return (result, bytes it left allocated)"""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn(*args)
+    gc.collect()
+    return result, tracemalloc.get_traced_memory()[0] - before
+
+
+def legacy_store(count, per_session):
+    """The layout MistakeDatabase.add_mistake used to build"""
+    mistakes = {}
+    for i, (user_input, errors) in enumerate(synthetic_mistakes(count)):
+        mistakes.setdefault(i // per_session, []).append({
+            "timestamp": datetime.now(),
+            "user_input": user_input,
+            "errors": errors
+        })
+    return mistakes
+
+
+def record_store(count, per_session):
+    db = MistakeDatabase(RetentionPolicy(compact_after=0))
+    session_id = None
+    for i, (user_input, errors) in enumerate(synthetic_mistakes(count)):
+        if i % per_session == 0:
+            session_id = db.create_session("Hindi", "beginner")
+        db.add_mistake(session_id, user_input, errors)
+    return db
+
+
+def end_all(db):
+    for session_id in list(db.active_sessions):
+        db.end_session(session_id)
+
+
+def input_bytes(count):
+    # The user_input strings are identical in both layouts
+    return sum(sys.getsizeof(f"learner input number {i}") for i in range(count))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--per-session", type=int, default=50)
+    args = parser.parse_args()
+    count = args.count
+    inputs = input_bytes(count)
+
+    # Traced throughout so frees during compaction are seen
+    tracemalloc.start()
+    legacy, legacy_used = traced(legacy_store, count, args.per_session)
+    del legacy
+    db, record_used = traced(record_store, count, args.per_session)
+    _, freed = traced(end_all, db)
+    tracemalloc.stop()
+    compacted_used = record_used + freed
+
+    print(f"{count:,} mistakes, {args.per_session} per session "
+          f"(user_input text is {inputs / count:.0f} B/record in both layouts)")
+    print(f"{'layout':<22}{'total MB':>10}{'B/record':>10}{'excl. input':>13}")
+    for name, used in (("dict + datetime", legacy_used),
+                       ("slotted records", record_used),
+                       ("after compaction", compacted_used)):
+        excl = max(used - inputs, 0) if name != "after compaction" else used
+        print(f"{name:<22}{used / 1e6:>10.1f}{used / count:>10.0f}{excl / count:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# benchmarks/bench_instrumentation.py
+"""Per-span overhead of the instrumentation layer when enabled and disabled.
+
+Each turn is a root span with five nested stage spans, like a two-call turn.
+
+Usage: python benchmarks/bench_instrumentation.py [--turns 50000]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrumentation import Instrumentation
+
+
+def nested_turn(instrumentation):
+    # Same shape as a two-call turn: a root span with five stages
+    with instrumentation.span("turn"):
+        for stage in ("memory.load", "prompt.format", "llm.reply", "analysis", "memory.save"):
+            with instrumentation.span(stage):
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=50000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    for _ in range(args.turns):
+        pass
+    empty = time.perf_counter() - started
+
+    for enabled in (False, True):
+        instrumentation = Instrumentation(enabled=enabled)
+        started = time.perf_counter()
+        for _ in range(args.turns):
+            nested_turn(instrumentation)
+        elapsed = time.perf_counter() - started - empty
+        print(f"enabled={enabled!s:<6} {elapsed / args.turns * 1e6:7.2f} us/turn "
+              f"({elapsed / (args.turns * 6) * 1e9:6.0f} ns/span)")
+    print(instrumentation.to_prometheus().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_memory_window.py
+"""Show history size per turn for buffer vs token-window memory over a long session.
+
+Usage: python benchmarks/bench_memory_window.py [--turns 200] [--max-tokens 1500]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import LanguageLearningAssistant
+from window_memory import approx_tokens
+from llm_client import default_gate
+from fake_llm import FakeChatModel
+
+
+def history_tokens(assistant) -> int:
+    history = assistant.memory.load_memory_variables({})["history"]
+    return sum(approx_tokens(message.content) for message in history)
+
+
+def run(mode, turns, max_tokens):
+    assistant = LanguageLearningAssistant(
+        llm=FakeChatModel(latency=0.0), memory_mode=mode, memory_max_tokens=max_tokens
+    )
+    assistant.start_session("hindi", "master")
+    sizes = []
+    started = time.perf_counter()
+    for turn in range(turns):
+        sizes.append(history_tokens(assistant))
+        assistant.generate_response(f"Mujhe turn {turn} ke baare mein batao")
+    elapsed = time.perf_counter() - started
+    return sizes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--max-tokens", type=int, default=1500)
+    args = parser.parse_args()
+
+    # The fake model has no quota, so lift the gate's production rate limit
+    default_gate.configure(requests_per_minute=1_000_000, burst=1_000, max_concurrency=1_000)
+
+    checkpoints = [t for t in (1, 10, 50, 100, 150, args.turns) if t <= args.turns]
+    print(f"{'mode':<8}" + "".join(f"{'turn ' + str(t):>12}" for t in checkpoints) + f"{'total s':>10}")
+    for mode in ("buffer", "window"):
+        sizes, elapsed = run(mode, args.turns, args.max_tokens)
+        row = "".join(f"{sizes[t - 1]:>12}" for t in checkpoints)
+        print(f"{mode:<8}{row}{elapsed:>10.2f}")
+    print("(history tokens sent with the prompt, ~4 chars/token)")
+
+
+if __name__ == "__main__":
+    main()
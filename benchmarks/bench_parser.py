@@ -0,0 +1,86 @@
+# benchmarks/bench_parser.py
+"""Parse time and success rate of the analysis parser over recorded responses.
+
+Compares analysis_parser.parse_error_analysis with the original
+json.loads + "```json" split fallback.
+
+Usage: python benchmarks/bench_parser.py [--repeat 2000]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis_parser import parse_error_analysis, AnalysisParseError
+
+CORPUS = os.path.join(ROOT, "benchmarks", "data", "analysis_responses.jsonl")
+
+
+def legacy_parse(content):
+    """The parsing previously inlined in _analyze_errors"""
+    if not content.strip():
+        return None
+    try:
+        try:
+            result = json.loads(content)
+            if "errors" in result:
+                return result["errors"]
+            return []
+        except json.JSONDecodeError:
+            json_str = content.split("```json")[-1].split("```")[0].strip()
+            result = json.loads(json_str)
+            return result.get("errors", [])
+    except Exception:
+        return None
+
+
+def new_parse(content):
+    try:
+        return parse_error_analysis(content)
+    except AnalysisParseError:
+        return None
+
+
+def bench(parser, responses, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        results = [parser(response) for response in responses]
+    elapsed = time.perf_counter() - started
+    return results, elapsed / (repeat * len(responses))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    responses = [entry["response"] for entry in corpus]
+
+    legacy, legacy_time = bench(legacy_parse, responses, args.repeat)
+    new, new_time = bench(new_parse, responses, args.repeat)
+
+    # Cells show how many errors were extracted, "-" for a failed parse
+    print(f"{'response':<20}{'legacy':>8}{'new':>8}")
+    for entry, old_result, new_result in zip(corpus, legacy, new):
+        cells = ["-" if result is None else str(len(result)) for result in (old_result, new_result)]
+        print(f"{entry['name']:<20}{cells[0]:>8}{cells[1]:>8}")
+    for label, results, per_parse in (("legacy", legacy, legacy_time), ("new", new, new_time)):
+        ok = sum(result is not None for result in results)
+        print(f"{label:<8} success {ok}/{len(results)}  {per_parse * 1e6:.1f} us/parse")
+
+    # Timing over responses both parsers handle, so repairs don't skew the comparison
+    common = [r for r, a, b in zip(responses, legacy, new) if a is not None and b is not None]
+    _, legacy_common = bench(legacy_parse, common, args.repeat)
+    _, new_common = bench(new_parse, common, args.repeat)
+    print(f"common subset ({len(common)} responses): legacy {legacy_common * 1e6:.1f} us, "
+          f"new {new_common * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_prompt_prefix.py
+"""Bytes and tokens sent per tutor turn with and without a cached static prompt prefix.
+
+Uses LocalContextCache, which re-attaches the prefix before the model
+call, so both runs must reach the (fake) model with identical prompts;
+only what would cross the wire differs.
+
+Usage: python benchmarks/bench_prompt_prefix.py [--turns 20] [--single-call]
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import LanguageLearningAssistant
+from context_cache import LocalContextCache
+from llm_pool import PromptCache
+from analysis_cache import AnalysisCache
+from llm_client import default_gate
+from fake_llm import FakeChatModel
+
+TURNS = ["namate", "mera naam Sara hai", "dhanyavad", "aap kaise ho", "shubh ratri"]
+
+
+def run(context_cache, turns, turn_mode):
+    llm = FakeChatModel(latency=0.0)
+    assistant = LanguageLearningAssistant(
+        # Fresh caches and a window large enough that no turn is summarized
+        # mid-run, so both runs make exactly the same model calls
+        llm=llm, prompt_cache=PromptCache(), analysis_cache=AnalysisCache(),
+        memory_mode="window", memory_max_tokens=100_000,
+        turn_mode=turn_mode, context_cache=context_cache
+    )
+    assistant.start_session("hindi", "beginner")
+    sent = []
+    for turn in range(turns):
+        user_input = TURNS[turn % len(TURNS)]
+        # What the assistant hands to the reply model for this turn
+        text = assistant._format_prompt(user_input, assistant._load_history()).to_string()
+        sent.append(len(text.encode("utf-8")))
+        assistant.generate_response(user_input)
+    return sent, llm.usage
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--single-call", action="store_true")
+    args = parser.parse_args()
+
+    # The fake model has no quota, so lift the gate's production rate limit
+    default_gate.configure(requests_per_minute=1_000_000, burst=1_000, max_concurrency=1_000)
+    turn_mode = "single_call" if args.single_call else "two_call"
+
+    full, full_usage = run(None, args.turns, turn_mode)
+    cache = LocalContextCache()
+    cached, cached_usage = run(cache, args.turns, turn_mode)
+
+    print(f"{'turn':>5}{'full bytes':>12}{'cached bytes':>14}{'full tok':>10}{'cached tok':>12}")
+    for turn in sorted({0, 1, 4, 9, args.turns - 1}):
+        if turn < args.turns:
+            print(f"{turn + 1:>5}{full[turn]:>12}{cached[turn]:>14}"
+                  f"{full[turn] // 4:>10}{cached[turn] // 4:>12}")
+    total_full, total_cached = sum(full), sum(cached)
+    print(f"total {total_full:,} -> {total_cached:,} bytes "
+          f"({1 - total_cached / total_full:.0%} less, ~{(total_full - total_cached) // 4:,} tokens saved)")
+    print(f"cache: {cache.stats()}")
+    # The stand-in re-attaches the prefix, so the model must see the same input
+    same = full_usage["input_tokens"] == cached_usage["input_tokens"]
+    print(f"model input identical in both runs: {same}")
+
+
+if __name__ == "__main__":
+    main()
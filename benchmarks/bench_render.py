@@ -0,0 +1,86 @@
+# benchmarks/bench_render.py
+"""Streamlit rerun time of app.py with long chat histories.
+
+Runs the app headless with streamlit.testing and times a rerun with 50,
+500 and 2000 messages in the session's memory, for the "full" render mode
+(one chat element per message, as app.py used to do) and the "paged" mode.
+
+Usage: python benchmarks/bench_render.py [--sizes 50 500 2000] [--reruns 5]
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+
+import app
+from session_manager import SessionManager
+from fake_llm import FakeChatModel
+
+# AppTest sets session state before its script thread exists, which logs a
+# harmless bare-mode warning per instance
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+    lambda record: "missing ScriptRunContext" not in record.getMessage()
+)
+
+
+def app_script():
+    import app
+
+    app.main()
+
+
+def seed_session(manager, key, messages):
+    assistant = manager.get(key)
+    assistant.start_session("hindi", "beginner")
+    for turn in range(messages // 2):
+        assistant.memory.save_context(
+            {"input": f"Mujhe turn {turn} ke baare mein batao"},
+            {"output": f"Turn {turn}: **Namaste!** (Namaste) - Hello! Target: namaste {turn}"}
+        )
+
+
+def time_reruns(mode, key, reruns):
+    app.RENDER_MODE = mode
+    at = AppTest.from_function(app_script, default_timeout=60)
+    at.session_state["session_key"] = key
+    at.session_state["session_active"] = True
+    at.run()  # first run fills the block cache
+    timings = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - started)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return statistics.median(timings), len(at.markdown)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    manager = SessionManager(llm=FakeChatModel(latency=0.0), memory_mode="window")
+    app.get_session_manager = lambda: manager
+
+    print(f"{'messages':>9}{'full ms':>10}{'elements':>10}{'paged ms':>10}{'elements':>10}")
+    for size in args.sizes:
+        key = f"bench-{size}"
+        seed_session(manager, key, size)
+        full_s, full_elements = time_reruns("full", key, args.reruns)
+        paged_s, paged_elements = time_reruns("paged", key, args.reruns)
+        print(f"{size:>9}{full_s * 1000:>10.1f}{full_elements:>10}"
+              f"{paged_s * 1000:>10.1f}{paged_elements:>10}")
+    print(f"(median of {args.reruns} reruns; paged mode shows {app.HISTORY_PAGE_SIZE} messages per page)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_review_scheduler.py
+"""Prompt size per turn: full history for reinforcement vs a small window plus due reviews.
+
+"full" keeps the whole conversation in the prompt and relies on the model
+to find old mistakes in it; "reviews" uses a short token window and lists
+the spaced-repetition items due that turn.
+
+Usage: python benchmarks/bench_review_scheduler.py [--turns 40] [--window 600]
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import LanguageLearningAssistant
+from llm_pool import PromptCache
+from analysis_cache import AnalysisCache
+from llm_client import default_gate
+from fake_llm import FakeChatModel
+
+
+def mistake(incorrect, correct, error_type="vocabulary"):
+    return json.dumps({"errors": [{
+        "type": error_type, "incorrect_part": incorrect, "correct_version": correct,
+        "explanation": f"Use '{correct}'", "severity": "medium"
+    }]})
+
+
+NO_ERRORS = json.dumps({"errors": []})
+# (learner input, analysis) - mistakes early on, then mostly corrected forms
+EARLY = [
+    ("namate ji", mistake("namate", "namaste")),
+    ("mera nam Sara hai", mistake("nam", "naam")),
+    ("main school jata hoon", mistake("jata", "jaati", "grammar")),
+    ("aap kaise ho", NO_ERRORS),
+]
+LATE = [
+    ("namaste ji", NO_ERRORS),
+    ("mera naam Sara hai", NO_ERRORS),
+    ("aap kaise ho", NO_ERRORS),
+    ("main school jaati hoon", NO_ERRORS),
+    ("kal milte hain", NO_ERRORS),
+    ("namate dost", mistake("namate", "namaste")),
+]
+ANALYSES = {user_input: json.loads(analysis)["errors"] for user_input, analysis in EARLY + LATE}
+
+
+def learner_input(turn, turns):
+    if turn < turns // 4:
+        return EARLY[turn % len(EARLY)][0]
+    return LATE[turn % len(LATE)][0]
+
+
+def run(turns, window, review_limit):
+    assistant = LanguageLearningAssistant(
+        llm=FakeChatModel(latency=0.0), prompt_cache=PromptCache(),
+        analysis_cache=AnalysisCache(), memory_mode="window", memory_max_tokens=window,
+        review_limit=review_limit
+    )
+    # Each scripted input always gets its scripted analysis
+    assistant._local_analysis = ANALYSES.get
+    assistant.start_session("hindi", "beginner")
+    sizes, surfaced = [], 0
+    for turn in range(turns):
+        user_input = learner_input(turn, turns)
+        text = assistant._format_prompt(user_input, assistant._load_history()).to_string()
+        sizes.append(len(text.encode("utf-8")))
+        surfaced += text.count("\n- ") if "Due for review" in text else 0
+        assistant.generate_response(user_input)
+    return sizes, surfaced, assistant.reviews.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--window", type=int, default=600)
+    args = parser.parse_args()
+
+    # The fake model has no quota, so lift the gate's production rate limit
+    default_gate.configure(requests_per_minute=1_000_000, burst=1_000, max_concurrency=1_000)
+
+    full, _, _ = run(args.turns, 100_000, review_limit=0)
+    reviewed, surfaced, stats = run(args.turns, args.window, review_limit=3)
+
+    checkpoints = [t for t in (1, 10, 20, 40, args.turns) if t <= args.turns]
+    print(f"{'mode':<9}" + "".join(f"{'turn ' + str(t):>10}" for t in dict.fromkeys(checkpoints))
+          + f"{'total KB':>10}")
+    for name, sizes in (("full", full), ("reviews", reviewed)):
+        row = "".join(f"{sizes[t - 1]:>10}" for t in dict.fromkeys(checkpoints))
+        print(f"{name:<9}{row}{sum(sizes) / 1024:>10.1f}")
+    print(f"(prompt bytes per turn; reviews window {args.window} tokens)")
+    print(f"review items surfaced in prompts: {surfaced}; scheduler: {stats}")
+
+
+if __name__ == "__main__":
+    main()
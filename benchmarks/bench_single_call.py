@@ -0,0 +1,57 @@
+# benchmarks/bench_single_call.py
+"""Requests, estimated tokens and latency per turn: two-call vs single-call mode.
+
+Usage: python benchmarks/bench_single_call.py [--turns 20] [--latency 0.4]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import LanguageLearningAssistant
+from analysis_cache import AnalysisCache
+from llm_client import default_gate
+from fake_llm import FakeChatModel
+
+INPUTS = ["Yo soy ir al mercado", "Ayer yo como paella", "Ella es más alto que yo",
+          "Mañana voy a viajar a Madrid", "Me gusta mucho los libros"]
+
+
+def run(mode, turns, latency):
+    llm = FakeChatModel(latency=latency)
+    assistant = LanguageLearningAssistant(
+        llm=llm, turn_mode=mode, memory_mode="window",
+        analysis_cache=AnalysisCache(max_size=0)
+    )
+    assistant.start_session("spanish", "intermediate")
+    started = time.perf_counter()
+    for turn in range(turns):
+        assistant.generate_response(f"{INPUTS[turn % len(INPUTS)]} ({turn})")
+    elapsed = time.perf_counter() - started
+    mistakes = assistant.db.get_session_summary(assistant.current_session_id)["total_mistakes"]
+    return llm.usage, elapsed / turns, mistakes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.4)
+    args = parser.parse_args()
+
+    # The fake model has no quota, so lift the gate's production rate limit
+    default_gate.configure(requests_per_minute=1_000_000, burst=1_000, max_concurrency=1_000)
+
+    print(f"{'mode':<12}{'req/turn':>10}{'in tok/turn':>13}{'out tok/turn':>14}"
+          f"{'ms/turn':>10}{'mistakes':>10}")
+    for mode in ("two_call", "single_call"):
+        usage, per_turn, mistakes = run(mode, args.turns, args.latency)
+        print(f"{mode:<12}{usage['requests'] / args.turns:>10.1f}"
+              f"{usage['input_tokens'] / args.turns:>13.0f}"
+              f"{usage['output_tokens'] / args.turns:>14.0f}"
+              f"{per_turn * 1000:>10.0f}{mistakes:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_snapshot.py
+"""Snapshot and restore time and size for long sessions.
+
+Plays N turns against the fake LLM (every turn records a mistake), then
+times to_snapshot + encode + store.put on one manager and store.get +
+decode + restore on a fresh manager with its own database, as a second
+worker would. Raw is the uncompressed JSON size.
+
+Usage: python benchmarks/bench_snapshot.py [--turns 100 500 2000] [--repeat 5]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_manager import SessionManager
+from snapshots import FileSnapshotStore, SQLiteSnapshotStore
+from database import MistakeDatabase
+from analysis_cache import AnalysisCache
+from llm_client import default_gate, TokenBucket
+from fake_llm import FakeChatModel
+
+TURNS = ["namate", "mera nam Sara hai", "main school jata hoon", "aap kaise ho", "shubh ratri"]
+
+
+def play(llm, store, turns):
+    manager = SessionManager(llm=llm, db=MistakeDatabase(), snapshot_store=store,
+                             analysis_cache=AnalysisCache(max_size=0))
+    assistant = manager.get("learner")
+    assistant.start_session("hindi", "beginner")
+    for turn in range(turns):
+        assistant.generate_response(f"{TURNS[turn % len(TURNS)]} {turn}")
+    return manager, assistant
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Only snapshot cost is measured, so the gate's rate limit is lifted
+    default_gate.bucket = TokenBucket(1_000_000, 1_000)
+
+    workdir = tempfile.mkdtemp()
+    stores = {
+        "file": FileSnapshotStore(os.path.join(workdir, "snapshots")),
+        "sqlite": SQLiteSnapshotStore(os.path.join(workdir, "snapshots.db"))
+    }
+    llm = FakeChatModel(latency=0.0)
+
+    print(f"{'turns':>6}{'store':>8}{'raw KB':>9}{'stored KB':>11}{'save ms':>9}{'restore ms':>12}")
+    for turns in args.turns:
+        for name, store in stores.items():
+            manager, assistant = play(llm, store, turns)
+            state = assistant.to_snapshot()
+            raw = len(json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            save = best_of(args.repeat, lambda: manager.save("learner"))
+            stored = len(store.get("learner"))
+
+            def restore():
+                # A fresh worker: own database, nothing live for the key
+                SessionManager(llm=llm, db=MistakeDatabase(), snapshot_store=store).get("learner")
+
+            restore_time = best_of(args.repeat, restore)
+            restored = SessionManager(llm=llm, db=MistakeDatabase(), snapshot_store=store).get("learner")
+            assert restored.chat_history() == assistant.chat_history()
+            assert restored.db.get_session_summary(restored.current_session_id) == \
+                assistant.db.get_session_summary(assistant.current_session_id)
+            print(f"{turns:>6}{name:>8}{raw / 1024:>9.1f}{stored / 1024:>11.1f}"
+                  f"{save * 1000:>9.2f}{restore_time * 1000:>12.2f}")
+    print(f"(best of {args.repeat}; restored history and mistake summary match the original)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_startup.py
+"""Guard the cold-start cost of the modules app.py loads before a session starts.
+
+Runs `python -X importtime` in a fresh interpreter for each module, reports
+the cumulative import time, and fails if any heavy LLM dependency was
+imported eagerly or the budget is exceeded. Stdlib modules Streamlit has
+already loaded by the time app.py runs are imported first, so the number
+is the marginal cost our code adds. The budget is set well above this
+machine's noise (our own modules take roughly 60 ms and vary by 20 ms
+between runs) and well below what an eager LangChain import costs.
+
+Usage: python benchmarks/bench_startup.py [--budget-ms 150] [--runs 5]
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules app.py imports (directly or via get_session_manager) before start_session
+MODULES = ["session_manager", "main", "database", "llm_pool"]
+HEAVY = ("langchain", "langchain_core", "langchain_google_genai", "google", "pydantic")
+PRELOADED = "asyncio, logging, concurrent.futures, typing, threading, json, re"
+
+CHECK = """
+import sys
+import {module}
+heavy = sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy!r}))
+print(",".join(heavy))
+"""
+
+
+def import_time_us(module: str) -> int:
+    """Cumulative microseconds reported by -X importtime for the module"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {PRELOADED}; import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def eager_heavy_imports(module: str):
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK.format(module=module, heavy=HEAVY)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        best = min(import_time_us(module) for _ in range(args.runs)) / 1000
+        heavy = eager_heavy_imports(module)
+        ok = not heavy and best <= args.budget_ms
+        failed |= not ok
+        print(f"{module:<18}{best:8.1f} ms  {'ok' if ok else 'FAIL'}"
+              + (f"  eager imports: {', '.join(heavy)}" if heavy else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
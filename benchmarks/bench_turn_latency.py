@@ -0,0 +1,57 @@
+# benchmarks/bench_turn_latency.py
+"""Compare per-turn latency of the sequential and concurrent turn pipelines.
+
+Usage: python benchmarks/bench_turn_latency.py [--latency 0.5] [--turns 10]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import LanguageLearningAssistant
+from fake_llm import FakeChatModel
+
+INPUTS = ["namate", "mera naam Sara hai", "dhanyavad", "aap kaise ho", "shubh ratri"]
+
+
+def sequential_turn(assistant, user_input):
+    # The original flow: analysis first, then the tutor reply
+    errors = assistant._analyze_errors(user_input)
+    assistant._record_mistake(assistant.current_session_id, user_input, errors)
+    history = assistant.memory.load_memory_variables({})["history"]
+    response = assistant.chain.invoke({"text": user_input, "history": history})
+    assistant.memory.save_context({"input": user_input}, {"output": response.content})
+
+
+def run(label, turn, turns):
+    timings = []
+    for i in range(turns):
+        start = time.perf_counter()
+        turn(INPUTS[i % len(INPUTS)])
+        timings.append(time.perf_counter() - start)
+    mean = sum(timings) / len(timings)
+    print(f"{label:<12} mean {mean * 1000:8.1f} ms/turn over {turns} turns")
+    return mean
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+
+    assistant = LanguageLearningAssistant(llm=FakeChatModel(latency=args.latency))
+    assistant.start_session("hindi", "beginner")
+
+    baseline = run("sequential", lambda text: sequential_turn(assistant, text), args.turns)
+    threaded = run("concurrent", assistant.generate_response, args.turns)
+    native = run("async", lambda text: asyncio.run(assistant.agenerate_response(text)), args.turns)
+
+    print(f"speedup: threaded {baseline / threaded:.2f}x, async {baseline / native:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# benchmarks/fake_llm.py
+import re
+import time
+import json
+import random
+import asyncio
+import threading
+from typing import List, Optional, Any, Iterator, AsyncIterator
+from pydantic import PrivateAttr
+from analysis_parser import ERRORS_MARKER
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+ANALYSIS_RESPONSE = """{
+    "errors": [
+        {
+            "type": "vocabulary",
+            "incorrect_part": "namate",
+            "correct_version": "namaste",
+            "explanation": "Missing 's' sound in greeting",
+            "severity": "medium"
+        }
+    ]
+}"""
+
+TUTOR_RESPONSE = """* Target: नमस्ते (Namaste)
+* Pronunciation: *Na-mas-te*
+* Translation: Hello
+* Grammar: Greeting used at any time of day
+* Usage: नमस्ते, आप कैसे हैं?
+* Exercise: Greet your teacher
+* Culture: Said with palms pressed together"""
+
+# Packed analysis prompts tag each learner text as "[id] ..."
+_BATCH_IDS = re.compile(r"^\s*\[(\d+)\] ", re.M)
+
+REPORT_RESPONSE = """## Session Report
+- Most mistakes were vocabulary slips in greetings
+- Practise: namaste, dhanyavaad, shubh ratri
+- Recommendation: repeat greetings drills before moving on"""
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for Gemini. Each call sleeps for latency plus a
+    uniform jitter drawn from a seeded RNG, and answers with canned
+    responses chosen by prompt kind. List-valued responses are cycled
+    in call order so runs are reproducible.
+    """
+
+    latency: float = 0.5
+    jitter: float = 0.0
+    seed: int = 0
+    analysis_response: Any = ANALYSIS_RESPONSE
+    tutor_response: Any = TUTOR_RESPONSE
+    report_response: Any = REPORT_RESPONSE
+    summary_response: Any = "Learner practised Hindi greetings; recurring mistake: namate -> namaste."
+
+    _rng: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _calls: dict = PrivateAttr(default_factory=dict)
+    _usage: dict = PrivateAttr(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-latency"
+
+    @property
+    def calls(self) -> dict:
+        """Number of calls answered per prompt kind"""
+        return dict(self._calls)
+
+    @property
+    def usage(self) -> dict:
+        """Requests and estimated input/output tokens (~4 chars/token)"""
+        return dict(self._usage)
+
+    def _track(self, messages: List[BaseMessage], output: str):
+        input_tokens = sum(len(message.content) for message in messages) // 4
+        with self._lock:
+            self._usage["requests"] = self._usage.get("requests", 0) + 1
+            self._usage["input_tokens"] = self._usage.get("input_tokens", 0) + input_tokens
+            self._usage["output_tokens"] = self._usage.get("output_tokens", 0) + len(output) // 4
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            offset = self._rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency + offset)
+
+    def _kind(self, messages: List[BaseMessage]) -> str:
+        # Analysis, report and summary prompts are sent as a single plain prompt
+        if len(messages) == 1:
+            content = messages[0].content
+            if "Analyze these" in content:
+                return "batch"
+            if "Analyze this" in content:
+                return "analysis"
+            if "learning report" in content:
+                return "report"
+            if "running summary" in content:
+                return "summary"
+        return "tutor"
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        kind = self._kind(messages)
+        with self._lock:
+            count = self._calls.get(kind, 0)
+            self._calls[kind] = count + 1
+        if kind == "batch":
+            response = self._batch_response(messages[0].content, count)
+        else:
+            response = getattr(self, f"{kind}_response")
+        if isinstance(response, (list, tuple)):
+            response = response[count % len(response)]
+        # Single-call prompts ask for the errors JSON after the reply
+        if kind == "tutor" and ERRORS_MARKER in messages[0].content:
+            analysis = self.analysis_response
+            if isinstance(analysis, (list, tuple)):
+                analysis = analysis[count % len(analysis)]
+            response = f"{response}\n{ERRORS_MARKER}\n{analysis}"
+        self._track(messages, response)
+        return response
+
+    def _batch_response(self, prompt: str, count: int) -> str:
+        # One analysis_response per tagged id, cycled like single analyses
+        analyses = self.analysis_response
+        if not isinstance(analyses, (list, tuple)):
+            analyses = [analyses]
+        results = []
+        for offset, item_id in enumerate(_BATCH_IDS.findall(prompt)):
+            try:
+                errors = json.loads(analyses[(count + offset) % len(analyses)])["errors"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                errors = []
+            results.append({"id": int(item_id), "errors": errors})
+        return json.dumps({"results": results}, ensure_ascii=False)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs) -> ChatResult:
+        time.sleep(self._delay())
+        message = AIMessage(content=self._respond(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        message = AIMessage(content=self._respond(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, messages: List[BaseMessage]) -> List[str]:
+        return self._respond(messages).splitlines(keepends=True)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        # Spread the total latency over the chunks so the first one arrives early
+        chunks = self._chunks(messages)
+        delay = self._delay()
+        for text in chunks:
+            time.sleep(delay / len(chunks))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        chunks = self._chunks(messages)
+        delay = self._delay()
+        for text in chunks:
+            await asyncio.sleep(delay / len(chunks))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
@@ -0,0 +1,142 @@
+# benchmarks/load_test.py
+"""Replay scripted multi-turn sessions for N concurrent learners against the fake LLM.
+
+Each learner runs start_session -> generate_response (per scripted turn)
+-> generate_session_report through a shared SessionManager.
+
+Usage:
+    python benchmarks/load_test.py --learners 50 --latency 0.3 --jitter 0.1
+    python benchmarks/load_test.py --script sessions.json
+    python benchmarks/load_test.py --rpm 600 --max-concurrency 16   (production gate)
+    python benchmarks/load_test.py --coalesce   (share identical concurrent prompts)
+where sessions.json is a list of {"language", "level", "turns": [...]}.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_manager import SessionManager
+from analysis_cache import AnalysisCache
+from llm_client import ResilientLLM, default_gate
+from fake_llm import FakeChatModel
+
+DEFAULT_SCRIPT = [
+    {"language": "hindi", "level": "beginner",
+     "turns": ["namate", "mera naam Sara hai", "dhanyavad", "aap kaise ho", "shubh ratri"]},
+    {"language": "spanish", "level": "intermediate",
+     "turns": ["Yo soy ir al mercado", "Ayer comí paella", "Me gusta leer libros",
+               "Mañana voy a viajar", "Ella es más alto que yo"]},
+    {"language": "french", "level": "expert",
+     "turns": ["Il pleut des cordes", "Je suis allé au cinéma hier soir",
+               "Si j'aurais su, je serais venu", "C'est la vie", "Bon appétit à tous"]},
+    {"language": "japanese", "level": "master",
+     "turns": ["お疲れ様でした", "先生に伺いたいことがあります", "猫の手も借りたい",
+               "恐れ入りますが", "よろしくお願いいたします"]},
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_learner(manager: SessionManager, key: str, script: Dict) -> Dict:
+    assistant = manager.get(key)
+    started = time.perf_counter()
+    assistant.start_session(script["language"], script["level"])
+    session_start = time.perf_counter() - started
+
+    turn_latencies = []
+    for text in script["turns"]:
+        started = time.perf_counter()
+        assistant.generate_response(text)
+        turn_latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    report_error = None
+    try:
+        assistant.generate_session_report()
+    except Exception as e:
+        report_error = f"{type(e).__name__}: {e}"
+    report = time.perf_counter() - started
+    manager.release(key)
+    return {"session_start": session_start, "turns": turn_latencies,
+            "report": report, "report_error": report_error}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--learners", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--script", help="JSON file of scripted sessions")
+    parser.add_argument("--max-concurrency", type=int, default=1000,
+                        help="LLM requests in flight allowed by the gate")
+    parser.add_argument("--rpm", type=float, default=1_000_000,
+                        help="gate rate limit; the fake model has no real quota")
+    parser.add_argument("--coalesce", action="store_true",
+                        help="merge identical concurrent prompts as production does; learners "
+                             "sharing a script then share calls and the load is understated")
+    args = parser.parse_args()
+
+    default_gate.configure(requests_per_minute=args.rpm, burst=args.max_concurrency,
+                           max_concurrency=args.max_concurrency)
+
+    scripts = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            scripts = json.load(f)
+
+    llm = FakeChatModel(latency=args.latency, jitter=args.jitter, seed=args.seed)
+    # Learners replaying the same script send identical prompts, so by default
+    # each one gets its own model call; wrap_llm passes this wrapper through as is
+    client = ResilientLLM(llm, gate=default_gate, coalesce=args.coalesce)
+    # A private cache keeps the analysis call count comparable between runs
+    manager = SessionManager(llm=client, analysis_cache=AnalysisCache(max_size=0))
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.learners) as pool:
+        results = list(pool.map(
+            lambda i: run_learner(manager, f"learner-{i}", scripts[i % len(scripts)]),
+            range(args.learners)
+        ))
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    turns = [latency for result in results for latency in result["turns"]]
+    print(f"learners: {args.learners}  turns: {len(turns)}  wall: {elapsed:.2f}s")
+    print(f"throughput: {len(turns) / elapsed:.1f} turns/s")
+    print("turn latency  p50 {:.0f} ms  p95 {:.0f} ms  p99 {:.0f} ms".format(
+        *(percentile(turns, p) * 1000 for p in (50, 95, 99))
+    ))
+    starts = [result["session_start"] for result in results]
+    reports = [result["report"] for result in results]
+    print(f"session start p50 {percentile(starts, 50) * 1000:.1f} ms, "
+          f"report p50 {percentile(reports, 50) * 1000:.0f} ms")
+    print(f"memory: peak {(peak - baseline) / 1024:.0f} KiB, "
+          f"retained {(current - baseline) / 1024:.0f} KiB, "
+          f"peak per session {(peak - baseline) / args.learners / 1024:.1f} KiB")
+    print(f"llm calls: {llm.calls}")
+    gate = default_gate.stats()
+    print(f"gate: {gate}")
+    print(f"coalesced calls: {gate['coalesced']} ({'on' if args.coalesce else 'off'})")
+    failures = [result["report_error"] for result in results if result["report_error"]]
+    if failures:
+        print(f"report failures: {len(failures)} (first: {failures[0]})")
+
+
+if __name__ == "__main__":
+    main()
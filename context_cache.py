@@ -0,0 +1,279 @@
+# context_cache.py
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from langchain_core.runnables import Runnable
+
+# The static system prompt is identical for every session, so it is stored
+# once on the provider and each request sends only a handle to it plus the
+# session settings, history and input.
+
+
+class CacheHandle:
+    """Reference to a prompt prefix stored by a provider"""
+
+    __slots__ = ("name", "model", "prefix_bytes", "expires_at")
+
+    def __init__(self, name: str, model: str, prefix_bytes: int, expires_at: float):
+        self.name = name
+        self.model = model
+        self.prefix_bytes = prefix_bytes
+        self.expires_at = expires_at
+
+
+class ContextCache:
+    """
+    Base class for provider-side prefix caches. Subclasses implement
+    _create (store a prefix, return its provider name), prepare (rewrite
+    the messages sent alongside a handle) and target (the model call that
+    references the handle). Handles are created once per (model, prefix)
+    and renewed shortly before they expire.
+    """
+
+    # After a failed create, send full prompts for this long before retrying
+    retry_after = 300
+
+    def __init__(self, ttl_seconds: float = 3600, renew_margin: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self.renew_margin = renew_margin
+        self._handles = {}
+        self._failed = {}
+        self._wrapped = {}
+        # key -> Future of the handle being created, so concurrent callers share one create
+        self._creating = {}
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "created": 0, "failures": 0}
+
+    def handle(self, model: str, prefix: str) -> Optional[CacheHandle]:
+        """Return a live handle for prefix, creating it if needed; None if the provider refused"""
+        key = self._key(model, prefix)
+        handle, creating, owner = self._claim(key)
+        if creating is None:
+            return handle
+        if owner:
+            return self._create_handle(key, model, prefix, creating)
+        return creating.result()
+
+    async def ahandle(self, model: str, prefix: str) -> Optional[CacheHandle]:
+        """handle() for an event loop: the create runs on a worker thread and waiters await it"""
+        key = self._key(model, prefix)
+        handle, creating, owner = self._claim(key)
+        if creating is None:
+            return handle
+        if owner:
+            return await asyncio.to_thread(self._create_handle, key, model, prefix, creating)
+        return await asyncio.wrap_future(creating)
+
+    @staticmethod
+    def _key(model: str, prefix: str):
+        return model, hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+
+    def _claim(self, key):
+        """
+        (handle, None, False) when the answer is already known, else
+        (None, future of the handle, True if this caller must create it)
+        """
+        with self._lock:
+            handle = self._handles.get(key)
+            now = time.time()
+            if handle is not None and now < handle.expires_at - self.renew_margin:
+                self.counts["hits"] += 1
+                return handle, None, False
+            if now < self._failed.get(key, 0):
+                return None, None, False
+            creating = self._creating.get(key)
+            if creating is None:
+                creating = self._creating[key] = Future()
+                return None, creating, True
+            if handle is not None and now < handle.expires_at:
+                # Being renewed by another caller; the old handle is still live
+                self.counts["hits"] += 1
+                return handle, None, False
+            return None, creating, False
+
+    def _create_handle(self, key, model: str, prefix: str, creating: Future) -> Optional[CacheHandle]:
+        # The create is a network call for real providers, so it runs
+        # outside the lock and other prefixes and sessions are not held up
+        handle = None
+        try:
+            name = self._create(model, prefix)
+            handle = CacheHandle(name, model, len(prefix.encode("utf-8")),
+                                 time.time() + self.ttl_seconds)
+        except Exception as e:
+            print(f"Context cache create failed: {e}")
+        finally:
+            with self._lock:
+                if handle is not None:
+                    self._handles[key] = handle
+                    self.counts["created"] += 1
+                else:
+                    self.counts["failures"] += 1
+                    self._failed[key] = time.time() + self.retry_after
+                del self._creating[key]
+            creating.set_result(handle)
+        return handle
+
+    def wrap(self, llm, model: str, prefix: str) -> "CachedPrefixLLM":
+        """The reply model for prompts built with cached_prefix=True"""
+        key = (id(llm), model, prefix)
+        with self._lock:
+            wrapper = self._wrapped.get(key)
+            if wrapper is None:
+                wrapper = CachedPrefixLLM(self, llm, model, prefix)
+                self._wrapped[key] = wrapper
+            return wrapper
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self.counts, "handles": len(self._handles)}
+
+    def _create(self, model: str, prefix: str) -> str:
+        raise NotImplementedError
+
+    def prepare(self, messages: List, handle: CacheHandle, prefix: str) -> List:
+        return messages
+
+    def target(self, llm, handle: CacheHandle):
+        return llm
+
+
+def _with_prefix(messages: List, prefix: str) -> List:
+    """Put prefix back in front of the system message, rebuilding the full prompt"""
+    from langchain_core.messages import SystemMessage
+
+    if messages and messages[0].type == "system":
+        return [SystemMessage(content=prefix + messages[0].content), *messages[1:]]
+    return [SystemMessage(content=prefix), *messages]
+
+
+class CachedPrefixLLM(Runnable):
+    """
+    Sends prompts whose static prefix lives in a ContextCache. The handle
+    is looked up on every call, so it is renewed transparently; if the
+    cache cannot provide one, the prefix is re-attached and the full
+    prompt is sent instead.
+    """
+
+    def __init__(self, cache: ContextCache, llm, model: str, prefix: str):
+        self.cache = cache
+        self.llm = llm
+        self.model = model
+        self.prefix = prefix
+
+    def _route(self, input: Any):
+        return self._routed(input, self.cache.handle(self.model, self.prefix))
+
+    async def _aroute(self, input: Any):
+        return self._routed(input, await self.cache.ahandle(self.model, self.prefix))
+
+    def _routed(self, input: Any, handle: Optional[CacheHandle]):
+        messages = input.to_messages() if hasattr(input, "to_messages") else list(input)
+        if handle is None:
+            return self.llm, _with_prefix(messages, self.prefix)
+        return self.cache.target(self.llm, handle), self.cache.prepare(messages, handle, self.prefix)
+
+    def invoke(self, input: Any, config=None, **kwargs) -> Any:
+        llm, messages = self._route(input)
+        return llm.invoke(messages, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config=None, **kwargs) -> Any:
+        llm, messages = await self._aroute(input)
+        return await llm.ainvoke(messages, config, **kwargs)
+
+    def stream(self, input: Any, config=None, **kwargs):
+        llm, messages = self._route(input)
+        yield from llm.stream(messages, config, **kwargs)
+
+    async def astream(self, input: Any, config=None, **kwargs):
+        llm, messages = await self._aroute(input)
+        async for chunk in llm.astream(messages, config, **kwargs):
+            yield chunk
+
+
+class LocalContextCache(ContextCache):
+    """
+    Offline stand-in for a provider cache. Prefixes are kept in process
+    and re-attached just before the model call, so the model sees exactly
+    the uncached prompt while the counters show what would have crossed
+    the wire.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, renew_margin: float = 60):
+        super().__init__(ttl_seconds, renew_margin)
+        self._prefixes = {}
+        self.counts.update({"requests": 0, "bytes_sent": 0, "bytes_cached": 0})
+
+    def _create(self, model: str, prefix: str) -> str:
+        name = f"local/{hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:16]}"
+        self._prefixes[name] = prefix
+        return name
+
+    def prepare(self, messages: List, handle: CacheHandle, prefix: str) -> List:
+        sent = sum(len(str(message.content).encode("utf-8")) for message in messages)
+        with self._lock:
+            self.counts["requests"] += 1
+            self.counts["bytes_sent"] += sent
+            self.counts["bytes_cached"] += handle.prefix_bytes
+        return _with_prefix(messages, self._prefixes[handle.name])
+
+
+class GeminiContextCache(ContextCache):
+    """
+    Gemini explicit context caching. The prefix is stored as the cached
+    system instruction; requests then reference it by name and may not set
+    their own system instruction, so remaining system text (session
+    settings, memory summary) is folded into the first user turn.
+    Gemini only caches prefixes above a minimum token count; smaller ones
+    fail to create and fall back to the full prompt.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, renew_margin: float = 60,
+                 api_key: Optional[str] = None):
+        super().__init__(ttl_seconds, renew_margin)
+        self.api_key = api_key or os.environ.get("GOOGLE_API_KEY")
+
+    def _create(self, model: str, prefix: str) -> str:
+        from google import genai
+        from google.genai import types
+
+        client = genai.Client(api_key=self.api_key)
+        cache = client.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=prefix, ttl=f"{int(self.ttl_seconds)}s"
+            )
+        )
+        return cache.name
+
+    def prepare(self, messages: List, handle: CacheHandle, prefix: str) -> List:
+        from langchain_core.messages import HumanMessage
+
+        system = [str(m.content) for m in messages if m.type == "system"]
+        rest = [m for m in messages if m.type != "system"]
+        if system and rest and rest[0].type == "human":
+            rest[0] = HumanMessage(content="\n\n".join([*system, str(rest[0].content)]))
+        elif system:
+            rest.insert(0, HumanMessage(content="\n\n".join(system)))
+        return rest
+
+    def target(self, llm, handle: CacheHandle):
+        return llm.bind(cached_content=handle.name)
+
+
+def context_cache_from_env() -> Optional[ContextCache]:
+    """LLA_CONTEXT_CACHE=local|gemini selects a cache; unset disables prefix caching"""
+    kind = os.environ.get("LLA_CONTEXT_CACHE", "").lower()
+    ttl = float(os.environ.get("LLA_CONTEXT_CACHE_TTL", "3600"))
+    if kind == "local":
+        return LocalContextCache(ttl_seconds=ttl)
+    if kind == "gemini":
+        return GeminiContextCache(ttl_seconds=ttl)
+    return None
+
+
+default_context_cache = context_cache_from_env()
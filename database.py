@@ -1,61 +1,727 @@
 # database.py
+import os
+import json
+import sqlite3
+import asyncio
+import threading
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Iterable, Tuple
+
+from records import ErrorRecord, MistakeRecord, SessionRecord
+
+
+class SessionStats:
+    """Running per-session aggregates, updated as each mistake is recorded"""
+
+    __slots__ = ("total_mistakes", "total_errors", "by_type", "by_severity", "incorrect_parts")
 
-class MistakeDatabase:
     def __init__(self):
+        self.total_mistakes = 0
+        self.total_errors = 0
+        self.by_type = Counter()
+        self.by_severity = Counter()
+        self.incorrect_parts = Counter()
+
+    def add(self, errors: Iterable[ErrorRecord]):
+        self.total_mistakes += 1
+        for error in errors:
+            self.total_errors += 1
+            self.by_type[error.type.value] += 1
+            self.by_severity[error.severity.value] += 1
+            if error.incorrect_part:
+                self.incorrect_parts[error.incorrect_part] += 1
+
+    def summary(self, top_n: int = 5) -> Dict:
+        return {
+            "total_mistakes": self.total_mistakes,
+            "total_errors": self.total_errors,
+            "by_type": dict(self.by_type.most_common()),
+            "by_severity": dict(self.by_severity.most_common()),
+            "top_incorrect_parts": self.incorrect_parts.most_common(top_n)
+        }
+
+class RetentionPolicy:
+    """
+    What happens to ended sessions over time:
+    - compact_after: seconds after end_session when a session's individual
+      mistakes are dropped; its SessionStats summary is kept.
+    - max_ended_sessions: ended sessions beyond this count are removed
+      entirely, oldest first.
+    Mistakes are appended to archive_path (JSON lines) before being dropped.
+    None disables a limit; the default policy keeps everything.
+    """
+
+    def __init__(self, compact_after: Optional[float] = None,
+                 max_ended_sessions: Optional[int] = None,
+                 archive_path: Optional[str] = None):
+        self.compact_after = compact_after
+        self.max_ended_sessions = max_ended_sessions
+        self.archive_path = archive_path
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        """Build a policy from MISTAKE_* environment variables"""
+        compact_after = os.environ.get("MISTAKE_COMPACT_AFTER")
+        max_ended = os.environ.get("MISTAKE_MAX_ENDED_SESSIONS")
+        return cls(
+            compact_after=float(compact_after) if compact_after else None,
+            max_ended_sessions=int(max_ended) if max_ended else None,
+            archive_path=os.environ.get("MISTAKE_ARCHIVE_PATH") or None
+        )
+
+    def archive(self, session_id: int, session: Dict, mistakes: List[Dict]):
+        """Append a session and its mistakes to the archive file, if configured"""
+        if not self.archive_path or not mistakes:
+            return
+        line = json.dumps(
+            {"session_id": session_id, **session, "mistakes": mistakes},
+            ensure_ascii=False, default=datetime.isoformat
+        )
+        try:
+            with open(self.archive_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"Mistake archive write failed: {e}")
+
+
+class MistakeDatabase:
+    def __init__(self, retention: Optional[RetentionPolicy] = None):
         """
         In-memory database structure:
-        - sessions: {session_id: {session_data}}
-        - mistakes: {session_id: [list_of_mistakes]}
+        - sessions: {session_id: SessionRecord}
+        - mistakes: {session_id: [MistakeRecord]} (dropped on compaction)
+        - active_sessions: {session_id: None} (insertion-ordered index)
+        - ended_sessions: {session_id: end_time} (in end order)
+        - stats: {session_id: SessionStats}
         """
+        self.retention = retention or RetentionPolicy()
         self.sessions = {}
         self.mistakes = {}
+        self.stats = {}
+        self.active_sessions = {}
+        self.ended_sessions = {}
+        # Ended sessions that still hold their mistakes, in end order
+        self._compact_queue = {}
         self.current_session_id = 1
+        # Optional column store kept in step with every mistake (analytics.py)
+        self.analytics = None
+        # Shared across sessions by SessionManager, so writes are serialized
+        self._lock = threading.Lock()
 
     def create_session(self, language: str, level: str) -> int:
         """Create a new learning session"""
-        session_id = self.current_session_id
-        self.sessions[session_id] = {
-            "language": language,
-            "level": level,
-            "start_time": datetime.now(),
-            "end_time": None,
-            "active": True
-        }
-        self.mistakes[session_id] = []
-        self.current_session_id += 1
+        with self._lock:
+            session_id = self.current_session_id
+            self.sessions[session_id] = SessionRecord(language, level, datetime.now().timestamp())
+            self.mistakes[session_id] = []
+            self.stats[session_id] = SessionStats()
+            self.active_sessions[session_id] = None
+            self.current_session_id += 1
         return session_id
 
     def end_session(self, session_id: int):
-        """Mark a session as completed"""
-        if session_id in self.sessions:
-            self.sessions[session_id]["end_time"] = datetime.now()
-            self.sessions[session_id]["active"] = False
+        """Mark a session as completed and apply the retention policy"""
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is not None and session.active:
+                session.end_time = datetime.now().timestamp()
+                session.active = False
+                self.active_sessions.pop(session_id, None)
+                self.ended_sessions[session_id] = session.end_time
+                self._compact_queue[session_id] = session.end_time
+            self._apply_retention(datetime.now().timestamp())
 
     def add_mistake(self, session_id: int, user_input: str, errors: List[Dict]):
         """Record a learner's mistake"""
-        if session_id in self.mistakes:
-            self.mistakes[session_id].append({
-                "timestamp": datetime.now(),
-                "user_input": user_input,
-                "errors": errors
-            })
+        record = MistakeRecord.from_errors(user_input, errors)
+        with self._lock:
+            if session_id in self.mistakes:
+                self.mistakes[session_id].append(record)
+                self.stats[session_id].add(record.errors)
+                if self.analytics is not None:
+                    session = self.sessions[session_id]
+                    self.analytics.append(session_id, session.language, session.level, record)
+
+    def get_session_summary(self, session_id: int) -> Dict:
+        """Aggregated mistake counts for a session, without scanning its mistakes"""
+        with self._lock:
+            return self.stats.get(session_id, SessionStats()).summary()
+
+    def get_session_mistakes(self, session_id: int) -> List[Dict]:
+        """Retrieve all mistakes for a session; empty once it has been compacted"""
+        with self._lock:
+            records = list(self.mistakes.get(session_id, ()))
+        return [record.to_dict() for record in records]
+
+    def get_active_sessions(self) -> List[Dict]:
+        """Get all active sessions"""
+        with self._lock:
+            return [
+                {"id": sid, **self.sessions[sid].to_dict()}
+                for sid in self.active_sessions
+            ]
+
+    def export_session(self, session_id: int) -> Optional[Dict]:
+        """A session row and its mistakes as plain JSON-ready values, for snapshots"""
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            records = list(self.mistakes.get(session_id, ()))
+        return {
+            "id": session_id, "language": session.language, "level": session.level,
+            "start_time": session.start_time,
+            "mistakes": [[record.timestamp, record.user_input,
+                          [error.to_dict() for error in record.errors]] for record in records]
+        }
+
+    def import_session(self, data: Dict) -> int:
+        """
+        Make an exported session live in this store and return its id. A
+        store that already holds it (same id and start time) reuses the
+        rows; any other gets a new active session with the mistakes copied.
+        """
+        with self._lock:
+            session = self.sessions.get(data["id"])
+            if session is not None and abs(session.start_time - data["start_time"]) < 1e-3:
+                return data["id"]
+            session_id = self.current_session_id
+            self.current_session_id += 1
+            self.sessions[session_id] = SessionRecord(data["language"], data["level"], data["start_time"])
+            self.mistakes[session_id] = []
+            self.stats[session_id] = SessionStats()
+            self.active_sessions[session_id] = None
+            for timestamp, user_input, errors in data["mistakes"]:
+                record = MistakeRecord.from_errors(user_input, errors, timestamp)
+                self.mistakes[session_id].append(record)
+                self.stats[session_id].add(record.errors)
+                if self.analytics is not None:
+                    self.analytics.append(session_id, data["language"], data["level"], record)
+        return session_id
+
+    def end_exported_session(self, data: Dict) -> bool:
+        """End the session an export was taken from, if this store holds it and it is active"""
+        with self._lock:
+            session = self.sessions.get(data["id"])
+            held = session is not None and session.active \
+                and abs(session.start_time - data["start_time"]) < 1e-3
+        if held:
+            self.end_session(data["id"])
+        return held
+
+    def attach_analytics(self, analytics):
+        """Replay every recorded mistake into analytics.append, then feed it each new one"""
+        with self._lock:
+            for session_id, records in self.mistakes.items():
+                session = self.sessions[session_id]
+                for record in records:
+                    analytics.append(session_id, session.language, session.level, record)
+            self.analytics = analytics
+
+    def apply_retention(self, now: Optional[float] = None) -> Dict:
+        """Compact and remove ended sessions per the retention policy"""
+        with self._lock:
+            return self._apply_retention(now if now is not None else datetime.now().timestamp())
+
+    def _apply_retention(self, now: float) -> Dict:
+        policy = self.retention
+        removed = compacted = 0
+        if policy.max_ended_sessions is not None:
+            while len(self.ended_sessions) > policy.max_ended_sessions:
+                session_id = next(iter(self.ended_sessions))
+                self._drop_mistakes(session_id)
+                del self.ended_sessions[session_id]
+                del self.sessions[session_id]
+                del self.stats[session_id]
+                removed += 1
+        if policy.compact_after is not None:
+            cutoff = now - policy.compact_after
+            while self._compact_queue:
+                session_id, end_time = next(iter(self._compact_queue.items()))
+                if end_time > cutoff:
+                    break
+                compacted += self._drop_mistakes(session_id)
+        return {"compacted": compacted, "removed": removed}
+
+    def _drop_mistakes(self, session_id: int) -> bool:
+        self._compact_queue.pop(session_id, None)
+        records = self.mistakes.pop(session_id, None)
+        if records is None:
+            return False
+        self.retention.archive(
+            session_id, self.sessions[session_id].to_dict(),
+            [record.to_dict() for record in records]
+        )
+        return True
+
+    def flush(self):
+        """Writes are immediate in memory; kept for backend parity"""
+
+    def close(self):
+        """Nothing to release in memory; kept for backend parity"""
+
+    def clear_all_data(self):
+        """Reset the database (for testing)"""
+        with self._lock:
+            self.sessions = {}
+            self.mistakes = {}
+            self.stats = {}
+            self.active_sessions = {}
+            self.ended_sessions = {}
+            self._compact_queue = {}
+            self.current_session_id = 1
+
+
+class SQLiteMistakeDatabase:
+    """
+    Persistent backend with the same interface as MistakeDatabase.
+    add_mistake is write-behind: rows are queued and inserted in batches
+    by a background thread. Reads flush the queue first so callers always
+    see their own writes.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            language TEXT NOT NULL,
+            level TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            active INTEGER NOT NULL DEFAULT 1,
+            mistake_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS mistakes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER NOT NULL REFERENCES sessions(id),
+            timestamp TEXT NOT NULL,
+            user_input TEXT NOT NULL,
+            errors TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS mistake_errors (
+            mistake_id INTEGER NOT NULL REFERENCES mistakes(id),
+            session_id INTEGER NOT NULL,
+            type TEXT,
+            severity TEXT,
+            incorrect_part TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_active ON sessions(active) WHERE active = 1;
+        CREATE INDEX IF NOT EXISTS idx_sessions_ended ON sessions(end_time) WHERE active = 0;
+        CREATE INDEX IF NOT EXISTS idx_mistakes_session ON mistakes(session_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_mistakes_timestamp ON mistakes(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_errors_type ON mistake_errors(type);
+        CREATE INDEX IF NOT EXISTS idx_errors_session ON mistake_errors(session_id, type);
+    """
+
+    def __init__(self, path: str = "mistakes.db", batch_size: int = 64,
+                 flush_interval: float = 0.5, retention: Optional[RetentionPolicy] = None):
+        self.path = path
+        self.retention = retention or RetentionPolicy()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        if "mistake_count" not in {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}:
+            # Files from before the counter; compacted sessions only have mistake_errors left
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN mistake_count INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "UPDATE sessions SET mistake_count = MAX("
+                "(SELECT COUNT(*) FROM mistakes WHERE session_id = sessions.id), "
+                "(SELECT COUNT(DISTINCT mistake_id) FROM mistake_errors WHERE session_id = sessions.id))"
+            )
+        self._conn.commit()
+
+        self._db_lock = threading.RLock()
+        self._pending_lock = threading.Lock()
+        self._pending = []
+        # Aggregates for sessions seen by this process; others load on demand
+        self._stats = {}
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="mistake-writer", daemon=True
+        )
+        self._writer.start()
+
+    def create_session(self, language: str, level: str) -> int:
+        """Create a new learning session"""
+        with self._db_lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO sessions (language, level, start_time, active) VALUES (?, ?, ?, 1)",
+                (language, level, datetime.now().isoformat())
+            )
+        with self._pending_lock:
+            self._stats[cursor.lastrowid] = SessionStats()
+        return cursor.lastrowid
+
+    def end_session(self, session_id: int):
+        """Mark a session as completed and apply the retention policy"""
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "UPDATE sessions SET end_time = ?, active = 0 WHERE id = ? AND active = 1",
+                (datetime.now().isoformat(), session_id)
+            )
+        # No more mistakes can arrive; a later summary reloads from disk
+        with self._pending_lock:
+            self._stats.pop(session_id, None)
+        if self.retention.compact_after is not None or self.retention.max_ended_sessions is not None:
+            self.apply_retention()
+
+    def add_mistake(self, session_id: int, user_input: str, errors: List[Dict]):
+        """Queue a learner's mistake for the next batched insert"""
+        record = MistakeRecord.from_errors(user_input, errors)
+        with self._pending_lock:
+            self._pending.append((session_id, record))
+            if session_id in self._stats:
+                self._stats[session_id].add(record.errors)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
 
     def get_session_mistakes(self, session_id: int) -> List[Dict]:
         """Retrieve all mistakes for a session"""
-        return self.mistakes.get(session_id, [])
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT timestamp, user_input, errors FROM mistakes "
+                "WHERE session_id = ? ORDER BY timestamp, id",
+                (session_id,)
+            ).fetchall()
+        return [
+            {
+                "timestamp": datetime.fromisoformat(timestamp),
+                "user_input": user_input,
+                "errors": json.loads(errors)
+            }
+            for timestamp, user_input, errors in rows
+        ]
+
+    def get_session_summary(self, session_id: int) -> Dict:
+        """Aggregated mistake counts for a session, without scanning its mistakes"""
+        with self._pending_lock:
+            stats = self._stats.get(session_id)
+            if stats is not None:
+                return stats.summary()
+        return self._load_stats(session_id).summary()
+
+    def _load_stats(self, session_id: int) -> SessionStats:
+        # One indexed GROUP BY for sessions created by another process
+        self.flush()
+        stats = SessionStats()
+        with self._db_lock:
+            # The counter covers mistakes without errors and survives compaction
+            row = self._conn.execute(
+                "SELECT mistake_count, active FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            stats.total_mistakes, active = row if row is not None else (0, 0)
+            rows = self._conn.execute(
+                "SELECT type, severity, incorrect_part, COUNT(*) FROM mistake_errors "
+                "WHERE session_id = ? GROUP BY type, severity, incorrect_part",
+                (session_id,)
+            ).fetchall()
+        for error_type, severity, incorrect_part, count in rows:
+            stats.total_errors += count
+            stats.by_type[error_type or "unknown"] += count
+            stats.by_severity[severity or "unknown"] += count
+            if incorrect_part:
+                stats.incorrect_parts[incorrect_part] += count
+        if not active:
+            # Ended sessions do not change, so they are not kept in memory
+            return stats
+        with self._pending_lock:
+            return self._stats.setdefault(session_id, stats)
 
     def get_active_sessions(self) -> List[Dict]:
         """Get all active sessions"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, language, level, start_time, end_time FROM sessions "
+                "WHERE active = 1 ORDER BY id"
+            ).fetchall()
         return [
-            {"id": sid, **data} 
-            for sid, data in self.sessions.items() 
-            if data.get("active")
+            {
+                "id": sid,
+                "language": language,
+                "level": level,
+                "start_time": datetime.fromisoformat(start_time),
+                "end_time": datetime.fromisoformat(end_time) if end_time else None,
+                "active": True
+            }
+            for sid, language, level, start_time, end_time in rows
         ]
 
+    def errors_since(self, rowid: int) -> List[tuple]:
+        """
+        mistake_errors rows after rowid, oldest first, joined with their
+        session and mistake: (rowid, mistake_id, session_id, language, level,
+        timestamp, type, severity, incorrect_part). timestamp is None once
+        the session has been compacted.
+        """
+        self.flush()
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT e.rowid, e.mistake_id, e.session_id, s.language, s.level, m.timestamp, "
+                "e.type, e.severity, e.incorrect_part FROM mistake_errors e "
+                "JOIN sessions s ON s.id = e.session_id "
+                "LEFT JOIN mistakes m ON m.id = e.mistake_id "
+                "WHERE e.rowid > ? ORDER BY e.rowid",
+                (rowid,)
+            ).fetchall()
+
+    def export_session(self, session_id: int) -> Optional[Dict]:
+        """A session row and its mistakes as plain JSON-ready values, for snapshots"""
+        self.flush()
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT language, level, start_time FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            mistakes = self._conn.execute(
+                "SELECT timestamp, user_input, errors FROM mistakes "
+                "WHERE session_id = ? ORDER BY timestamp, id",
+                (session_id,)
+            ).fetchall()
+        language, level, start_time = row
+        return {
+            "id": session_id, "language": language, "level": level,
+            "start_time": datetime.fromisoformat(start_time).timestamp(),
+            "mistakes": [[datetime.fromisoformat(timestamp).timestamp(), user_input, json.loads(errors)]
+                         for timestamp, user_input, errors in mistakes]
+        }
+
+    def import_session(self, data: Dict) -> int:
+        """
+        Make an exported session live in this store and return its id. A
+        database that already holds it (workers sharing one file) reuses
+        the rows; any other gets a new active session with the mistakes copied.
+        """
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT start_time FROM sessions WHERE id = ?", (data["id"],)
+            ).fetchone()
+            if row is not None and \
+                    abs(datetime.fromisoformat(row[0]).timestamp() - data["start_time"]) < 1e-3:
+                return data["id"]
+            with self._conn:
+                cursor = self._conn.execute(
+                    "INSERT INTO sessions (language, level, start_time, active) VALUES (?, ?, ?, 1)",
+                    (data["language"], data["level"],
+                     datetime.fromtimestamp(data["start_time"]).isoformat())
+                )
+        session_id = cursor.lastrowid
+        records = [MistakeRecord.from_errors(user_input, errors, timestamp)
+                   for timestamp, user_input, errors in data["mistakes"]]
+        stats = SessionStats()
+        for record in records:
+            stats.add(record.errors)
+        with self._pending_lock:
+            self._pending.extend((session_id, record) for record in records)
+            self._stats[session_id] = stats
+        self.flush()
+        return session_id
+
+    def end_exported_session(self, data: Dict) -> bool:
+        """End the session an export was taken from, if this database holds it and it is active"""
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT start_time FROM sessions WHERE id = ? AND active = 1", (data["id"],)
+            ).fetchone()
+        held = row is not None and \
+            abs(datetime.fromisoformat(row[0]).timestamp() - data["start_time"]) < 1e-3
+        if held:
+            self.end_session(data["id"])
+        return held
+
+    def flush(self):
+        """Write all queued mistakes in a single transaction"""
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            self._write_batch(batch)
+        except sqlite3.Error:
+            # The transaction rolled back; requeue ahead of newer mistakes
+            # so the next flush retries them in order
+            with self._pending_lock:
+                self._pending[:0] = batch
+            raise
+
+    def _write_batch(self, batch: List[Tuple[int, MistakeRecord]]):
+        counts = Counter(session_id for session_id, _ in batch)
+        with self._db_lock, self._conn:
+            self._conn.executemany(
+                "UPDATE sessions SET mistake_count = mistake_count + ? WHERE id = ?",
+                [(count, session_id) for session_id, count in counts.items()]
+            )
+            for session_id, record in batch:
+                errors = [error.to_dict() for error in record.errors]
+                cursor = self._conn.execute(
+                    "INSERT INTO mistakes (session_id, timestamp, user_input, errors) "
+                    "VALUES (?, ?, ?, ?)",
+                    (session_id, datetime.fromtimestamp(record.timestamp).isoformat(),
+                     record.user_input, json.dumps(errors, ensure_ascii=False))
+                )
+                self._conn.executemany(
+                    "INSERT INTO mistake_errors (mistake_id, session_id, type, severity, incorrect_part) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (cursor.lastrowid, session_id, e.type.value, e.severity.value,
+                         e.incorrect_part or None)
+                        for e in record.errors
+                    ]
+                )
+
+    def apply_retention(self, now: Optional[float] = None) -> Dict:
+        """
+        Compact and remove ended sessions per the retention policy.
+        Compaction deletes mistakes rows (the input text and errors JSON)
+        but keeps mistake_errors, so summaries still work.
+        """
+        policy = self.retention
+        now = now if now is not None else datetime.now().timestamp()
+        self.flush()
+        removed, compacted = [], []
+        with self._db_lock:
+            if policy.max_ended_sessions is not None:
+                removed = [row[0] for row in self._conn.execute(
+                    "SELECT id FROM sessions WHERE active = 0 "
+                    "ORDER BY end_time DESC, id DESC LIMIT -1 OFFSET ?",
+                    (policy.max_ended_sessions,)
+                )]
+            if policy.compact_after is not None:
+                cutoff = datetime.fromtimestamp(now - policy.compact_after).isoformat()
+                compacted = [row[0] for row in self._conn.execute(
+                    "SELECT id FROM sessions WHERE active = 0 AND end_time <= ? "
+                    "AND EXISTS (SELECT 1 FROM mistakes WHERE session_id = sessions.id)",
+                    (cutoff,)
+                )]
+                removing = set(removed)
+                compacted = [sid for sid in compacted if sid not in removing]
+            for session_id in removed + compacted:
+                self._archive_session(session_id)
+            with self._conn:
+                for session_id in removed + compacted:
+                    self._conn.execute("DELETE FROM mistakes WHERE session_id = ?", (session_id,))
+                for session_id in removed:
+                    self._conn.execute("DELETE FROM mistake_errors WHERE session_id = ?", (session_id,))
+                    self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        with self._pending_lock:
+            for session_id in removed + compacted:
+                self._stats.pop(session_id, None)
+        return {"compacted": len(compacted), "removed": len(removed)}
+
+    def _archive_session(self, session_id: int):
+        if not self.retention.archive_path:
+            return
+        language, level, start_time, end_time = self._conn.execute(
+            "SELECT language, level, start_time, end_time FROM sessions WHERE id = ?",
+            (session_id,)
+        ).fetchone()
+        session = {"language": language, "level": level, "start_time": start_time,
+                   "end_time": end_time, "active": False}
+        self.retention.archive(session_id, session, self.get_session_mistakes(session_id))
+
+    def _writer_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Mistake write failed: {e}")
+
+    def close(self):
+        """Flush pending writes and close the connection"""
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
     def clear_all_data(self):
         """Reset the database (for testing)"""
-        self.sessions = {}
-        self.mistakes = {}
-        self.current_session_id = 1
\ No newline at end of file
+        with self._pending_lock:
+            self._pending = []
+            self._stats = {}
+        with self._db_lock, self._conn:
+            self._conn.executescript(
+                "DELETE FROM mistake_errors; DELETE FROM mistakes; DELETE FROM sessions; "
+                "DELETE FROM sqlite_sequence;"
+            )
+
+
+# AsyncMistakeStore's disk calls; one thread, since SQLite serializes them anyway
+_db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+
+
+class AsyncMistakeStore:
+    """
+    Awaitable front for a mistake store, for callers on an event loop.
+    Calls that can touch disk run on a dedicated database thread; in-memory
+    work and add_mistake (a queue append for SQLite) run inline, since
+    handing them to a thread would cost more than the call itself.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def _on_disk(self, name: str) -> bool:
+        if isinstance(self.db, SQLiteMistakeDatabase):
+            return True
+        # The in-memory store only writes when ending a session archives one
+        retention = getattr(self.db, "retention", None)
+        return name in ("end_session", "end_exported_session") \
+            and bool(retention and retention.archive_path)
+
+    async def _call(self, name: str, *args):
+        method = getattr(self.db, name)
+        if not self._on_disk(name):
+            return method(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_db_executor, contextvars.copy_context().run, method, *args)
+
+    async def create_session(self, language: str, level: str) -> int:
+        return await self._call("create_session", language, level)
+
+    async def end_session(self, session_id: int):
+        await self._call("end_session", session_id)
+
+    async def get_session_summary(self, session_id: int) -> Dict:
+        return await self._call("get_session_summary", session_id)
+
+    async def get_session_mistakes(self, session_id: int) -> List[Dict]:
+        return await self._call("get_session_mistakes", session_id)
+
+    async def get_active_sessions(self) -> List[Dict]:
+        return await self._call("get_active_sessions")
+
+    async def export_session(self, session_id: int) -> Optional[Dict]:
+        return await self._call("export_session", session_id)
+
+    async def import_session(self, data: Dict) -> int:
+        return await self._call("import_session", data)
+
+    async def end_exported_session(self, data: Dict) -> bool:
+        return await self._call("end_exported_session", data)
+
+    def add_mistake(self, session_id: int, user_input: str, errors: List[Dict]):
+        self.db.add_mistake(session_id, user_input, errors)
+
+
+def open_database(path: Optional[str] = None):
+    """
+    Return the configured mistake store. Uses SQLite when a path is given
+    or MISTAKE_DB_PATH is set, otherwise the in-memory MistakeDatabase.
+    """
+    path = path or os.environ.get("MISTAKE_DB_PATH")
+    retention = RetentionPolicy.from_env()
+    if path:
+        return SQLiteMistakeDatabase(path, retention=retention)
+    return MistakeDatabase(retention=retention)
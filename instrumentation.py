@@ -0,0 +1,196 @@
+# instrumentation.py
+import os
+import time
+import json
+import bisect
+import threading
+import contextvars
+from collections import deque
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Returned by span() when disabled, so the hot path allocates nothing
+_NULL_SPAN = nullcontext()
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts)),
+            "sum": self.sum,
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0
+        }
+
+
+class Span:
+    """Times one named stage; root spans collect a per-stage breakdown"""
+
+    __slots__ = ("owner", "name", "attributes", "parent", "root", "breakdown",
+                 "started", "token", "otel")
+
+    def __init__(self, owner: "Instrumentation", name: str, attributes: Dict):
+        self.owner = owner
+        self.name = name
+        self.attributes = attributes
+        self.parent = None
+        self.breakdown = None
+        self.otel = None
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        self.root = self.parent.root if self.parent else self
+        if self.parent is None:
+            self.breakdown = {}
+        self.token = _current_span.set(self)
+        if self.owner.tracer is not None:
+            self.otel = self.owner.tracer.start_as_current_span(self.name, attributes=self.attributes)
+            self.otel.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        if self.otel is not None:
+            self.otel.__exit__(exc_type, exc, tb)
+        _current_span.reset(self.token)
+        self.owner._finish(self, elapsed)
+        return False
+
+
+class Instrumentation:
+    """
+    Named spans around the stages of a turn, session start and report,
+    aggregated into latency histograms and token counters. Export with
+    to_prometheus() / to_json(); set otel=True to also emit OpenTelemetry
+    spans when the opentelemetry package is installed. When disabled,
+    span() returns a shared no-op context manager.
+    """
+
+    def __init__(self, enabled: bool = False, otel: bool = False,
+                 buckets=DEFAULT_BUCKETS, recent_turns: int = 100):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.tracer = None
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.tokens = {}
+        self.recent = deque(maxlen=recent_turns)
+        if otel:
+            self.enable_otel()
+
+    @classmethod
+    def from_env(cls) -> "Instrumentation":
+        return cls(
+            enabled=os.environ.get("LLA_INSTRUMENTATION", "") == "1",
+            otel=os.environ.get("LLA_OTEL", "") == "1"
+        )
+
+    def enable_otel(self):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            print("opentelemetry is not installed; OpenTelemetry spans disabled")
+            return
+        self.tracer = trace.get_tracer("language-learning-assistant")
+
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attributes)
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get() if self.enabled else None
+
+    def observe(self, name: str, seconds: float):
+        """Record a duration measured by hand (e.g. across a stream's yields)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def record_tokens(self, stage: str, input_tokens: int = 0, output_tokens: int = 0):
+        if not self.enabled:
+            return
+        with self._lock:
+            counts = self.tokens.setdefault(stage, {"input": 0, "output": 0})
+            counts["input"] += input_tokens
+            counts["output"] += output_tokens
+
+    def _finish(self, span: Span, elapsed: float):
+        self.observe(span.name, elapsed)
+        with self._lock:
+            if span.parent is None:
+                span.breakdown[span.name] = elapsed
+                self.recent.append({"span": span.name, **span.attributes, "seconds": span.breakdown})
+            else:
+                breakdown = span.root.breakdown
+                breakdown[span.name] = breakdown.get(span.name, 0.0) + elapsed
+
+    def last_breakdown(self, name: str = "turn") -> Optional[Dict]:
+        """Per-stage seconds of the most recent root span with this name"""
+        with self._lock:
+            for entry in reversed(self.recent):
+                if entry["span"] == name:
+                    return entry["seconds"]
+        return None
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.tokens.clear()
+            self.recent.clear()
+
+    def to_json(self) -> str:
+        with self._lock:
+            return json.dumps({
+                "spans": {name: h.to_dict() for name, h in self.histograms.items()},
+                "tokens": {stage: dict(counts) for stage, counts in self.tokens.items()},
+                "recent": list(self.recent)
+            })
+
+    def to_prometheus(self) -> str:
+        lines = ["# TYPE lla_span_seconds histogram"]
+        with self._lock:
+            for name, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip([*map(str, histogram.buckets), "+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'lla_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'lla_span_seconds_sum{{span="{name}"}} {histogram.sum}')
+                lines.append(f'lla_span_seconds_count{{span="{name}"}} {histogram.count}')
+            lines.append("# TYPE lla_tokens_total counter")
+            for stage, counts in sorted(self.tokens.items()):
+                for kind, value in counts.items():
+                    lines.append(f'lla_tokens_total{{stage="{stage}",kind="{kind}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+instrumentation = Instrumentation.from_env()
+
+
+def token_usage(message, prompt_text: str = "") -> List[int]:
+    """[input, output] tokens from provider usage metadata, else a ~4 chars/token estimate"""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return [usage.get("input_tokens", 0), usage.get("output_tokens", 0)]
+    return [len(prompt_text) // 4, len(getattr(message, "content", "") or "") // 4]
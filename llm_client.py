@@ -0,0 +1,331 @@
+# llm_client.py
+import os
+import time
+import random
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, AsyncIterator, Optional
+from langchain_core.runnables import Runnable
+
+# Error class names / status codes worth retrying (quota, overload, timeouts)
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "GatewayTimeout", "TimeoutError", "ConnectionError"
+}
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+def is_retryable(error: Exception) -> bool:
+    for cls in type(error).__mro__:
+        if cls.__name__ in RETRYABLE_ERRORS:
+            return True
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    code = code() if callable(code) else code
+    return getattr(code, "value", code) in RETRYABLE_CODES or "429" in str(error)
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class LLMGate:
+    """
+    Admission control shared by every wrapped client that draws on the
+    same quota: a token-bucket rate limit, a cap on in-flight requests,
+    jittered exponential backoff, and counters for monitoring.
+    """
+
+    def __init__(self, requests_per_minute: float = 600, burst: int = 10,
+                 max_concurrency: int = 16, max_retries: int = 4,
+                 base_delay: float = 0.5, max_delay: float = 16.0):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        # asyncio semaphores are bound to a loop, so keep one per loop
+        self._async_semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "retries": 0, "failures": 0, "coalesced": 0}
+        self.waiting = 0
+        self.in_flight = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMGate":
+        return cls(
+            requests_per_minute=float(os.environ.get("LLM_REQUESTS_PER_MINUTE", "600")),
+            burst=int(os.environ.get("LLM_BURST", "10")),
+            max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "16")),
+            max_retries=int(os.environ.get("LLM_MAX_RETRIES", "4"))
+        )
+
+    def configure(self, requests_per_minute: Optional[float] = None, burst: Optional[int] = None,
+                  max_concurrency: Optional[int] = None):
+        """Replace the rate limit and concurrency cap; only while no calls are in flight"""
+        if requests_per_minute is not None or burst is not None:
+            rate = requests_per_minute / 60.0 if requests_per_minute is not None else self.bucket.rate
+            self.bucket = TokenBucket(rate, burst if burst is not None else self.bucket.capacity)
+        if max_concurrency is not None:
+            self.max_concurrency = max_concurrency
+            self._semaphore = threading.BoundedSemaphore(max_concurrency)
+            self._async_semaphores = weakref.WeakKeyDictionary()
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    def _adjust(self, waiting: int = 0, in_flight: int = 0):
+        with self._lock:
+            self.waiting += waiting
+            self.in_flight += in_flight
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn, *args, **kwargs):
+        return self._call(fn, args, kwargs, hold=False)
+
+    def call_holding(self, fn, *args, **kwargs):
+        """Like call, but on success the concurrency slot stays taken until release()"""
+        return self._call(fn, args, kwargs, hold=True)
+
+    def release(self):
+        self._adjust(in_flight=-1)
+        self._semaphore.release()
+
+    def _call(self, fn, args, kwargs, hold: bool):
+        attempt = 0
+        while True:
+            self._adjust(waiting=1)
+            try:
+                self.bucket.acquire()
+                self._semaphore.acquire()
+            finally:
+                self._adjust(waiting=-1)
+            self._adjust(in_flight=1)
+            self.count("requests")
+            held = False
+            try:
+                result = fn(*args, **kwargs)
+                held = hold
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.count("failures")
+                    raise
+            finally:
+                if not held:
+                    self.release()
+            self.count("retries")
+            time.sleep(self.backoff(attempt))
+            attempt += 1
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._async_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._async_semaphores[loop] = semaphore
+            return semaphore
+
+    async def acall(self, fn, *args, **kwargs):
+        return await self._acall(fn, args, kwargs, hold=False)
+
+    async def acall_holding(self, fn, *args, **kwargs):
+        """Like acall, but on success the concurrency slot stays taken until arelease()"""
+        return await self._acall(fn, args, kwargs, hold=True)
+
+    def arelease(self):
+        """Release a slot taken by acall_holding; call from the same event loop"""
+        self._release_async(self._async_semaphore())
+
+    def _release_async(self, semaphore: asyncio.Semaphore):
+        self._adjust(in_flight=-1)
+        semaphore.release()
+
+    async def _acall(self, fn, args, kwargs, hold: bool):
+        semaphore = self._async_semaphore()
+        attempt = 0
+        while True:
+            self._adjust(waiting=1)
+            try:
+                await self.bucket.aacquire()
+                await semaphore.acquire()
+            finally:
+                self._adjust(waiting=-1)
+            self._adjust(in_flight=1)
+            self.count("requests")
+            held = False
+            try:
+                result = await fn(*args, **kwargs)
+                held = hold
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.count("failures")
+                    raise
+            finally:
+                if not held:
+                    self._release_async(semaphore)
+            self.count("retries")
+            await asyncio.sleep(self.backoff(attempt))
+            attempt += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self.counters, "queue_depth": self.waiting, "in_flight": self.in_flight}
+
+
+default_gate = LLMGate.from_env()
+
+
+def _coalesce_key(input: Any, kwargs: Dict) -> str:
+    if hasattr(input, "to_messages"):
+        input = input.to_messages()
+    if isinstance(input, list):
+        input = "\n".join(f"{getattr(m, 'type', '')}:{getattr(m, 'content', m)}" for m in input)
+    return f"{input}\x1f{sorted(kwargs.items())!r}"
+
+
+class ResilientLLM(Runnable):
+    """
+    Runnable wrapper routing every call to `llm` through an LLMGate.
+    Concurrent invoke/ainvoke calls with an identical prompt share one
+    request. Streams are rate limited and retried until the first chunk
+    arrives; after that an error is passed through. A stream holds its
+    concurrency slot until it is exhausted or closed.
+    """
+
+    def __init__(self, llm, gate: Optional[LLMGate] = None, coalesce: bool = True):
+        self.llm = llm
+        self.gate = gate or default_gate
+        self.coalesce = coalesce
+        self._in_flight = {}
+        self._async_in_flight = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Expose the wrapped model's attributes (model name, get_num_tokens, ...)
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def invoke(self, input: Any, config=None, **kwargs) -> Any:
+        if not self.coalesce:
+            return self.gate.call(self.llm.invoke, input, config, **kwargs)
+        key = _coalesce_key(input, kwargs)
+        with self._lock:
+            shared = self._in_flight.get(key)
+            owner = shared is None
+            if owner:
+                shared = Future()
+                self._in_flight[key] = shared
+        if not owner:
+            self.gate.count("coalesced")
+            return shared.result()
+        try:
+            result = self.gate.call(self.llm.invoke, input, config, **kwargs)
+            shared.set_result(result)
+            return result
+        except Exception as e:
+            shared.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    async def ainvoke(self, input: Any, config=None, **kwargs) -> Any:
+        if not self.coalesce:
+            return await self.gate.acall(self.llm.ainvoke, input, config, **kwargs)
+        loop = asyncio.get_running_loop()
+        key = (loop, _coalesce_key(input, kwargs))
+        with self._lock:
+            shared = self._async_in_flight.get(key)
+            owner = shared is None
+            if owner:
+                shared = loop.create_future()
+                self._async_in_flight[key] = shared
+        if not owner:
+            self.gate.count("coalesced")
+            return await asyncio.shield(shared)
+        try:
+            result = await self.gate.acall(self.llm.ainvoke, input, config, **kwargs)
+            shared.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except Exception as e:
+            shared.set_exception(e)
+            # Mark retrieved so a future nobody else awaited does not log a warning
+            shared.exception()
+            raise
+        finally:
+            with self._lock:
+                self._async_in_flight.pop(key, None)
+
+    def stream(self, input: Any, config=None, **kwargs) -> Iterator[Any]:
+        def first_chunk():
+            iterator = iter(self.llm.stream(input, config, **kwargs))
+            return iterator, next(iterator, None)
+
+        iterator, chunk = self.gate.call_holding(first_chunk)
+        try:
+            if chunk is None:
+                return
+            yield chunk
+            yield from iterator
+        finally:
+            self.gate.release()
+
+    async def astream(self, input: Any, config=None, **kwargs) -> AsyncIterator[Any]:
+        async def first_chunk():
+            iterator = self.llm.astream(input, config, **kwargs).__aiter__()
+            try:
+                return iterator, await iterator.__anext__()
+            except StopAsyncIteration:
+                return iterator, None
+
+        iterator, chunk = await self.gate.acall_holding(first_chunk)
+        try:
+            if chunk is None:
+                return
+            yield chunk
+            async for chunk in iterator:
+                yield chunk
+        finally:
+            self.gate.arelease()
+
+    def stats(self) -> Dict:
+        return self.gate.stats()
@@ -0,0 +1,133 @@
+# llm_pool.py
+import os
+import threading
+from typing import Dict, Tuple
+from prompts import build_tutor_prompt
+
+# langchain / Gemini imports are deferred to the first client request so
+# importing this module (and app.py) stays cheap on a cold start
+
+
+class PoolMetrics:
+    """Thread-safe counters and latency totals for the shared LLM resources"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timings = {}
+
+    def incr(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            timing = self.timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timings": {
+                    name: {**timing, "mean": timing["total"] / timing["count"]}
+                    for name, timing in self.timings.items()
+                }
+            }
+
+
+metrics = PoolMetrics()
+
+_clients = {}
+_wrapped = {}
+_clients_lock = threading.Lock()
+
+
+def wrap_llm(llm):
+    """
+    Return the shared ResilientLLM for a model instance, so every caller
+    goes through the same rate limiter, retries and request coalescing.
+    """
+    from llm_client import ResilientLLM, default_gate
+
+    if isinstance(llm, ResilientLLM):
+        return llm
+    with _clients_lock:
+        # Keyed by id; the stored wrapper keeps the model alive so ids are not reused
+        wrapper = _wrapped.get(id(llm))
+        if wrapper is None:
+            wrapper = ResilientLLM(llm, gate=default_gate)
+            _wrapped[id(llm)] = wrapper
+        return wrapper
+
+
+def get_llm(model: str = "gemini-2.0-flash", temperature: float = 0.3,
+            json_mode: bool = False):
+    """
+    Return the process-wide client for a model/temperature pair.
+    A single client keeps its transport (and HTTP connections) alive,
+    so sessions after the first skip client setup and reconnects.
+    json_mode asks Gemini for native JSON output (no markdown fences).
+    """
+    key = (model, temperature, json_mode)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is not None:
+            metrics.incr("llm_client_hits")
+            return client
+        metrics.incr("llm_client_misses")
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        from llm_client import ResilientLLM, default_gate
+
+        extra = {"response_mime_type": "application/json"} if json_mode else {}
+        client = ResilientLLM(ChatGoogleGenerativeAI(
+            model=model,
+            temperature=temperature,
+            google_api_key=os.environ.get("GOOGLE_API_KEY", "API KEY"),
+            # Retries are handled by the gate with jittered backoff
+            max_retries=0,
+            **extra
+        ), gate=default_gate)
+        _clients[key] = client
+        return client
+
+
+class PromptCache:
+    """Compiled tutor prompts and chains keyed by (language, level, single-call, cached-prefix mode)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prompts = {}
+        self._chains = {}
+
+    def get(self, llm, learning_lang: str, level: str, level_config: Dict,
+            single_call: bool = False, cached_prefix: bool = False) -> Tuple:
+        """Return (prompt, chain), compiling them on first use"""
+        key = (learning_lang, level, single_call, cached_prefix)
+        with self._lock:
+            prompt = self._prompts.get(key)
+            if prompt is None:
+                metrics.incr("prompt_cache_misses")
+                prompt = build_tutor_prompt(
+                    learning_lang, level, level_config, single_call, cached_prefix
+                )
+                self._prompts[key] = prompt
+            else:
+                metrics.incr("prompt_cache_hits")
+
+            # A chain is bound to one client; rebuild only if the client changed
+            cached = self._chains.get(key)
+            if cached is None or cached[0] is not llm:
+                cached = (llm, prompt | llm)
+                self._chains[key] = cached
+            return prompt, cached[1]
+
+    def clear(self):
+        with self._lock:
+            self._prompts.clear()
+            self._chains.clear()
+
+
+default_prompt_cache = PromptCache()
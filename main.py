@@ -1,163 +1,242 @@
 import os
-import json
-from typing import List, Dict
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.memory import ConversationBufferMemory
-from database import MistakeDatabase
-from langchain_core.prompts import (
-    SystemMessagePromptTemplate,
-    HumanMessagePromptTemplate
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Iterator, AsyncIterator, Tuple
+from window_memory import TokenWindowMemory
+from database import open_database
+from llm_pool import get_llm, wrap_llm, PromptCache, default_prompt_cache, metrics
+from analysis_cache import AnalysisCache, default_analysis_cache
+from analysis_parser import (
+    parse_error_analysis,
+    aparse_error_analysis,
+    AnalysisParseError,
+    split_combined_response,
+    CombinedStreamSplitter
 )
+from reports import build_report_prompt, render_local_report
+from prompts import build_static_prefix
+from precheck import LocalPrecheck, PhraseIndex
+from snapshots import SnapshotError
+from review_scheduler import ReviewScheduler
+from instrumentation import instrumentation, token_usage
+
+# Shared pool used to run error analysis alongside the tutor reply
+_turn_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="turn")
+
+AVAILABLE_LANGUAGES = {
+    'hindi': 'Hindi',
+    'spanish': 'Spanish',
+    'french': 'French',
+    'japanese': 'Japanese',
+    'chinese': 'Chinese'
+}
+LEVELS = {
+    'beginner': {'focus': 'basic words and numerals', 'max_length': 3},
+    'intermediate': {'focus': 'sentence construction', 'max_length': 8},
+    'expert': {'focus': 'cultural fluency', 'max_length': 15},
+    'master': {'focus': 'natural conversations', 'max_length': 30}
+}
 
 class LanguageLearningAssistant:
-    def __init__(self):
-        self.available_languages = {
-            'hindi': 'Hindi',
-            'spanish': 'Spanish',
-            'french': 'French',
-            'japanese': 'Japanese',
-            'chinese': 'Chinese'
-        }
-        self.levels = {
-            'beginner': {'focus': 'basic words and numerals', 'max_length': 3},
-            'intermediate': {'focus': 'sentence construction', 'max_length': 8},
-            'expert': {'focus': 'cultural fluency', 'max_length': 15},
-            'master': {'focus': 'natural conversations', 'max_length': 30}
-        }
-        self.memory = ConversationBufferMemory(
-            memory_key="history",
-            return_messages=True
-        )
-        self.db = MistakeDatabase()
+    def __init__(self, llm=None, db=None, prompt_cache: PromptCache = None,
+                 analysis_cache: AnalysisCache = None, memory_mode: str = "buffer",
+                 memory_max_tokens: int = 1500, turn_mode: str = "two_call",
+                 context_cache=None, review_limit: int = 3):
+        self.available_languages = AVAILABLE_LANGUAGES
+        self.levels = LEVELS
+        # "buffer" sends the full history, "window" a token-bounded window plus summary
+        if memory_mode not in ("buffer", "window"):
+            raise ValueError(f"Unknown memory mode: {memory_mode}")
+        self.memory_mode = memory_mode
+        self.memory_max_tokens = memory_max_tokens
+        # Built on the first start_session so langchain is only imported when needed
+        self.memory = None
+        # "two_call" runs analysis and the reply as separate requests,
+        # "single_call" asks for both in one response
+        if turn_mode not in ("two_call", "single_call"):
+            raise ValueError(f"Unknown turn mode: {turn_mode}")
+        self.turn_mode = turn_mode
+        self.db = db or open_database()
         self.current_session_id = None
+        self._llm_override = llm
+        self.prompt_cache = prompt_cache or default_prompt_cache
+        self.analysis_cache = analysis_cache or default_analysis_cache
+        self.precheck = LocalPrecheck()
+        # Phrases the tutor has introduced this session, from "Target:" lines
+        self.taught_phrases = PhraseIndex()
+        # Past mistakes are resurfaced by schedule instead of relying on the
+        # model to spot them in the history; kept across this learner's sessions
+        self.reviews = ReviewScheduler()
+        self.review_limit = review_limit
+        # Provider-side cache for the static prompt prefix (context_cache.py)
+        if context_cache is None and os.environ.get("LLA_CONTEXT_CACHE"):
+            from context_cache import default_context_cache as context_cache
+        self.context_cache = context_cache
         self.llm = None
+        self.reply_llm = None
+        self.analysis_llm = None
         self.chain = None
 
     def start_session(self, learning_lang: str, level: str):
         """Start a new learning session with memory"""
+        with instrumentation.span("session.start", language=learning_lang, level=level):
+            self._start_session(learning_lang, level)
+
+    def _start_session(self, learning_lang: str, level: str):
+        started = time.perf_counter()
+        self._select_level(learning_lang, level)
+        
+        # Create database session
+        with instrumentation.span("db.create_session"):
+            self.current_session_id = self.db.create_session(
+                language=self.learning_lang,
+                level=self.current_level
+            )
+        self._prepare_session()
+        metrics.observe("session_start_seconds", time.perf_counter() - started)
+
+    def _select_level(self, learning_lang: str, level: str):
         self.learning_lang = self.available_languages[learning_lang.lower()]
         self.level_config = self.levels[level.lower()]
         self.current_level = level.lower()
-        
-        # Create database session
-        self.current_session_id = self.db.create_session(
-            language=self.learning_lang,
-            level=self.current_level
-        )
-        
-        # Initialize LLM
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            temperature=0.3,
-            google_api_key=("API KEY")
-        )
-            
-        system_template = SystemMessagePromptTemplate.from_template(
-            f"""Act as a {self.learning_lang} tutor. Strictly follow these rules:
-            1. Compare new inputs with previous taught content
-            2. ALWAYS start responses with error analysis if mistakes exist
-            3. Use this format:
-            - Error Highlight → Explanation → Correction → Exercise
-            4. Maintain 50% new material vs 50% reinforcement
-            5. Never introduce new phrases without addressing mistakes
-            6. Repeat phrases if there is any error 
-            7. If no mistakes move to next phrase
-            Current Level: {self.current_level}
-
-            You are an expert {self.learning_lang} language tutor for {self.current_level} students. 
-            Your goal is to provide comprehensive and engaging language instruction.
-
-            Teaching based on level:
-            * Currently your student wants to learn {self.learning_lang} at {self.current_level} level
-            * Teaching must be level-appropriate:
-            
-            Beginner:
-                Focus on Basic Communication:
-                    - Vocabulary: Essential words (greetings, numbers, basic adjectives)
-                    - Pronunciation: Clear enunciation of key sounds
-                    - Simple Sentences: Subject-verb-object structures
-                    - Common Phrases: Everyday interactions
-                    - Listening: Slow, clear dialogues
-                    - Grammar: Present tense, basic nouns
-            
-            Intermediate:
-                Expand Expression & Comprehension:
-                    - Vocabulary: Travel, hobbies, daily routines
-                    - Pronunciation: Stress and intonation
-                    - Complex Sentences: Compound structures
-                    - Grammar: Past/future tenses, modals
-                    - Listening: Podcasts, news
-                    - Writing: Short essays, emails
-            
-            Expert:
-                Nuance & Cultural Fluency:
-                    - Vocabulary: Idioms, specialized terms
-                    - Grammar: Advanced tenses
-                    - Speaking: Abstract topics
-                    - Listening: Native-speed content
-                    - Writing: Formal documents
-                    - Culture: Humor, historical context
-            
-            Master:
-                Near-Native Proficiency:
-                    - Vocabulary: Rare/specialized terms
-                    - Pronunciation: Regional variations
-                    - Expression: Subtle nuances
-                    - Listening: Complex media
-                    - Writing: Creative/professional work
-                    - Culture: Social contexts
-
-            Teaching Philosophy:
-            * Focus on {self.level_config['focus']}
-            * Responses < {self.level_config['max_length']} words
-            * Primary language: {self.learning_lang}
-            * English explanations in brackets
-            * Gentle error correction
-            * Cultural insights
-            * Encouraging tone
-            * Varied exercises
-
-            Required Components:
-            1. Target Phrase/Word
-            2. Pronunciation (*italics*)
-            3. Literal Translation
-            4. Grammatical Breakdown
-            5. Contextual Usage
-            6. Interactive Exercise
-            7. Cultural Note (when relevant)
-
-            Example Interaction:
-            User: Hi
-            AI:
-            * Target: こんにちは (Konnichiwa)
-            * Pronunciation: *Konnichiwa*
-            * Translation: Hello
-            * Grammar: Daytime greeting
-            * Usage: こんにちは、元気ですか？
-            * Exercise: Translate "Good afternoon"
-            * Culture: Bowing etiquette"""
+        self.taught_phrases.clear()
+
+    def _prepare_session(self):
+        """Attach the shared LLM clients, memory and compiled prompt for the selected level"""
+        # Reuse the process-wide client instead of reconnecting per session.
+        # Every call goes through the shared rate limiter / retry wrapper.
+        if self._llm_override is not None:
+            self.llm = self.analysis_llm = wrap_llm(self._llm_override)
+        else:
+            self.llm = get_llm()
+            # Analysis uses Gemini's native JSON mode so no fence-stripping is needed
+            self.analysis_llm = get_llm(json_mode=True)
+        if self.memory is None:
+            self.memory = self._build_memory()
+        if isinstance(self.memory, TokenWindowMemory):
+            self.memory.summarizer = self.llm
+
+        # With a context cache, replies send only the session settings,
+        # history and input; the static prefix is referenced by handle
+        single_call = self.turn_mode == "single_call"
+        self.reply_llm = self.llm
+        if self.context_cache is not None:
+            self.reply_llm = self.context_cache.wrap(
+                self.llm, getattr(self.llm, "model", "default"), build_static_prefix(single_call)
+            )
+
+        # Compiled prompt chains are shared per (language, level, mode)
+        with instrumentation.span("prompt.compile"):
+            self.prompt, self.chain = self.prompt_cache.get(
+                self.reply_llm, self.learning_lang, self.current_level, self.level_config,
+                single_call=single_call, cached_prefix=self.context_cache is not None
+            )
+
+
+    def _build_memory(self):
+        if self.memory_mode == "window":
+            return TokenWindowMemory(max_tokens=self.memory_max_tokens)
+        from langchain.memory import ConversationBufferMemory
+
+        return ConversationBufferMemory(
+            memory_key="history",
+            return_messages=True
         )
-        # Create prompt chain with memory
-        self.prompt = ChatPromptTemplate.from_messages([
-            system_template,
-            MessagesPlaceholder(variable_name="history"),
-            HumanMessagePromptTemplate.from_template("{text}")
-        ])
-        
-        # Initialize the chain
-        self.chain = self.prompt | self.llm
-        
+
     def end_session(self):
         if self.current_session_id:
             self.db.end_session(self.current_session_id)
-            self.current_session_id = None
+            self._reset_session()
+
+    def _reset_session(self):
+        self.current_session_id = None
+        self.memory.clear()
+        self.taught_phrases.clear()
+        self.chain = None
+
+    def to_snapshot(self) -> Optional[Dict]:
+        """JSON-ready state of the live session (see snapshots.py), or None without one"""
+        if not self.current_session_id:
+            return None
+        with instrumentation.span("session.snapshot"):
+            return self._snapshot_state(self.db.export_session(self.current_session_id))
+
+    def restore_snapshot(self, state: Dict):
+        """Resume a session from to_snapshot() output, on this or any other worker"""
+        with instrumentation.span("session.restore"):
+            language = self._snapshot_language(state)
+            self._restore_state(state, language, self.db.import_session(state["session"]))
+
+    def _snapshot_state(self, session: Dict) -> Dict:
+        if isinstance(self.memory, TokenWindowMemory):
+            memory = self.memory.to_state()
+        else:
+            history = [["user" if message.type == "human" else "tutor", message.content]
+                       for message in self.memory.chat_memory.messages]
+            memory = {"summary": "", "history": history, "window": len(history) // 2,
+                      "pending": 0, "turns": None}
+        return {
+            "language": self.learning_lang,
+            "level": self.current_level,
+            "level_config": self.level_config,
+            "memory": memory,
+            "taught_phrases": self.taught_phrases.phrases(),
+            "reviews": self.reviews.to_state(),
+            "session": session
+        }
+
+    def _snapshot_language(self, state: Dict) -> str:
+        """Key of the snapshot's language; checked before its session is imported"""
+        language = next((key for key, name in self.available_languages.items()
+                         if name == state["language"]), None)
+        if language is None or state["level"] not in self.levels:
+            raise SnapshotError(f"Unknown language or level in snapshot: "
+                                f"{state['language']!r}, {state['level']!r}")
+        return language
+
+    def _restore_state(self, state: Dict, language: str, session_id: int):
+        self._select_level(language, state["level"])
+        self.level_config = state["level_config"]
+        self.current_session_id = session_id
+        if self.memory is None:
+            self.memory = self._build_memory()
+        if isinstance(self.memory, TokenWindowMemory):
+            self.memory.load_state(state["memory"])
+        else:
             self.memory.clear()
-            self.chain = None
+            for sender, text in state["memory"]["history"]:
+                if sender == "user":
+                    self.memory.chat_memory.add_user_message(text)
+                else:
+                    self.memory.chat_memory.add_ai_message(text)
+        for phrase in state["taught_phrases"]:
+            self.taught_phrases.add(phrase)
+        self.reviews.load_state(state["reviews"])
+        self._prepare_session()
 
+    def chat_history(self, limit: Optional[int] = None, skip: int = 0) -> Tuple[List[Tuple[str, str]], int]:
+        """
+        (sender, text) messages for display, oldest first: up to `limit`
+        messages before the newest `skip`, plus the number kept in memory.
+        """
+        if self.memory is None:
+            return [], 0
+        if isinstance(self.memory, TokenWindowMemory):
+            messages = self.memory.history()
+        else:
+            messages = [
+                ("user" if message.type == "human" else "tutor", message.content)
+                for message in self.memory.chat_memory.messages
+            ]
+        end = max(len(messages) - skip, 0)
+        start = 0 if limit is None else max(end - limit, 0)
+        return messages[start:end], len(messages)
 
-    def _analyze_errors(self, user_input: str) -> List[Dict]:
-        analysis_prompt = f"""Analyze this {self.learning_lang} text from a {self.current_level} learner:
+
+    def _analysis_prompt(self, user_input: str) -> str:
+        return f"""Analyze this {self.learning_lang} text from a {self.current_level} learner:
         Text: '{user_input}'
         
         Return STRICT JSON format with this structure:
@@ -186,62 +265,326 @@ class LanguageLearningAssistant:
             ]
         }}"""
 
+    def _repair_json(self, broken: str) -> str:
+        # Only the malformed JSON is resent, never the whole analysis
         try:
-            response = self.llm.invoke(analysis_prompt)
-            if not response.content.strip():
-                print("Error: Empty response from LLM")
-                return []
-                
-            # First try parsing directly
-            try:
-                result = json.loads(response.content)
-                if "errors" in result:
-                    return result["errors"]
-                return []
-            except json.JSONDecodeError:
-                # If direct parse fails, try extracting JSON from markdown
-                json_str = response.content.split("```json")[-1].split("```")[0].strip()
-                result = json.loads(json_str)
-                return result.get("errors", [])
-                
+            response = self.analysis_llm.invoke(
+                f"Fix this so it is valid JSON. Reply with the JSON only:\n{broken}"
+            )
+        except Exception as e:
+            print(f"JSON repair failed: {e}")
+            return ""
+        return response.content
+
+    def _parse_errors(self, content: str) -> Optional[List[Dict]]:
+        """Extract the errors list, or None if the response could not be parsed"""
+        try:
+            return parse_error_analysis(content, repair=self._repair_json)
+        except AnalysisParseError as e:
+            print(f"Error analysis failed. Raw response: {content}")
+            print(f"Error details: {str(e)}")
+            return None
+
+    async def _arepair_json(self, broken: str) -> str:
+        try:
+            response = await self.analysis_llm.ainvoke(
+                f"Fix this so it is valid JSON. Reply with the JSON only:\n{broken}"
+            )
+        except Exception as e:
+            print(f"JSON repair failed: {e}")
+            return ""
+        return response.content
+
+    async def _aparse_errors(self, content: str) -> Optional[List[Dict]]:
+        """_parse_errors with the repair call awaited instead of blocking the event loop"""
+        try:
+            return await aparse_error_analysis(content, repair=self._arepair_json)
+        except AnalysisParseError as e:
+            print(f"Error analysis failed. Raw response: {content}")
+            print(f"Error details: {str(e)}")
+            return None
+
+    def _cache_errors(self, user_input: str, errors: Optional[List[Dict]]) -> List[Dict]:
+        # Only successful parses are cached so a bad response is retried next time
+        if errors is None:
+            return []
+        self.analysis_cache.put(user_input, self.learning_lang, self.current_level, errors)
+        return errors
+
+    def _local_analysis(self, user_input: str) -> Optional[List[Dict]]:
+        """Errors found without a network round trip, or None if the LLM is needed"""
+        local = self.precheck.classify(user_input, self.learning_lang, self.taught_phrases)
+        if local is not None:
+            metrics.incr("analysis_calls_avoided")
+            return local
+        cached = self.analysis_cache.get(user_input, self.learning_lang, self.current_level)
+        if cached is not None:
+            metrics.incr("analysis_calls_avoided")
+        return cached
+
+    def _analyze_errors(self, user_input: str) -> List[Dict]:
+        with instrumentation.span("analysis.local"):
+            local = self._local_analysis(user_input)
+        if local is not None:
+            return local
+        prompt = self._analysis_prompt(user_input)
+        try:
+            with instrumentation.span("analysis.llm"):
+                response = self.analysis_llm.invoke(prompt)
         except Exception as e:
-            print(f"Error analysis failed. Raw response: {response.content if 'response' in locals() else 'No response'}")
+            print("Error analysis failed. Raw response: No response")
             print(f"Error details: {str(e)}")
             return []
+        self._count_tokens("analysis.llm", response, prompt)
+        with instrumentation.span("analysis.parse"):
+            return self._cache_errors(user_input, self._parse_errors(response.content))
+
+    async def _aanalyze_errors(self, user_input: str) -> List[Dict]:
+        with instrumentation.span("analysis.local"):
+            local = self._local_analysis(user_input)
+        if local is not None:
+            return local
+        prompt = self._analysis_prompt(user_input)
+        try:
+            with instrumentation.span("analysis.llm"):
+                response = await self.analysis_llm.ainvoke(prompt)
+        except Exception as e:
+            print("Error analysis failed. Raw response: No response")
+            print(f"Error details: {str(e)}")
+            return []
+        self._count_tokens("analysis.llm", response, prompt)
+        with instrumentation.span("analysis.parse"):
+            return self._cache_errors(user_input, await self._aparse_errors(response.content))
+
+    def _record_mistake(self, session_id, user_input: str, errors: List[Dict]):
+        if session_id and errors:
+            with instrumentation.span("db.add_mistake"):
+                self.db.add_mistake(
+                    session_id=session_id,
+                    user_input=user_input,
+                    errors=errors
+                )
+            self.reviews.add_mistakes(self.learning_lang, errors)
+
+    def _analyze_and_record(self, session_id, user_input: str) -> List[Dict]:
+        with instrumentation.span("analysis"):
+            errors = self._analyze_errors(user_input)
+            self._record_mistake(session_id, user_input, errors)
+        return errors
+
+    async def _aanalyze_and_record(self, session_id, user_input: str) -> List[Dict]:
+        with instrumentation.span("analysis"):
+            errors = await self._aanalyze_errors(user_input)
+            self._record_mistake(session_id, user_input, errors)
+        return errors
+
+    def _submit_analysis(self, user_input: str):
+        # Copy the context so analysis spans nest under the current turn
+        return _turn_executor.submit(
+            contextvars.copy_context().run,
+            self._analyze_and_record, self.current_session_id, user_input
+        )
+
+    def _store_combined_errors(self, user_input: str, errors: Optional[List[Dict]]):
+        if errors is None:
+            print("Single-call response had no parseable errors block")
+            return
+        self._cache_errors(user_input, errors)
+        self._record_mistake(self.current_session_id, user_input, errors)
+
+    def _single_call_reply(self, user_input: str, content: str) -> str:
+        reply, errors = split_combined_response(content)
+        self._store_combined_errors(user_input, errors)
+        return reply
+
+    def _count_tokens(self, stage: str, response, prompt) -> None:
+        if instrumentation.enabled:
+            text = prompt if isinstance(prompt, str) else prompt.to_string()
+            instrumentation.record_tokens(stage, *token_usage(response, text))
+
+    def _load_history(self):
+        with instrumentation.span("memory.load"):
+            return self.memory.load_memory_variables({})["history"]
+
+    def _review_messages(self, user_input: str) -> List:
+        if not self.review_limit:
+            return []
+        self.reviews.credit(self.learning_lang, user_input)
+        due = self.reviews.show(self.learning_lang, self.review_limit)
+        if not due:
+            return []
+        from langchain_core.messages import SystemMessage
+
+        return [SystemMessage(content=ReviewScheduler.format(due))]
+
+    def _format_prompt(self, user_input: str, history):
+        with instrumentation.span("prompt.format"):
+            return self.prompt.invoke({
+                "text": user_input,
+                "history": history,
+                "review": self._review_messages(user_input)
+            })
+
+    def _reply(self, prompt_value):
+        with instrumentation.span("llm.reply"):
+            response = self.reply_llm.invoke(prompt_value)
+        self._count_tokens("llm.reply", response, prompt_value)
+        return response
+
+    async def _areply(self, prompt_value):
+        with instrumentation.span("llm.reply"):
+            response = await self.reply_llm.ainvoke(prompt_value)
+        self._count_tokens("llm.reply", response, prompt_value)
+        return response
 
+    def _finish_turn(self, user_input: str, ai_response: str):
+        with instrumentation.span("memory.save"):
+            self.memory.save_context({"input": user_input}, {"output": ai_response})
+            self.taught_phrases.add_targets(ai_response)
+            self.reviews.tick()
+
+    async def agenerate_response(self, user_input: str) -> str:
+        """Run error analysis and the tutor reply concurrently"""
+        if not self.chain:
+            return "Please start a session first"
+
+        with instrumentation.span("turn", mode=self.turn_mode):
+            history = self._load_history()
+            prompt_value = self._format_prompt(user_input, history)
+            if self.turn_mode == "single_call":
+                response = await self._areply(prompt_value)
+                ai_response = self._single_call_reply(user_input, response.content)
+            else:
+                response, _ = await asyncio.gather(
+                    self._areply(prompt_value),
+                    self._aanalyze_and_record(self.current_session_id, user_input)
+                )
+                ai_response = response.content
+
+            self._finish_turn(user_input, ai_response)
+        return ai_response
 
     def generate_response(self, user_input: str) -> str:
+        """Sync entry point: analysis runs on the shared pool while the reply is generated"""
         if not self.chain:
             return "Please start a session first"
-            
-        errors = self._analyze_errors(user_input)
-        
-        if self.current_session_id and errors:
-            self.db.add_mistake(
-                session_id=self.current_session_id,
-                user_input=user_input,
-                errors=errors
-            )
 
-        history = self.memory.load_memory_variables({})["history"]
-        response = self.chain.invoke({"text": user_input, "history": history})
-        ai_response = response.content
-        
-        self.memory.save_context({"input": user_input}, {"output": ai_response})
+        with instrumentation.span("turn", mode=self.turn_mode):
+            history = self._load_history()
+            if self.turn_mode == "single_call":
+                response = self._reply(self._format_prompt(user_input, history))
+                ai_response = self._single_call_reply(user_input, response.content)
+            else:
+                analysis = self._submit_analysis(user_input)
+                try:
+                    response = self._reply(self._format_prompt(user_input, history))
+                finally:
+                    # Wait so the mistake is stored before the turn completes
+                    analysis.result()
+                ai_response = response.content
+
+            self._finish_turn(user_input, ai_response)
         return ai_response
         
-    def generate_session_report(self) -> str:
+    def generate_response_stream(self, user_input: str) -> Iterator[str]:
+        """Yield tutor reply chunks as they arrive; memory is updated once the stream ends"""
+        if not self.chain:
+            yield "Please start a session first"
+            return
+
+        # Spans must not stay open across yields, so the stream is timed by hand
+        started = time.perf_counter()
+        history = self._load_history()
+        prompt_value = self._format_prompt(user_input, history)
+        single_call = self.turn_mode == "single_call"
+        splitter = CombinedStreamSplitter() if single_call else None
+        analysis = None if single_call else self._submit_analysis(user_input)
+        chunks = []
+        try:
+            for chunk in self.reply_llm.stream(prompt_value):
+                if not chunks:
+                    instrumentation.observe("llm.first_chunk", time.perf_counter() - started)
+                text = splitter.feed(chunk.content) if splitter else chunk.content
+                chunks.append(chunk.content)
+                if text:
+                    yield text
+            if splitter:
+                tail = splitter.close()
+                if tail:
+                    yield tail
+        finally:
+            if analysis:
+                analysis.result()
+
+        if splitter:
+            # The errors block after the marker was held back from the learner
+            self._store_combined_errors(user_input, splitter.errors())
+            ai_response = splitter.reply
+        else:
+            ai_response = "".join(chunks)
+        self._finish_turn(user_input, ai_response)
+        instrumentation.observe("turn.stream", time.perf_counter() - started)
+
+    async def agenerate_response_stream(self, user_input: str) -> AsyncIterator[str]:
+        """Async variant of generate_response_stream"""
+        if not self.chain:
+            yield "Please start a session first"
+            return
+
+        started = time.perf_counter()
+        history = self._load_history()
+        prompt_value = self._format_prompt(user_input, history)
+        single_call = self.turn_mode == "single_call"
+        splitter = CombinedStreamSplitter() if single_call else None
+        analysis = None if single_call else asyncio.ensure_future(
+            self._aanalyze_and_record(self.current_session_id, user_input)
+        )
+        chunks = []
+        try:
+            async for chunk in self.reply_llm.astream(prompt_value):
+                if not chunks:
+                    instrumentation.observe("llm.first_chunk", time.perf_counter() - started)
+                text = splitter.feed(chunk.content) if splitter else chunk.content
+                chunks.append(chunk.content)
+                if text:
+                    yield text
+            if splitter:
+                tail = splitter.close()
+                if tail:
+                    yield tail
+        finally:
+            if analysis:
+                await analysis
+
+        if splitter:
+            self._store_combined_errors(user_input, splitter.errors())
+            ai_response = splitter.reply
+        else:
+            ai_response = "".join(chunks)
+        self._finish_turn(user_input, ai_response)
+        instrumentation.observe("turn.stream", time.perf_counter() - started)
+
+    def generate_session_report(self, local: bool = False) -> str:
+        """Build the report from running session aggregates; local=True skips the LLM"""
         if not self.current_session_id:
             return "No active session"
-            
-        mistakes = self.db.get_session_mistakes(self.current_session_id)
-        if not mistakes:
-            return "Perfect session! No mistakes found!"
-        
-        report_prompt = f"""Create learning report for {self.current_level} {self.learning_lang} learner:
-        - Total mistakes: {len(mistakes)}
-        - Error types: {', '.join(set(m['errors'][0]['error_type'] for m in mistakes))}
-        Format: Markdown with analysis and recommendations"""
-        
-        response = self.llm.invoke(report_prompt)
-        return response.content
\ No newline at end of file
+
+        with instrumentation.span("report", local=local):
+            with instrumentation.span("db.summary"):
+                summary = self.db.get_session_summary(self.current_session_id)
+            if not summary["total_mistakes"]:
+                return "Perfect session! No mistakes found!"
+
+            if local:
+                return render_local_report(self.learning_lang, self.current_level, summary)
+
+            report_prompt = build_report_prompt(self.learning_lang, self.current_level, summary)
+            try:
+                with instrumentation.span("llm.report"):
+                    response = self.llm.invoke(report_prompt)
+            except Exception as e:
+                # Retries are exhausted; the statistics are still worth showing
+                print(f"Report generation failed: {e}")
+                return render_local_report(self.learning_lang, self.current_level, summary)
+            self._count_tokens("llm.report", response, report_prompt)
+            return response.content
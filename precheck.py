@@ -0,0 +1,122 @@
+# precheck.py
+import re
+import threading
+import unicodedata
+from typing import List, Dict, Optional, Iterable
+
+# Common correct beginner phrases, in native script and romanization. Only
+# correctly accented (and, for pinyin, toned) spellings are listed: an
+# input matching one skips analysis, so a missing accent must not match.
+LEXICONS = {
+    "hindi": [
+        "नमस्ते", "namaste", "धन्यवाद", "dhanyavaad", "dhanyavad", "शुक्रिया", "shukriya",
+        "हाँ", "haan", "नहीं", "nahin", "nahi", "आप कैसे हैं", "aap kaise hain",
+        "मैं ठीक हूँ", "main theek hoon", "शुभ रात्रि", "shubh ratri", "अलविदा", "alvida",
+        "फिर मिलेंगे", "phir milenge", "एक", "ek", "दो", "do", "तीन", "teen",
+        "मेरा नाम", "mera naam", "कृपया", "kripya", "माफ़ कीजिए", "maaf kijiye"
+    ],
+    "spanish": [
+        "hola", "adiós", "gracias", "muchas gracias", "por favor", "sí", "no",
+        "buenos días", "buenas tardes", "buenas noches", "hasta luego",
+        "¿cómo estás?", "estoy bien", "me llamo", "de nada", "lo siento",
+        "uno", "dos", "tres", "cuatro", "cinco", "perdón", "mucho gusto"
+    ],
+    "french": [
+        "bonjour", "bonsoir", "salut", "au revoir", "merci", "merci beaucoup", "s'il vous plaît",
+        "oui", "non", "comment ça va", "ça va bien", "je m'appelle", "de rien",
+        "excusez-moi", "pardon", "bonne nuit", "un", "deux", "trois", "quatre", "cinq",
+        "enchanté", "à bientôt"
+    ],
+    "japanese": [
+        "こんにちは", "konnichiwa", "おはよう", "ohayou", "おはようございます", "ohayou gozaimasu",
+        "こんばんは", "konbanwa", "ありがとう", "arigatou", "ありがとうございます",
+        "arigatou gozaimasu", "さようなら", "sayounara", "はい", "hai", "いいえ", "iie",
+        "すみません", "sumimasen", "おやすみなさい", "oyasuminasai", "いち", "ichi", "に", "ni",
+        "さん", "san", "はじめまして", "hajimemashite"
+    ],
+    "chinese": [
+        "你好", "nǐ hǎo", "谢谢", "xièxie", "再见", "zàijiàn", "是", "shì", "不是", "bú shì",
+        "对不起", "duìbuqǐ", "早上好", "zǎoshang hǎo", "晚安", "wǎn'ān",
+        "一", "yī", "二", "èr", "三", "sān", "我叫", "wǒ jiào"
+    ],
+}
+
+_PUNCTUATION = re.compile(r"[!?.,;:¡¿。！？、，\"“”«»]")
+_TARGET_LINE = re.compile(r"^\W*Target\W*:\s*(.+)$", re.MULTILINE | re.IGNORECASE)
+_PARENTHETICAL = re.compile(r"\(([^)]*)\)")
+
+
+def normalize_phrase(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).casefold()
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+
+class PhraseIndex:
+    """Normalized phrases for cheap exact lookups"""
+
+    def __init__(self, phrases: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._phrases = {}
+        for phrase in phrases:
+            self.add(phrase)
+
+    def add(self, phrase: str):
+        key = normalize_phrase(phrase)
+        if not key:
+            return
+        with self._lock:
+            self._phrases.setdefault(key, phrase.strip())
+
+    def add_targets(self, tutor_reply: str):
+        """Index the phrases the tutor introduced on its "Target:" lines"""
+        for line in _TARGET_LINE.findall(tutor_reply):
+            line = line.replace("*", "")
+            phrase = _PARENTHETICAL.sub("", line)
+            self.add(phrase)
+            # Brackets after native script hold the romanization; after
+            # Latin script they are usually an English gloss
+            if any(ord(char) > 0x24F for char in phrase):
+                for romanized in _PARENTHETICAL.findall(line):
+                    self.add(romanized)
+
+    def phrases(self) -> List[str]:
+        """The indexed phrases as first added, for snapshots"""
+        with self._lock:
+            return list(self._phrases.values())
+
+    def __contains__(self, normalized: str) -> bool:
+        return normalized in self._phrases
+
+    def clear(self):
+        with self._lock:
+            self._phrases.clear()
+
+
+_lexicon_indexes = {language: PhraseIndex(phrases) for language, phrases in LEXICONS.items()}
+
+
+class LocalPrecheck:
+    """
+    Classifies short inputs without an LLM call. Exact matches against the
+    session's taught phrases or the language lexicon are treated as correct;
+    anything else, including near misses of a known phrase (which are often
+    other valid words), returns None so the caller runs full analysis.
+    """
+
+    def __init__(self, max_words: int = 4):
+        self.max_words = max_words
+        self.exact = 0
+
+    def classify(self, user_input: str, language: str,
+                 taught: Optional[PhraseIndex] = None) -> Optional[List[Dict]]:
+        normalized = normalize_phrase(user_input)
+        if not normalized or len(normalized.split()) > self.max_words:
+            return None
+        indexes = [index for index in (taught, _lexicon_indexes.get(language.lower())) if index]
+        if any(normalized in index for index in indexes):
+            self.exact += 1
+            return []
+        return None
+
+    def stats(self) -> Dict:
+        return {"exact": self.exact}
@@ -0,0 +1,189 @@
+# prompts.py
+import json
+from typing import Dict, List, Tuple
+from analysis_parser import ERRORS_MARKER
+
+
+# Identical for every session, so it is sent first as a stable prefix that
+# providers can cache; only build_session_settings varies per session.
+STATIC_SYSTEM_PROMPT = """Act as a language tutor. Strictly follow these rules:
+            1. Compare new inputs with previous taught content
+            2. ALWAYS start responses with error analysis if mistakes exist
+            3. Use this format:
+            - Error Highlight → Explanation → Correction → Exercise
+            4. Maintain 50% new material vs 50% reinforcement, starting with any items listed as due for review
+            5. Never introduce new phrases without addressing mistakes
+            6. Repeat phrases if there is any error 
+            7. If no mistakes move to next phrase
+
+            You are an expert language tutor. The language and level you teach
+            are given under Session Settings at the end of these instructions.
+            Your goal is to provide comprehensive and engaging language instruction.
+
+            Teaching based on level:
+            * Teach the language and level given in Session Settings
+            * Teaching must be level-appropriate:
+            
+            Beginner:
+                Focus on Basic Communication:
+                    - Vocabulary: Essential words (greetings, numbers, basic adjectives)
+                    - Pronunciation: Clear enunciation of key sounds
+                    - Simple Sentences: Subject-verb-object structures
+                    - Common Phrases: Everyday interactions
+                    - Listening: Slow, clear dialogues
+                    - Grammar: Present tense, basic nouns
+            
+            Intermediate:
+                Expand Expression & Comprehension:
+                    - Vocabulary: Travel, hobbies, daily routines
+                    - Pronunciation: Stress and intonation
+                    - Complex Sentences: Compound structures
+                    - Grammar: Past/future tenses, modals
+                    - Listening: Podcasts, news
+                    - Writing: Short essays, emails
+            
+            Expert:
+                Nuance & Cultural Fluency:
+                    - Vocabulary: Idioms, specialized terms
+                    - Grammar: Advanced tenses
+                    - Speaking: Abstract topics
+                    - Listening: Native-speed content
+                    - Writing: Formal documents
+                    - Culture: Humor, historical context
+            
+            Master:
+                Near-Native Proficiency:
+                    - Vocabulary: Rare/specialized terms
+                    - Pronunciation: Regional variations
+                    - Expression: Subtle nuances
+                    - Listening: Complex media
+                    - Writing: Creative/professional work
+                    - Culture: Social contexts
+
+            Teaching Philosophy:
+            * Primary language: the target language in Session Settings
+            * English explanations in brackets
+            * Gentle error correction
+            * Cultural insights
+            * Encouraging tone
+            * Varied exercises
+
+            Required Components:
+            1. Target Phrase/Word
+            2. Pronunciation (*italics*)
+            3. Literal Translation
+            4. Grammatical Breakdown
+            5. Contextual Usage
+            6. Interactive Exercise
+            7. Cultural Note (when relevant)
+
+            Example Interaction:
+            User: Hi
+            AI:
+            * Target: こんにちは (Konnichiwa)
+            * Pronunciation: *Konnichiwa*
+            * Translation: Hello
+            * Grammar: Daytime greeting
+            * Usage: こんにちは、元気ですか？
+            * Exercise: Translate "Good afternoon"
+            * Culture: Bowing etiquette"""
+
+
+def build_session_settings(learning_lang: str, level: str, level_config: Dict) -> str:
+    """The per-session tail of the system prompt"""
+    return f"""
+
+            Session Settings:
+            * Target language: {learning_lang}
+            * Current Level: {level}
+            * Your student wants to learn {learning_lang} at {level} level
+            * Focus on {level_config['focus']}
+            * Responses < {level_config['max_length']} words"""
+
+
+def build_system_prompt(learning_lang: str, level: str, level_config: Dict) -> str:
+    """Render the tutor system prompt for a language and level"""
+    return STATIC_SYSTEM_PROMPT + build_session_settings(learning_lang, level, level_config)
+
+
+# Appended in single-call mode so one response carries the reply and the analysis.
+# Braces are doubled because the system prompt is compiled as a template.
+COMBINED_OUTPUT_INSTRUCTIONS = f"""
+
+            Output Format (required):
+            First write your tutor reply as usual. Then, on its own line, write
+            {ERRORS_MARKER}
+            followed by STRICT JSON analysing only the learner's latest message:
+            {{{{"errors": [{{{{"type": "grammar/vocabulary/pronunciation/cultural",
+            "incorrect_part": "exact text that's wrong", "correct_version": "corrected version",
+            "explanation": "simple explanation", "severity": "low/medium/high"}}}}]}}}}
+            Use {{{{"errors": []}}}} when the message has no mistakes."""
+
+
+def build_batch_analysis_prompt(learning_lang: str, level: str,
+                                items: List[Tuple[int, str]]) -> str:
+    """Analysis prompt for several learner texts at once, each tagged with its id"""
+    # Texts are JSON-quoted so quotes and newlines cannot break the numbering
+    texts = "\n        ".join(
+        f"[{item_id}] {json.dumps(text, ensure_ascii=False)}" for item_id, text in items
+    )
+    return f"""Analyze these {learning_lang} texts from {level} learners, each tagged with its id:
+        {texts}
+
+        Return STRICT JSON with one entry per id, in this structure:
+        {{
+            "results": [
+                {{
+                    "id": 1,
+                    "errors": [
+                        {{
+                            "type": "grammar/vocabulary/pronunciation/cultural",
+                            "incorrect_part": "exact text that's wrong",
+                            "correct_version": "corrected version",
+                            "explanation": "simple explanation",
+                            "severity": "low/medium/high"
+                        }}
+                    ]
+                }}
+            ]
+        }}
+        Use an empty errors list for a text with no mistakes."""
+
+
+def build_static_prefix(single_call: bool = False) -> str:
+    """The session-independent start of the system prompt, as sent to the model"""
+    prefix = STATIC_SYSTEM_PROMPT + (COMBINED_OUTPUT_INSTRUCTIONS if single_call else "")
+    # Undo the template escaping of COMBINED_OUTPUT_INSTRUCTIONS
+    return prefix.format()
+
+
+def build_tutor_prompt(learning_lang: str, level: str, level_config: Dict,
+                       single_call: bool = False, cached_prefix: bool = False):
+    """
+    Compile the tutor prompt: system rules, conversation history, learner input.
+    With cached_prefix the system message holds only the session settings;
+    the static prefix is supplied by a context cache (see context_cache.py).
+    """
+    from langchain_core.prompts import (
+        ChatPromptTemplate,
+        MessagesPlaceholder,
+        SystemMessagePromptTemplate,
+        HumanMessagePromptTemplate
+    )
+
+    settings = build_session_settings(learning_lang, level, level_config)
+    if cached_prefix:
+        system_prompt = settings
+    else:
+        system_prompt = STATIC_SYSTEM_PROMPT
+        if single_call:
+            system_prompt += COMBINED_OUTPUT_INSTRUCTIONS
+        system_prompt += settings
+    system_template = SystemMessagePromptTemplate.from_template(system_prompt)
+    return ChatPromptTemplate.from_messages([
+        system_template,
+        MessagesPlaceholder(variable_name="history"),
+        # Spaced-repetition items due this turn (review_scheduler.py), if any
+        MessagesPlaceholder(variable_name="review", optional=True),
+        HumanMessagePromptTemplate.from_template("{text}")
+    ])
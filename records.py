@@ -0,0 +1,125 @@
+# records.py
+import sys
+from enum import Enum
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+from analysis_parser import ERROR_TYPES, SEVERITIES
+
+
+class ErrorType(str, Enum):
+    GRAMMAR = "grammar"
+    VOCABULARY = "vocabulary"
+    PRONUNCIATION = "pronunciation"
+    CULTURAL = "cultural"
+    UNKNOWN = "unknown"
+
+    @classmethod
+    def parse(cls, value) -> "ErrorType":
+        """Map a raw type string to its member; anything unrecognized is UNKNOWN"""
+        return _ERROR_TYPES.get(str(value or "").strip().lower(), cls.UNKNOWN)
+
+
+class Severity(str, Enum):
+    LOW = "low"
+    MEDIUM = "medium"
+    HIGH = "high"
+    UNKNOWN = "unknown"
+
+    @classmethod
+    def parse(cls, value) -> "Severity":
+        return _SEVERITIES.get(str(value or "").strip().lower(), cls.UNKNOWN)
+
+
+# Plain dict lookups are much cheaper than Enum's value lookup on the hot path
+_ERROR_TYPES = {value: ErrorType(value) for value in ERROR_TYPES}
+_SEVERITIES = {value: Severity(value) for value in SEVERITIES}
+
+
+def _intern(text) -> str:
+    # Corrections repeat a lot across learners ("ka" -> "ki"), so share them
+    return sys.intern(str(text)) if text else ""
+
+
+class ErrorRecord:
+    """One error from an analysis, with type and severity as shared enum members"""
+
+    __slots__ = ("type", "severity", "incorrect_part", "correct_version", "explanation")
+
+    def __init__(self, type: ErrorType, severity: Severity, incorrect_part: str = "",
+                 correct_version: str = "", explanation: str = ""):
+        self.type = type
+        self.severity = severity
+        self.incorrect_part = incorrect_part
+        self.correct_version = correct_version
+        self.explanation = explanation
+
+    @classmethod
+    def from_dict(cls, error: Dict) -> "ErrorRecord":
+        """Build from a validated error dict; older error_type/correction keys are accepted"""
+        return cls(
+            ErrorType.parse(error.get("type") or error.get("error_type")),
+            Severity.parse(error.get("severity")),
+            _intern(error.get("incorrect_part")),
+            _intern(error.get("correct_version", error.get("correction"))),
+            error.get("explanation") or ""
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "type": self.type.value,
+            "incorrect_part": self.incorrect_part,
+            "correct_version": self.correct_version,
+            "explanation": self.explanation,
+            "severity": self.severity.value
+        }
+
+
+class MistakeRecord:
+    """A recorded learner input; the timestamp is epoch seconds rather than a datetime"""
+
+    __slots__ = ("timestamp", "user_input", "errors")
+
+    def __init__(self, timestamp: float, user_input: str, errors: Tuple[ErrorRecord, ...]):
+        self.timestamp = timestamp
+        self.user_input = user_input
+        self.errors = errors
+
+    @classmethod
+    def from_errors(cls, user_input: str, errors: List[Dict],
+                    timestamp: Optional[float] = None) -> "MistakeRecord":
+        return cls(
+            datetime.now().timestamp() if timestamp is None else timestamp,
+            user_input,
+            tuple(ErrorRecord.from_dict(e) for e in errors if isinstance(e, dict))
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamp),
+            "user_input": self.user_input,
+            "errors": [error.to_dict() for error in self.errors]
+        }
+
+
+class SessionRecord:
+    """Session metadata; language and level are interned since they repeat per session"""
+
+    __slots__ = ("language", "level", "start_time", "end_time", "active")
+
+    def __init__(self, language: str, level: str, start_time: float,
+                 end_time: Optional[float] = None, active: bool = True):
+        self.language = sys.intern(language)
+        self.level = sys.intern(level)
+        self.start_time = start_time
+        self.end_time = end_time
+        self.active = active
+
+    def to_dict(self) -> Dict:
+        return {
+            "language": self.language,
+            "level": self.level,
+            "start_time": datetime.fromtimestamp(self.start_time),
+            "end_time": datetime.fromtimestamp(self.end_time) if self.end_time else None,
+            "active": self.active
+        }
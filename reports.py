@@ -0,0 +1,41 @@
+# reports.py
+from typing import Dict
+
+
+def _format_counts(counts: Dict) -> str:
+    return ", ".join(f"{name} {count}" for name, count in counts.items()) or "none"
+
+
+def build_report_prompt(learning_lang: str, level: str, summary: Dict) -> str:
+    """Compact LLM prompt built from session aggregates instead of raw mistakes"""
+    parts = ", ".join(f"'{part}' x{count}" for part, count in summary["top_incorrect_parts"])
+    return f"""Create learning report for {level} {learning_lang} learner:
+        - Total mistakes: {summary['total_mistakes']} ({summary['total_errors']} individual errors)
+        - Error types: {_format_counts(summary['by_type'])}
+        - Severity: {_format_counts(summary['by_severity'])}
+        - Most frequent incorrect parts: {parts or 'none'}
+        Format: Markdown with analysis and recommendations"""
+
+
+def render_local_report(learning_lang: str, level: str, summary: Dict) -> str:
+    """Markdown report rendered from session aggregates with no LLM call"""
+    lines = [
+        f"## {learning_lang} session report ({level})",
+        "",
+        f"- **Turns with mistakes:** {summary['total_mistakes']}",
+        f"- **Individual errors:** {summary['total_errors']}",
+        "",
+        "### Error types",
+        "| Type | Count |",
+        "| --- | --- |",
+    ]
+    lines += [f"| {name} | {count} |" for name, count in summary["by_type"].items()]
+    lines += ["", "### Severity", "| Severity | Count |", "| --- | --- |"]
+    lines += [f"| {name} | {count} |" for name, count in summary["by_severity"].items()]
+    if summary["top_incorrect_parts"]:
+        lines += ["", "### Most frequent mistakes"]
+        lines += [f"- `{part}` ({count}x)" for part, count in summary["top_incorrect_parts"]]
+    if summary["by_type"]:
+        focus = next(iter(summary["by_type"]))
+        lines += ["", f"**Recommendation:** focus your next session on {focus}."]
+    return "\n".join(lines)
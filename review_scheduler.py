@@ -0,0 +1,221 @@
+# review_scheduler.py
+import heapq
+import itertools
+import threading
+from typing import List, Dict, Optional
+
+from precheck import normalize_phrase
+
+SEVERITY_WEIGHT = {"high": 0, "medium": 1, "low": 2}
+
+
+class ReviewItem:
+    """One recorded mistake and its SM-2 state"""
+
+    __slots__ = ("language", "incorrect_part", "correct_version", "error_type", "severity",
+                 "easiness", "interval", "repetitions", "lapses", "due", "version",
+                 "credited_turn", "shown_turn")
+
+    def __init__(self, language: str, incorrect_part: str, correct_version: str,
+                 error_type: str, severity: str, due: int):
+        self.language = language
+        self.incorrect_part = incorrect_part
+        self.correct_version = correct_version
+        self.error_type = error_type
+        self.severity = severity
+        self.easiness = 2.5
+        self.interval = 0
+        self.repetitions = 0
+        self.lapses = 0
+        self.due = due
+        # Bumped on every reschedule so stale heap entries can be skipped
+        self.version = 0
+        self.credited_turn = -1
+        # Turn the item was last listed in a prompt, -1 once graded
+        self.shown_turn = -1
+
+
+def _contains(text: str, phrase: str) -> bool:
+    # Whole words for spaced scripts; Japanese/Chinese have no spaces to match on
+    return f" {phrase} " in f" {text} " or (not phrase.isascii() and phrase in text)
+
+
+class ReviewScheduler:
+    """
+    SM-2 spaced repetition over the learner's mistakes, with intervals
+    counted in turns since reviews happen inside the conversation.
+
+    - add_mistakes: a new mistake becomes an item due after first_interval
+      turns; repeating a known mistake is a lapse and resets it.
+    - show: the due items to list in this turn's prompt.
+    - credit: a due item is passed when the learner uses its correction;
+      one shown on an earlier turn but not used gets the lowest passing
+      grade, so unused items move back in the queue instead of holding
+      their place forever.
+    - due: the most overdue items, read from a heap ordered by
+      (due turn, severity) so a turn never scans every item.
+    """
+
+    def __init__(self, first_interval: int = 1, second_interval: int = 3,
+                 max_items: int = 200):
+        self.first_interval = first_interval
+        self.second_interval = second_interval
+        self.max_items = max_items
+        self.turn = 0
+        self._items = {}
+        self._heap = []
+        self._seq = itertools.count()
+        # Mistakes are recorded from the analysis thread while a turn runs
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add_mistakes(self, language: str, errors: List[Dict]):
+        with self._lock:
+            for error in errors:
+                if not isinstance(error, dict):
+                    continue
+                incorrect = str(error.get("incorrect_part") or "").strip()
+                correct = str(error.get("correct_version") or error.get("correction") or "").strip()
+                key = (language, normalize_phrase(incorrect))
+                if not key[1] or not correct:
+                    continue
+                item = self._items.get(key)
+                if item is None:
+                    item = ReviewItem(language, incorrect, correct,
+                                      error.get("type") or error.get("error_type") or "unknown",
+                                      error.get("severity") or "medium", self.turn)
+                    self._items[key] = item
+                    self._schedule(item, self.first_interval)
+                    self._trim()
+                else:
+                    item.correct_version = correct
+                    self._grade(item, 1)
+
+    def credit(self, language: str, user_input: str):
+        """Grade due items against the learner's input (once per turn)"""
+        text = normalize_phrase(user_input)
+        with self._lock:
+            for item in self._due_locked(language, limit=None):
+                if item.credited_turn == self.turn:
+                    continue
+                if text and _contains(text, normalize_phrase(item.correct_version)) \
+                        and not _contains(text, normalize_phrase(item.incorrect_part)):
+                    item.credited_turn = self.turn
+                    self._grade(item, 4)
+                elif 0 <= item.shown_turn < self.turn:
+                    self._grade(item, 3)
+
+    def show(self, language: str, limit: int = 3) -> List[ReviewItem]:
+        """Due items for this turn's prompt; the next credit() grades them"""
+        with self._lock:
+            items = self._due_locked(language, limit)
+            for item in items:
+                item.shown_turn = self.turn
+            return items
+
+    def due(self, language: str, limit: Optional[int] = 3) -> List[ReviewItem]:
+        with self._lock:
+            return self._due_locked(language, limit)
+
+    def tick(self):
+        """Advance the clock by one turn"""
+        with self._lock:
+            self.turn += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._heap = []
+
+    def stats(self) -> Dict:
+        with self._lock:
+            items = list(self._items.values())
+            due = sum(1 for item in items if item.due <= self.turn)
+        return {
+            "items": len(items),
+            "due": due,
+            "mean_interval": sum(item.interval for item in items) / len(items) if items else 0.0,
+            "lapses": sum(item.lapses for item in items)
+        }
+
+    def to_state(self) -> Dict:
+        """JSON-ready scheduler state for a session snapshot; one row per item"""
+        with self._lock:
+            return {"turn": self.turn,
+                    "items": [[getattr(item, field) for field in ReviewItem.__slots__]
+                              for item in self._items.values()]}
+
+    def load_state(self, state: Dict):
+        with self._lock:
+            self.turn = state["turn"]
+            self._items.clear()
+            self._heap = []
+            for row in state["items"]:
+                item = ReviewItem.__new__(ReviewItem)
+                # Snapshots from before shown_turn was added have one field less
+                item.shown_turn = -1
+                for field, value in zip(ReviewItem.__slots__, row):
+                    setattr(item, field, value)
+                key = (item.language, normalize_phrase(item.incorrect_part))
+                self._items[key] = item
+                self._heap.append((item.due, SEVERITY_WEIGHT.get(item.severity, 1),
+                                   next(self._seq), key, item.version))
+            heapq.heapify(self._heap)
+
+    @staticmethod
+    def format(items: List[ReviewItem]) -> str:
+        """Compact prompt block listing the items to reinforce"""
+        lines = "\n".join(
+            f"- {item.incorrect_part} → {item.correct_version} ({item.error_type})" for item in items
+        )
+        return f"Due for review: the learner got these wrong before. Work one or two into your reply:\n{lines}"
+
+    def _grade(self, item: ReviewItem, quality: int):
+        # SM-2: quality 0-5, below 3 restarts the item
+        if quality < 3:
+            item.repetitions = 0
+            item.lapses += 1
+            interval = self.first_interval
+        else:
+            item.repetitions += 1
+            if item.repetitions == 1:
+                interval = self.first_interval
+            elif item.repetitions == 2:
+                interval = self.second_interval
+            else:
+                interval = round(item.interval * item.easiness)
+        item.easiness = max(1.3, item.easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self._schedule(item, interval)
+
+    def _schedule(self, item: ReviewItem, interval: int):
+        item.shown_turn = -1
+        item.interval = interval
+        item.due = self.turn + interval
+        item.version += 1
+        key = (item.language, normalize_phrase(item.incorrect_part))
+        heapq.heappush(self._heap, (item.due, SEVERITY_WEIGHT.get(item.severity, 1),
+                                    next(self._seq), key, item.version))
+
+    def _due_locked(self, language: str, limit: Optional[int]) -> List[ReviewItem]:
+        found, keep = [], []
+        while self._heap and self._heap[0][0] <= self.turn \
+                and (limit is None or len(found) < limit):
+            entry = heapq.heappop(self._heap)
+            item = self._items.get(entry[3])
+            if item is None or item.version != entry[4]:
+                continue  # stale entry from an earlier schedule
+            keep.append(entry)
+            if item.language == language:
+                found.append(item)
+        # Due items stay queued until they are graded
+        for entry in keep:
+            heapq.heappush(self._heap, entry)
+        return found
+
+    def _trim(self):
+        # Over capacity: forget the item least in need of review
+        if len(self._items) > self.max_items:
+            key = max(self._items, key=lambda k: (self._items[k].due, -self._items[k].lapses))
+            del self._items[key]
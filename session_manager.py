@@ -0,0 +1,319 @@
+# session_manager.py
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from main import LanguageLearningAssistant
+from async_assistant import AsyncLanguageLearningAssistant
+from database import open_database, AsyncMistakeStore
+from snapshots import encode_snapshot, decode_snapshot, SnapshotError
+from llm_pool import default_prompt_cache
+from analysis_cache import default_analysis_cache
+
+
+class SessionManager:
+    """
+    Serves many learners from one process. The database, LLM client,
+    prompt cache and analysis cache are created once and shared; each
+    learner key gets a lightweight LanguageLearningAssistant holding only
+    its own memory and session state. Sessions idle for longer than
+    idle_timeout seconds, or beyond max_sessions, are ended and dropped.
+
+    With a snapshot store (snapshots.py), save(key) writes the learner's
+    session to it, a key that is not live here is restored from it, and
+    evicted sessions are saved instead of ended, so a learner can resume
+    after a restart or on another worker. Snapshots not saved for
+    snapshot_ttl seconds are deleted and their database sessions ended,
+    swept at most every snapshot_sweep_interval seconds.
+    """
+
+    assistant_class = LanguageLearningAssistant
+    snapshot_sweep_interval = 300
+
+    def __init__(self, db=None, llm=None, prompt_cache=None, analysis_cache=None,
+                 idle_timeout: float = 30 * 60, max_sessions: Optional[int] = None,
+                 memory_mode: str = "window", memory_max_tokens: int = 1500,
+                 turn_mode: str = "two_call", context_cache=None, snapshot_store=None,
+                 snapshot_ttl: Optional[float] = 24 * 3600):
+        self.db = db or open_database()
+        self.llm = llm
+        self.prompt_cache = prompt_cache or default_prompt_cache
+        self.analysis_cache = analysis_cache or default_analysis_cache
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.memory_mode = memory_mode
+        self.memory_max_tokens = memory_max_tokens
+        self.turn_mode = turn_mode
+        self.context_cache = context_cache
+        if snapshot_store is None and os.environ.get("LLA_SNAPSHOT_STORE"):
+            from snapshots import default_snapshot_store as snapshot_store
+        self.snapshot_store = snapshot_store
+        self.snapshot_ttl = snapshot_ttl
+        # key -> [assistant, last_active], least recently used first
+        self._sessions = OrderedDict()
+        # key -> the client (e.g. browser tab) allowed to drive it
+        self._owners = {}
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, key: str) -> LanguageLearningAssistant:
+        """Return the learner's state, restoring or creating it on first use"""
+        now = time.monotonic()
+        entry = self._touch(key, now)
+        if entry is None:
+            assistant = self._new_assistant()
+            state = self._load_snapshot(self._read_snapshot(key), key)
+            if state is not None:
+                try:
+                    assistant.restore_snapshot(state)
+                except SnapshotError as e:
+                    print(f"Ignoring snapshot for {key}: {e}")
+            entry = self._add(key, assistant, now)
+        self._close(self._expire(now))
+        if self._sweep_due(now):
+            self.expire_snapshots()
+        return entry[0]
+
+    def claim(self, key: str, owner: str) -> bool:
+        """
+        Bind key to one client before it calls get; False if another client
+        holds it. Assistants are not thread-safe, so a duplicated tab or a
+        shared link must not drive the same session.
+        """
+        with self._lock:
+            return self._owners.setdefault(key, owner) == owner
+
+    def save(self, key: str) -> bool:
+        """Snapshot the learner's live session to the store; False if nothing was saved"""
+        with self._lock:
+            entry = self._sessions.get(key)
+        state = entry[0].to_snapshot() if entry and self.snapshot_store is not None else None
+        if state is None:
+            return False
+        self.snapshot_store.put(key, encode_snapshot(state))
+        return True
+
+    def release(self, key: str):
+        """End and forget a learner's session, including its snapshot"""
+        with self._lock:
+            entry = self._sessions.pop(key, None)
+            self._owners.pop(key, None)
+        if entry:
+            entry[0].end_session()
+        if self.snapshot_store is not None:
+            self.snapshot_store.delete(key)
+
+    def evict_idle(self) -> int:
+        """End (or save) sessions past the idle timeout; returns how many were evicted"""
+        expired = self._expire(time.monotonic())
+        self._close(expired)
+        self.expire_snapshots()
+        return len(expired)
+
+    def expire_snapshots(self) -> int:
+        """Delete snapshots not saved for snapshot_ttl seconds and end their database sessions"""
+        if self.snapshot_store is None or self.snapshot_ttl is None:
+            return 0
+        blobs = self.snapshot_store.expire(time.time() - self.snapshot_ttl)
+        for session in self._expired_sessions(blobs):
+            self.db.end_exported_session(session)
+        return len(blobs)
+
+    def _new_assistant(self) -> LanguageLearningAssistant:
+        return self.assistant_class(
+            llm=self.llm,
+            db=self.db,
+            prompt_cache=self.prompt_cache,
+            analysis_cache=self.analysis_cache,
+            memory_mode=self.memory_mode,
+            memory_max_tokens=self.memory_max_tokens,
+            turn_mode=self.turn_mode,
+            context_cache=self.context_cache
+        )
+
+    def _touch(self, key: str, now: float):
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is not None:
+                entry[1] = now
+                self._sessions.move_to_end(key)
+            return entry
+
+    def _add(self, key: str, assistant, now: float):
+        # Built outside the lock; if a concurrent get added the key first, keep that one
+        with self._lock:
+            return self._sessions.setdefault(key, [assistant, now])
+
+    def _read_snapshot(self, key: str) -> Optional[bytes]:
+        return self.snapshot_store.get(key) if self.snapshot_store is not None else None
+
+    @staticmethod
+    def _load_snapshot(blob: Optional[bytes], key: str) -> Optional[Dict]:
+        if blob is None:
+            return None
+        try:
+            return decode_snapshot(blob)
+        except SnapshotError as e:
+            print(f"Ignoring snapshot for {key}: {e}")
+            return None
+
+    def _expired_sessions(self, blobs):
+        """Exported database sessions of expired snapshots, minus any live here"""
+        with self._lock:
+            live = {assistant.current_session_id for assistant, _ in self._sessions.values()}
+        for blob in blobs:
+            state = self._load_snapshot(blob, "an expired key")
+            if state is not None and state["session"]["id"] not in live:
+                yield state["session"]
+
+    def _sweep_due(self, now: float) -> bool:
+        if self.snapshot_store is None or self.snapshot_ttl is None:
+            return False
+        with self._lock:
+            if now < self._next_sweep:
+                return False
+            self._next_sweep = now + self.snapshot_sweep_interval
+            return True
+
+    def _expire(self, now: float):
+        with self._lock:
+            return self._collect_expired(now)
+
+    def _collect_expired(self, now: float):
+        # Caller holds the lock; entries are ordered by last activity
+        expired = []
+        while self._sessions:
+            key, (assistant, last_active) = next(iter(self._sessions.items()))
+            over_cap = self.max_sessions is not None and len(self._sessions) > self.max_sessions
+            if not over_cap and now - last_active < self.idle_timeout:
+                break
+            del self._sessions[key]
+            self._owners.pop(key, None)
+            expired.append((key, assistant))
+        self.evicted += len(expired)
+        return expired
+
+    def _close(self, expired):
+        for key, assistant in expired:
+            if self.snapshot_store is not None and assistant.current_session_id:
+                # Suspended rather than ended, so the learner can resume anywhere
+                self.snapshot_store.put(key, encode_snapshot(assistant.to_snapshot()))
+            else:
+                assistant.end_session()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sessions, evicted = len(self._sessions), self.evicted
+        return {
+            "sessions": sessions,
+            "evicted": evicted,
+            "active_db_sessions": len(self.db.get_active_sessions())
+        }
+
+
+class AsyncSessionManager(SessionManager):
+    """
+    SessionManager for an event loop, handing out
+    AsyncLanguageLearningAssistant instances. get, save, release, close,
+    evict_idle and expire_snapshots are coroutines and snapshot store I/O
+    runs on the default executor; evicted sessions are ended or saved, and
+    snapshots swept, in background tasks. Call it from the loop's thread
+    only.
+    """
+
+    assistant_class = AsyncLanguageLearningAssistant
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Strong references so pending end/save/sweep tasks are not collected
+        self._closing = set()
+        self._adb = AsyncMistakeStore(self.db)
+
+    async def get(self, key: str) -> AsyncLanguageLearningAssistant:
+        """Return the learner's state, restoring or creating it on first use"""
+        now = time.monotonic()
+        entry = self._touch(key, now)
+        if entry is None:
+            assistant = self._new_assistant()
+            state = self._load_snapshot(await self._store_call("get", key), key)
+            if state is not None:
+                try:
+                    await assistant.restore_snapshot(state)
+                except SnapshotError as e:
+                    print(f"Ignoring snapshot for {key}: {e}")
+            entry = self._add(key, assistant, now)
+        self._close(self._expire(now))
+        if self._sweep_due(now):
+            self._spawn(self.expire_snapshots())
+        return entry[0]
+
+    async def save(self, key: str) -> bool:
+        """Snapshot the learner's live session to the store; False if nothing was saved"""
+        with self._lock:
+            entry = self._sessions.get(key)
+        state = await entry[0].to_snapshot() if entry and self.snapshot_store is not None else None
+        if state is None:
+            return False
+        await self._store_call("put", key, encode_snapshot(state))
+        return True
+
+    async def release(self, key: str):
+        """End and forget a learner's session, including its snapshot"""
+        with self._lock:
+            entry = self._sessions.pop(key, None)
+            self._owners.pop(key, None)
+        if entry:
+            await entry[0].end_session()
+        await self._store_call("delete", key)
+
+    async def close(self):
+        """End (or, with a snapshot store, save) every session, e.g. on server shutdown"""
+        with self._lock:
+            entries = list(self._sessions.items())
+            self._sessions.clear()
+        await asyncio.gather(*(self._retire(key, assistant) for key, (assistant, _) in entries),
+                             *self._closing)
+
+    async def evict_idle(self) -> int:
+        """End (or save) sessions past the idle timeout; returns how many were evicted"""
+        expired = self._expire(time.monotonic())
+        self._close(expired)
+        await self.expire_snapshots()
+        return len(expired)
+
+    async def expire_snapshots(self) -> int:
+        """Delete snapshots not saved for snapshot_ttl seconds and end their database sessions"""
+        if self.snapshot_store is None or self.snapshot_ttl is None:
+            return 0
+        blobs = await self._store_call("expire", time.time() - self.snapshot_ttl)
+        for session in self._expired_sessions(blobs):
+            await self._adb.end_exported_session(session)
+        return len(blobs)
+
+    async def _store_call(self, name: str, *args):
+        if self.snapshot_store is None:
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, getattr(self.snapshot_store, name), *args)
+
+    async def _retire(self, key: str, assistant: AsyncLanguageLearningAssistant):
+        if self.snapshot_store is not None and assistant.current_session_id:
+            await self._store_call("put", key, encode_snapshot(await assistant.to_snapshot()))
+        else:
+            await assistant.end_session()
+
+    def _close(self, expired):
+        for key, assistant in expired:
+            self._spawn(self._retire(key, assistant))
+
+    def _spawn(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
@@ -0,0 +1,158 @@
+# snapshots.py
+import os
+import time
+import json
+import zlib
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+# A snapshot is one session's memory, level settings, review schedule and
+# database rows, as zlib-compressed compact JSON. Any worker with access to
+# the store can restore it, so sessions survive restarts and can move.
+# Stores also expire snapshots not written for a while, returning them so
+# the caller can end the database sessions they belonged to.
+
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot cannot be decoded"""
+
+
+def encode_snapshot(state: Dict) -> bytes:
+    payload = json.dumps({"version": SNAPSHOT_VERSION, **state},
+                         ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"), 6)
+
+
+def decode_snapshot(blob: bytes) -> Dict:
+    try:
+        state = json.loads(zlib.decompress(blob))
+    except (zlib.error, ValueError) as e:
+        raise SnapshotError(f"Corrupt snapshot: {e}") from e
+    if state.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version: {state.get('version')}")
+    return state
+
+
+class FileSnapshotStore:
+    """One file per session key in a directory (local disk or a shared volume)"""
+
+    def __init__(self, directory: str = "snapshots"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # Keys come from clients, so they are hashed rather than used as names
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + ".snap")
+
+    def put(self, key: str, blob: bytes):
+        path = self._path(key)
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(blob)
+        # Readers see the old snapshot or the new one, never a partial write
+        os.replace(temp, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def expire(self, cutoff: float) -> List[bytes]:
+        """Remove and return snapshots last written before cutoff (a time.time() value)"""
+        expired = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".snap"):
+                continue
+            claimed = f"{entry.path}.{os.getpid()}.{threading.get_ident()}.expired"
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+                # Renamed first so two workers sweeping at once do not both take it
+                os.rename(entry.path, claimed)
+            except FileNotFoundError:
+                continue
+            with open(claimed, "rb") as f:
+                expired.append(f.read())
+            os.remove(claimed)
+        return expired
+
+
+class SQLiteSnapshotStore:
+    """Key-value table in a local SQLite file; WAL lets worker processes share it"""
+
+    def __init__(self, path: str = "snapshots.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots "
+            "(key TEXT PRIMARY KEY, data BLOB NOT NULL, updated REAL NOT NULL DEFAULT 0)"
+        )
+        if "updated" not in {row[1] for row in self._conn.execute("PRAGMA table_info(snapshots)")}:
+            # Tables from before expiry; existing rows count as written now
+            self._conn.execute("ALTER TABLE snapshots ADD COLUMN updated REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE snapshots SET updated = ?", (time.time(),))
+        self._conn.execute("CREATE INDEX IF NOT EXISTS snapshots_updated ON snapshots (updated)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def put(self, key: str, blob: bytes):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO snapshots (key, data, updated) VALUES (?, ?, ?)",
+                               (key, blob, time.time()))
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM snapshots WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM snapshots WHERE key = ?", (key,))
+
+    def expire(self, cutoff: float) -> List[bytes]:
+        """Remove and return snapshots last written before cutoff (a time.time() value)"""
+        expired = []
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT key, data FROM snapshots WHERE updated < ?", (cutoff,)
+            ).fetchall()
+            for key, data in rows:
+                # Skipped if another worker expired or rewrote it meanwhile
+                deleted = self._conn.execute(
+                    "DELETE FROM snapshots WHERE key = ? AND updated < ?", (key, cutoff)
+                ).rowcount
+                if deleted:
+                    expired.append(data)
+        return expired
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def snapshot_store_from_env():
+    """LLA_SNAPSHOT_STORE=file|sqlite selects a store at LLA_SNAPSHOT_PATH; unset disables snapshots"""
+    kind = os.environ.get("LLA_SNAPSHOT_STORE", "").lower()
+    path = os.environ.get("LLA_SNAPSHOT_PATH")
+    if kind == "file":
+        return FileSnapshotStore(path or "snapshots")
+    if kind == "sqlite":
+        return SQLiteSnapshotStore(path or "snapshots.db")
+    return None
+
+
+default_snapshot_store = snapshot_store_from_env()
@@ -0,0 +1,123 @@
+# tests/test_analysis_parser.py
+import json
+import asyncio
+
+import pytest
+
+from analysis_parser import (
+    AnalysisParseError, parse_error_analysis, aparse_error_analysis, validate_errors, repair_json
+)
+
+ERROR = {"type": "grammar", "incorrect_part": "soy ir", "correct_version": "voy a ir",
+         "explanation": "Use ir a + infinitive", "severity": "high"}
+OTHER = {"type": "vocabulary", "incorrect_part": "namate", "correct_version": "namaste",
+         "explanation": "Spelling", "severity": "low"}
+
+
+def test_plain_json():
+    assert parse_error_analysis(json.dumps({"errors": [ERROR]})) == [ERROR]
+
+
+def test_fenced_json_with_prose():
+    content = "Here you go:\n```json\n" + json.dumps({"errors": [ERROR]}) + "\n```\nHope it helps!"
+    assert parse_error_analysis(content) == [ERROR]
+
+
+def test_no_errors():
+    assert parse_error_analysis('{"errors": []}') == []
+
+
+def test_trailing_commas_and_python_literals():
+    content = '{"errors": [{"type": "grammar", "incorrect_part": "soy ir", ' \
+              '"correct_version": "voy a ir", "explanation": "Use ir a + infinitive", ' \
+              '"severity": "high",},], "done": True}'
+    assert parse_error_analysis(content) == [ERROR]
+
+
+def test_repair_leaves_string_contents_alone():
+    text = '{"errors": [{"type": "grammar", "incorrect_part": "a,]", "correct_version": "True"}]}'
+    assert json.loads(repair_json(text)[0]) == json.loads(text)
+
+
+def test_truncated_response_closes_open_brackets():
+    complete = json.dumps({"errors": [ERROR, OTHER]})
+    # Cut off inside the second entry's explanation; its required fields are complete
+    truncated = complete[:complete.index('"Spelling') + 5]
+    assert parse_error_analysis(truncated) == [ERROR, {**OTHER, "explanation": "Spel", "severity": "medium"}]
+
+
+def test_truncated_inside_required_field_falls_back_to_earlier_entries():
+    complete = json.dumps({"errors": [ERROR, OTHER]})
+    truncated = complete[:complete.index('"nama') + 3]
+    assert parse_error_analysis(truncated) == [ERROR]
+
+
+def test_single_quoted_python_dict():
+    assert parse_error_analysis(repr({"errors": [ERROR]})) == [ERROR]
+
+
+@pytest.mark.parametrize("content", [
+    "{[1]: 2}",
+    "{'errors': [" * 2000,
+    "{" * 100_000,
+    "no json here",
+    "",
+])
+def test_unparseable_input_raises_parse_error(content):
+    with pytest.raises(AnalysisParseError):
+        parse_error_analysis(content)
+
+
+def test_repair_callback_gets_only_the_broken_json():
+    seen = []
+
+    def repair(text):
+        seen.append(text)
+        return json.dumps({"errors": [ERROR]})
+
+    content = 'Analysis: {"errors":[{"type":"gram'
+    assert parse_error_analysis(content, repair=repair) == [ERROR]
+    assert seen == ['{"errors":[{"type":"gram']
+
+
+def test_repair_callback_not_called_for_valid_json():
+    def repair(text):
+        raise AssertionError("repair should not run")
+
+    assert parse_error_analysis(json.dumps({"errors": [ERROR]}), repair=repair) == [ERROR]
+
+
+def test_failed_repair_raises_parse_error():
+    with pytest.raises(AnalysisParseError):
+        parse_error_analysis('{"errors":[{"type":"gram', repair=lambda text: "still broken")
+
+
+def test_async_repair_callback():
+    async def repair(text):
+        return json.dumps({"errors": [OTHER]})
+
+    assert asyncio.run(aparse_error_analysis('{"errors":[{', repair=repair)) == [OTHER]
+
+
+def test_malformed_entries_are_dropped_individually():
+    result = {"errors": [ERROR, "not an entry", {"type": "grammar"},
+                         {**OTHER, "incorrect_part": 3}, OTHER]}
+    assert validate_errors(result) == [ERROR, OTHER]
+
+
+def test_unknown_type_and_severity_map_to_unknown():
+    entry = {**ERROR, "type": "Spelling", "severity": "CRITICAL"}
+    assert validate_errors({"errors": [entry]}) == [{**ERROR, "type": "unknown", "severity": "unknown"}]
+
+
+def test_optional_fields_get_defaults_and_enums_are_case_folded():
+    entry = {"error_type": " Grammar ", "incorrect_part": "x", "correction": "y", "severity": None}
+    assert validate_errors([entry]) == [{"type": "grammar", "incorrect_part": "x", "correct_version": "y",
+                                         "explanation": "", "severity": "medium"}]
+
+
+def test_no_usable_entries_is_an_error():
+    with pytest.raises(AnalysisParseError):
+        validate_errors({"errors": [{"type": "grammar"}, 7]})
+    with pytest.raises(AnalysisParseError):
+        validate_errors({"errors": "none"})
@@ -0,0 +1,37 @@
+# tests/test_bench_render.py
+"""Smoke test of the app under streamlit.testing, through bench_render's helpers"""
+import pytest
+
+pytest.importorskip("streamlit")
+
+import app
+import bench_render
+from session_manager import SessionManager
+from fake_llm import FakeChatModel
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = SessionManager(llm=FakeChatModel(latency=0.0), memory_mode="window")
+    monkeypatch.setattr(app, "get_session_manager", lambda: manager)
+    monkeypatch.setattr(app, "RENDER_MODE", app.RENDER_MODE)
+    return manager
+
+
+@pytest.mark.parametrize("mode", ["full", "paged"])
+def test_app_renders_a_preset_session_key(manager, mode):
+    # A session_key set before the first run, as bench_render and a
+    # resumed link do, must still get a tab id and claim the session
+    bench_render.seed_session(manager, "smoke", 10)
+    seconds, elements = bench_render.time_reruns(mode, "smoke", reruns=1)
+    assert seconds > 0
+    # Full mode renders one element per message; paged mode renders a page per element
+    assert elements >= (10 if mode == "full" else 1)
+    assert manager.get("smoke").current_session_id is not None
+
+
+def test_paged_mode_limits_the_rendered_history(manager):
+    bench_render.seed_session(manager, "long", 3 * app.HISTORY_PAGE_SIZE)
+    _, full = bench_render.time_reruns("full", "long", reruns=1)
+    _, paged = bench_render.time_reruns("paged", "long", reruns=1)
+    assert paged < full
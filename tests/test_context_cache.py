@@ -0,0 +1,96 @@
+# tests/test_context_cache.py
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from context_cache import LocalContextCache, CachedPrefixLLM
+from fake_llm import FakeChatModel
+
+PREFIX = "You are a patient language tutor. " * 20
+
+
+class SlowCache(LocalContextCache):
+    """Creates take as long as a provider round trip"""
+
+    def __init__(self, delay: float = 0.2, fail: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.fail = fail
+        self.creates = 0
+
+    def _create(self, model: str, prefix: str) -> str:
+        self.creates += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("caching not supported")
+        return super()._create(model, prefix)
+
+
+def test_handle_is_created_once_and_reused():
+    cache = SlowCache(delay=0)
+    first = cache.handle("model", PREFIX)
+    assert cache.handle("model", PREFIX) is first
+    assert cache.handle("other-model", PREFIX) is not first
+    assert cache.counts["created"] == 2 and cache.counts["hits"] == 1
+
+
+def test_concurrent_callers_share_one_create():
+    cache = SlowCache()
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        handles = list(pool.map(lambda _: cache.handle("model", PREFIX), range(5)))
+    assert cache.creates == 1
+    assert len({id(handle) for handle in handles}) == 1
+
+
+def test_failed_create_is_not_retried_until_retry_after():
+    cache = SlowCache(delay=0, fail=True)
+    assert cache.handle("model", PREFIX) is None
+    assert cache.handle("model", PREFIX) is None
+    assert cache.creates == 1 and cache.counts["failures"] == 1
+
+
+def test_expiring_handle_is_renewed():
+    cache = SlowCache(delay=0, ttl_seconds=0.05, renew_margin=0)
+    first = cache.handle("model", PREFIX)
+    time.sleep(0.06)
+    assert cache.handle("model", PREFIX) is not first
+    assert cache.creates == 2
+
+
+def test_ahandle_does_not_block_the_event_loop():
+    cache = SlowCache(delay=0.3)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.ensure_future(ticker())
+        handles = await asyncio.gather(*(cache.ahandle("model", PREFIX) for _ in range(5)))
+        task.cancel()
+        return handles, ticks
+
+    handles, ticks = asyncio.run(run())
+    assert cache.creates == 1
+    assert len({id(handle) for handle in handles}) == 1
+    # A blocked loop would not tick at all while the create runs
+    assert ticks >= 10
+
+
+def test_cached_prefix_llm_sends_the_full_prompt_to_the_model():
+    messages = [SystemMessage(content="Level: beginner"), HumanMessage(content="namaste")]
+    plain, cached = FakeChatModel(latency=0), FakeChatModel(latency=0)
+    cache = LocalContextCache()
+    wrapped = CachedPrefixLLM(cache, cached, "model", PREFIX)
+
+    plain.invoke([SystemMessage(content=PREFIX + "Level: beginner"), messages[1]])
+    wrapped.invoke(messages)
+    asyncio.run(wrapped.ainvoke(messages))
+    assert cached.usage["input_tokens"] == 2 * plain.usage["input_tokens"]
+    assert cache.counts["hits"] == 1 and cache.counts["created"] == 1
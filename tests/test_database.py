@@ -0,0 +1,114 @@
+# tests/test_database.py
+import pytest
+
+from database import MistakeDatabase, SQLiteMistakeDatabase, RetentionPolicy
+
+GRAMMAR = {"type": "grammar", "incorrect_part": "soy ir", "correct_version": "voy a ir",
+           "explanation": "", "severity": "high"}
+VOCABULARY = {"type": "vocabulary", "incorrect_part": "namate", "correct_version": "namaste",
+              "explanation": "", "severity": "low"}
+MISTAKES = [
+    ("Yo soy ir al mercado", [GRAMMAR]),
+    ("namate ji", [VOCABULARY, GRAMMAR]),
+    # Counts as a mistake but has no mistake_errors rows
+    ("hmm", []),
+    ("namate", [VOCABULARY]),
+]
+EXPECTED = {
+    "total_mistakes": 4,
+    "total_errors": 4,
+    "by_type": {"grammar": 2, "vocabulary": 2},
+    "by_severity": {"high": 2, "low": 2},
+    "top_incorrect_parts": [("soy ir", 2), ("namate", 2)],
+}
+
+
+def comparable(summary):
+    # most_common breaks ties by insertion order, which a GROUP BY does not keep
+    return {**summary, "top_incorrect_parts": sorted(summary["top_incorrect_parts"])}
+
+
+def record(db):
+    session_id = db.create_session("Spanish", "beginner")
+    for user_input, errors in MISTAKES:
+        db.add_mistake(session_id, user_input, errors)
+    return session_id
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_db(request, tmp_path):
+    opened = []
+
+    def make(retention=None):
+        if request.param == "memory":
+            db = MistakeDatabase(retention=retention)
+        else:
+            db = SQLiteMistakeDatabase(str(tmp_path / "mistakes.db"), retention=retention)
+        opened.append(db)
+        return db
+
+    yield make
+    for db in opened:
+        if isinstance(db, SQLiteMistakeDatabase) and not db._closed:
+            db.close()
+
+
+def test_live_summary(make_db):
+    db = make_db()
+    session_id = record(db)
+    assert comparable(db.get_session_summary(session_id)) == comparable(EXPECTED)
+    assert len(db.get_session_mistakes(session_id)) == 4
+
+
+def test_summary_survives_end_and_compaction(make_db):
+    db = make_db(RetentionPolicy(compact_after=0))
+    session_id = record(db)
+    db.end_session(session_id)
+    assert db.get_session_mistakes(session_id) == []
+    assert comparable(db.get_session_summary(session_id)) == comparable(EXPECTED)
+
+
+def test_summary_survives_export_and_import(make_db):
+    db = make_db()
+    data = db.export_session(record(db))
+    other = MistakeDatabase()
+    assert comparable(other.get_session_summary(other.import_session(data))) == comparable(EXPECTED)
+
+
+def test_removed_sessions_have_empty_summaries(make_db):
+    db = make_db(RetentionPolicy(max_ended_sessions=0))
+    session_id = record(db)
+    db.end_session(session_id)
+    assert db.get_session_summary(session_id)["total_mistakes"] == 0
+
+
+def test_sqlite_summary_matches_across_reopen(tmp_path):
+    path = str(tmp_path / "mistakes.db")
+    db = SQLiteMistakeDatabase(path)
+    active, ended = record(db), record(db)
+    db.end_session(ended)
+    live = comparable(db.get_session_summary(active))
+    db.close()
+
+    db = SQLiteMistakeDatabase(path, retention=RetentionPolicy(compact_after=0))
+    try:
+        assert comparable(db.get_session_summary(active)) == live == comparable(EXPECTED)
+        assert db.apply_retention() == {"compacted": 1, "removed": 0}
+        assert comparable(db.get_session_summary(ended)) == live
+        # Mistakes recorded after the reopen add to the loaded stats
+        db.add_mistake(active, "namate", [VOCABULARY])
+        assert db.get_session_summary(active)["total_mistakes"] == 5
+    finally:
+        db.close()
+
+
+def test_sqlite_stats_are_evicted_when_sessions_end(tmp_path):
+    db = SQLiteMistakeDatabase(str(tmp_path / "mistakes.db"))
+    try:
+        session_id = record(db)
+        assert session_id in db._stats
+        db.end_session(session_id)
+        assert db.get_session_summary(session_id)["total_mistakes"] == 4
+        assert db._stats == {}
+    finally:
+        db.close()
@@ -0,0 +1,119 @@
+# tests/test_llm_client.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm_client import LLMGate, ResilientLLM, is_retryable
+from fake_llm import FakeChatModel
+
+
+class ResourceExhausted(Exception):
+    """Named like the provider's quota error, which is retryable"""
+
+
+class FlakyLLM:
+    """Fails the first `failures` calls with `error`, then answers"""
+
+    def __init__(self, failures: int, error: Exception):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def invoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return f"ok: {input}"
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return self.invoke(input, config, **kwargs)
+
+
+def gate(**kwargs):
+    # No backoff sleeps and no rate limit, so retries run instantly
+    return LLMGate(requests_per_minute=1_000_000, burst=1_000, base_delay=0, max_delay=0, **kwargs)
+
+
+def test_retryable_errors():
+    assert is_retryable(ResourceExhausted())
+    assert is_retryable(RuntimeError("HTTP 429 Too Many Requests"))
+    assert not is_retryable(ValueError("bad prompt"))
+
+
+def test_retries_until_success():
+    llm, limiter = FlakyLLM(2, ResourceExhausted()), gate()
+    assert ResilientLLM(llm, gate=limiter).invoke("hi") == "ok: hi"
+    assert llm.calls == 3
+    assert limiter.stats()["retries"] == 2
+    assert limiter.stats()["failures"] == 0
+
+
+def test_gives_up_after_max_retries():
+    llm, limiter = FlakyLLM(10, ResourceExhausted()), gate(max_retries=2)
+    with pytest.raises(ResourceExhausted):
+        ResilientLLM(llm, gate=limiter).invoke("hi")
+    assert llm.calls == 3
+    assert limiter.stats()["failures"] == 1
+
+
+def test_does_not_retry_other_errors():
+    llm, limiter = FlakyLLM(1, ValueError("bad prompt")), gate()
+    with pytest.raises(ValueError):
+        ResilientLLM(llm, gate=limiter).invoke("hi")
+    assert llm.calls == 1
+
+
+def test_async_retries_until_success():
+    llm, limiter = FlakyLLM(1, ResourceExhausted()), gate()
+    assert asyncio.run(ResilientLLM(llm, gate=limiter).ainvoke("hi")) == "ok: hi"
+    assert limiter.stats()["retries"] == 1
+
+
+def test_concurrency_slots_are_released():
+    limiter = gate(max_concurrency=2)
+    client = ResilientLLM(FlakyLLM(3, ResourceExhausted()), gate=limiter)
+    client.invoke("hi")
+    assert limiter.stats()["in_flight"] == 0
+    # Both slots are free again
+    assert limiter._semaphore.acquire(blocking=False) and limiter._semaphore.acquire(blocking=False)
+
+
+def test_identical_concurrent_prompts_are_coalesced():
+    llm, limiter = FakeChatModel(latency=0.2), gate()
+    client = ResilientLLM(llm, gate=limiter)
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        replies = list(pool.map(lambda _: client.invoke("hola").content, range(5)))
+    assert len(set(replies)) == 1
+    assert sum(llm.calls.values()) == 1
+    assert limiter.stats()["coalesced"] == 4
+
+
+def test_coalescing_can_be_disabled():
+    llm, limiter = FakeChatModel(latency=0.2), gate()
+    client = ResilientLLM(llm, gate=limiter, coalesce=False)
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        list(pool.map(lambda _: client.invoke("hola"), range(5)))
+    assert sum(llm.calls.values()) == 5
+    assert limiter.stats()["coalesced"] == 0
+
+
+def test_async_identical_prompts_are_coalesced():
+    llm, limiter = FakeChatModel(latency=0.2), gate()
+    client = ResilientLLM(llm, gate=limiter)
+
+    async def run():
+        return await asyncio.gather(*(client.ainvoke("hola") for _ in range(5)))
+
+    assert len({reply.content for reply in asyncio.run(run())}) == 1
+    assert sum(llm.calls.values()) == 1
+    assert limiter.stats()["coalesced"] == 4
+
+
+def test_failed_call_is_not_left_in_flight():
+    llm, limiter = FlakyLLM(1, ValueError("bad prompt")), gate()
+    client = ResilientLLM(llm, gate=limiter)
+    with pytest.raises(ValueError):
+        client.invoke("hi")
+    # The failed call is no longer in flight, so the next one is sent
+    assert client.invoke("hi") == "ok: hi"
@@ -0,0 +1,126 @@
+# tests/test_snapshots.py
+import time
+import asyncio
+
+import pytest
+
+from database import MistakeDatabase
+from session_manager import SessionManager, AsyncSessionManager
+from snapshots import (
+    FileSnapshotStore, SQLiteSnapshotStore, SnapshotError, SNAPSHOT_VERSION,
+    encode_snapshot, decode_snapshot
+)
+from fake_llm import FakeChatModel
+
+TURNS = ["namate", "mera naam Sara hai", "dhanyavad"]
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "file":
+        yield FileSnapshotStore(str(tmp_path / "snapshots"))
+    else:
+        store = SQLiteSnapshotStore(str(tmp_path / "snapshots.db"))
+        yield store
+        store.close()
+
+
+def worker(store, manager_class=SessionManager, db=None):
+    """A SessionManager as another process would build it, with its own database"""
+    return manager_class(llm=FakeChatModel(latency=0), db=db or MistakeDatabase(),
+                         memory_mode="window", snapshot_store=store)
+
+
+def session_view(assistant):
+    return {
+        "language": assistant.learning_lang,
+        "level": assistant.current_level,
+        "history": assistant.chat_history()[0],
+        "taught": assistant.taught_phrases.phrases(),
+        "reviews": assistant.reviews.to_state(),
+        "summary": assistant.db.get_session_summary(assistant.current_session_id),
+    }
+
+
+def test_encode_decode_round_trip():
+    state = {"language": "Hindi", "memory": {"history": [["user", "नमस्ते"]]}}
+    assert decode_snapshot(encode_snapshot(state)) == {"version": SNAPSHOT_VERSION, **state}
+
+
+def test_corrupt_and_foreign_snapshots_raise():
+    with pytest.raises(SnapshotError):
+        decode_snapshot(b"not a snapshot")
+    with pytest.raises(SnapshotError):
+        decode_snapshot(encode_snapshot({"version": -1}))
+
+
+def test_store_put_get_delete_expire(store):
+    store.put("learner", b"one")
+    store.put("learner", b"two")
+    assert store.get("learner") == b"two"
+    store.delete("learner")
+    assert store.get("learner") is None
+    store.put("old", b"old")
+    assert store.expire(time.time() + 1) == [b"old"]
+    assert store.get("old") is None
+
+
+def test_session_resumes_on_another_worker(store, unthrottled_gate):
+    first = worker(store)
+    assistant = first.get("learner")
+    assistant.start_session("hindi", "beginner")
+    for text in TURNS:
+        assistant.generate_response(text)
+    assert first.save("learner")
+    before = session_view(assistant)
+
+    resumed = worker(store).get("learner")
+    assert resumed.current_session_id is not None
+    assert session_view(resumed) == before
+    # The resumed session keeps working
+    resumed.generate_response("aap kaise ho")
+    assert len(resumed.chat_history()[0]) == len(before["history"]) + 2
+
+
+def test_async_session_resumes_on_another_worker(store, unthrottled_gate):
+    async def run():
+        first = worker(store, AsyncSessionManager)
+        assistant = await first.get("learner")
+        await assistant.start_session("spanish", "intermediate")
+        for text in TURNS:
+            await assistant.generate_response(text)
+        assert await first.save("learner")
+        before = session_view(assistant)
+        resumed = await worker(store, AsyncSessionManager).get("learner")
+        return before, session_view(resumed)
+
+    before, after = asyncio.run(run())
+    assert after == before
+
+
+def test_snapshot_for_unknown_language_is_ignored(store, unthrottled_gate):
+    db = MistakeDatabase()
+    first = worker(store, db=db)
+    first.get("learner").start_session("hindi", "beginner")
+    first.save("learner")
+    state = decode_snapshot(store.get("learner"))
+    store.put("learner", encode_snapshot({**state, "language": "Klingon"}))
+
+    resumed = worker(store, db=db).get("learner")
+    assert resumed.current_session_id is None
+    # Rejected before the database session was imported
+    assert len(db.get_active_sessions()) == 1
+
+
+def test_expired_snapshot_ends_its_session(store, unthrottled_gate):
+    db = MistakeDatabase()
+    manager = worker(store, db=db)
+    manager.get("learner").start_session("hindi", "beginner")
+    manager.save("learner")
+
+    # Another worker sweeps the store; the session is not live there
+    other = worker(store, db=db)
+    other.snapshot_ttl = 0
+    assert other.expire_snapshots() == 1
+    assert store.get("learner") is None
+    assert db.get_active_sessions() == []
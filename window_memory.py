@@ -0,0 +1,184 @@
+# window_memory.py
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Callable, Tuple
+
+# Summaries are folded in the background so they never block a turn
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap local estimate (~4 characters per token) that avoids a remote count call"""
+    return max(1, len(text) // 4)
+
+
+class TokenWindowMemory:
+    """
+    Drop-in replacement for ConversationBufferMemory (return_messages=True)
+    that keeps only the most recent turns within max_tokens. Turns that fall
+    out of the window are folded into a running summary by `summarizer`
+    (any object with .invoke(prompt) -> message) on a background thread.
+    The full conversation, capped at max_history_messages, is kept
+    separately for display.
+    """
+
+    memory_key = "history"
+
+    def __init__(self, max_tokens: int = 1500, summarizer=None,
+                 max_summary_words: int = 120,
+                 token_counter: Callable[[str], int] = approx_tokens,
+                 max_history_messages: int = 2000):
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.max_summary_words = max_summary_words
+        self.token_counter = token_counter
+        self.summary = ""
+        self._turns = deque()
+        self._history = deque(maxlen=max_history_messages)
+        self._window_tokens = 0
+        self._evicted = []
+        self._summarizing = False
+        # Bumped by clear/load_state so a fold still running for the old
+        # conversation cannot write its summary into the new one
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def load_memory_variables(self, inputs: Dict) -> Dict[str, List]:
+        from langchain_core.messages import SystemMessage
+
+        with self._lock:
+            messages = [message for turn in self._turns for message in turn[0]]
+            summary = self.summary
+        if summary:
+            messages.insert(0, SystemMessage(content=f"Summary of earlier conversation: {summary}"))
+        return {self.memory_key: messages}
+
+    def save_context(self, inputs: Dict, outputs: Dict):
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        turn = (
+            HumanMessage(content=inputs["input"]),
+            AIMessage(content=outputs["output"])
+        )
+        tokens = sum(self.token_counter(message.content) for message in turn)
+        with self._lock:
+            self._history.append(("user", inputs["input"]))
+            self._history.append(("tutor", outputs["output"]))
+            self._turns.append((turn, tokens))
+            self._window_tokens += tokens
+            # Always keep the latest turn, even if it alone exceeds the budget
+            while self._window_tokens > self.max_tokens and len(self._turns) > 1:
+                evicted, evicted_tokens = self._turns.popleft()
+                self._window_tokens -= evicted_tokens
+                self._evicted.append(evicted)
+            start_summary = bool(self._evicted) and self.summarizer is not None \
+                and not self._summarizing
+            if start_summary:
+                self._summarizing = True
+        if start_summary:
+            _summary_executor.submit(self._fold_evicted)
+        elif self.summarizer is None:
+            with self._lock:
+                self._evicted.clear()
+
+    def _summary_prompt(self, summary: str, turns: List) -> str:
+        lines = "\n".join(
+            f"Learner: {human.content}\nTutor: {ai.content}" for human, ai in turns
+        )
+        return f"""Update the running summary of a language lesson.
+        Keep taught phrases, recurring mistakes and the learner's progress.
+        Reply with the new summary only, under {self.max_summary_words} words.
+
+        Current summary:
+        {summary or "(empty)"}
+
+        New conversation lines:
+        {lines}"""
+
+    def _fold_evicted(self):
+        while True:
+            with self._lock:
+                turns, self._evicted = self._evicted, []
+                summary, generation = self.summary, self._generation
+                if not turns:
+                    self._summarizing = False
+                    return
+            try:
+                response = self.summarizer.invoke(self._summary_prompt(summary, turns))
+                new_summary = response.content.strip()
+            except Exception as e:
+                print(f"Memory summary failed: {e}")
+                new_summary = summary
+            with self._lock:
+                if generation == self._generation:
+                    self.summary = new_summary
+
+    def window_tokens(self) -> int:
+        """Estimated tokens of history sent with the next turn"""
+        with self._lock:
+            return self._window_tokens + (self.token_counter(self.summary) if self.summary else 0)
+
+    def history(self) -> List[Tuple[str, str]]:
+        """(sender, text) for every kept message, oldest first, including summarized turns"""
+        with self._lock:
+            return list(self._history)
+
+    def to_state(self) -> Dict:
+        """
+        JSON-ready memory for a session snapshot. The window turns are the
+        newest entries of the history, so only their count is stored; turns
+        still waiting to be summarized are counted the same way.
+        """
+        with self._lock:
+            history = [list(message) for message in self._history]
+            window, pending = len(self._turns), len(self._evicted)
+            turns = None
+            if 2 * (window + pending) > len(history):
+                # The display history was capped below the window; keep the turns
+                turns = [[human.content, ai.content] for (human, ai), _ in self._turns]
+            return {"summary": self.summary, "history": history, "window": window,
+                    "pending": pending, "turns": turns}
+
+    def load_state(self, state: Dict):
+        """Replace the memory with a to_state() snapshot"""
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        history = [tuple(message) for message in state["history"]]
+        pairs = state.get("turns")
+        if pairs is None:
+            texts = [text for _, text in history]
+            end = len(texts)
+            start = end - 2 * (state["window"] + state["pending"])
+            pairs = list(zip(texts[start:end:2], texts[start + 1:end:2]))
+            evicted, pairs = pairs[:state["pending"]], pairs[state["pending"]:]
+        else:
+            evicted = []
+        turns = deque(
+            ((HumanMessage(content=human), AIMessage(content=ai)),
+             self.token_counter(human) + self.token_counter(ai))
+            for human, ai in pairs
+        )
+        with self._lock:
+            self._generation += 1
+            self.summary = state["summary"]
+            self._history.clear()
+            self._history.extend(history)
+            self._turns = turns
+            self._window_tokens = sum(tokens for _, tokens in turns)
+            # Folded into the summary with the next evicted turn
+            self._evicted = [(HumanMessage(content=human), AIMessage(content=ai))
+                             for human, ai in evicted]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._history.clear()
+            self._turns.clear()
+            self._evicted = []
+            self._window_tokens = 0
+            self.summary = ""